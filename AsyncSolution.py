@@ -0,0 +1,218 @@
+import time
+from typing import Dict, List, Tuple
+import Operations
+from Utility.AsyncDBConnector import AsyncDBConnector
+from Utility.ReturnValue import ReturnValue
+from Utility.PlacementPolicy import PlacementPolicy
+from Business.Query import Query
+from Business.RAM import RAM
+from Business.Disk import Disk
+
+'''
+    asyncio version of Solution: same functions, same ReturnValues and business objects. both run the
+    statements of Operations, this module on non-blocking psycopg2 connections borrowed from AsyncDBConnector's pool.
+    tables are created / dropped with the (blocking) Solution functions. the profile cache and the concurrency mode
+    enabled with Solution.enableProfileCache and Solution.enableConcurrencyMode apply here too
+'''
+
+
+# runs an operation of Operations on AsyncDBConnector, every Transaction it yields in a transaction of its own
+async def _run(operation):
+    try:
+        request = next(operation)
+        while True:
+            try:
+                result = await _transaction(request.body)
+            except Exception as e:
+                request = operation.throw(e)
+            else:
+                request = operation.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+# runs body() on a connection of its own and commits, retried in concurrency mode
+async def _transaction(body):
+    policy = Operations.concurrency
+
+    async def _attempt():
+        conn = AsyncDBConnector()
+        try:
+            await conn.open()
+            result = await _execute(conn, body(), policy)
+            await conn.commit()
+            return result
+        finally:
+            # the transaction is rolled back if it wasn't committed
+            await conn.close()
+
+    if policy is None:
+        return await _attempt()
+    return await policy.runAsync(_attempt)
+
+
+# sends what the transaction body yields to conn and the results back, returns what the body returned
+async def _execute(conn, body, policy):
+    result = None
+    while True:
+        try:
+            request = body.send(result)
+        except StopIteration as stop:
+            return stop.value
+        if isinstance(request, Operations.Lock):
+            result = None
+            if policy is not None:
+                start = time.perf_counter()
+                await conn.execute(request.query, params=request.params)
+                policy.stats.add('lock_wait_seconds', time.perf_counter() - start)
+        elif isinstance(request, Operations.Stream):
+            # async connections have no server-side cursor, the rows are fetched at once
+            _, resultSet = await conn.execute(request.query)
+            result = iter(resultSet.rows)
+        else:
+            result = await conn.execute(request.query, params=request.params if len(request.params) > 0 else None)
+
+
+async def addQuery(queryToInsert: Query) -> ReturnValue:
+    return await _run(Operations.addQuery(queryToInsert))
+
+
+async def getQueryProfile(queryID: int) -> Query:
+    return await _run(Operations.getQueryProfile(queryID))
+
+
+async def deleteQuery(query: Query) -> ReturnValue:
+    return await _run(Operations.deleteQuery(query))
+
+
+async def addDisk(disk: Disk) -> ReturnValue:
+    return await _run(Operations.addDisk(disk))
+
+
+async def getDiskProfile(diskID: int) -> Disk:
+    return await _run(Operations.getDiskProfile(diskID))
+
+
+async def deleteDisk(diskID: int) -> ReturnValue:
+    return await _run(Operations.deleteDisk(diskID))
+
+
+async def addRAM(ramToInsert: RAM) -> ReturnValue:
+    return await _run(Operations.addRAM(ramToInsert))
+
+
+async def getRAMProfile(ramID: int) -> RAM:
+    return await _run(Operations.getRAMProfile(ramID))
+
+
+async def deleteRAM(ramID: int) -> ReturnValue:
+    return await _run(Operations.deleteRAM(ramID))
+
+
+async def addQueries(queries) -> List[ReturnValue]:
+    return await _run(Operations.addQueries(queries))
+
+
+async def addDisks(disks) -> List[ReturnValue]:
+    return await _run(Operations.addDisks(disks))
+
+
+async def addRAMs(rams) -> List[ReturnValue]:
+    return await _run(Operations.addRAMs(rams))
+
+
+async def getQueryProfiles(queryIDs) -> Dict[int, Query]:
+    return await _run(Operations.getQueryProfiles(queryIDs))
+
+
+async def getDiskProfiles(diskIDs) -> Dict[int, Disk]:
+    return await _run(Operations.getDiskProfiles(diskIDs))
+
+
+async def getRAMProfiles(ramIDs) -> Dict[int, RAM]:
+    return await _run(Operations.getRAMProfiles(ramIDs))
+
+
+async def addDiskAndQuery(disk: Disk, queryToInsert: Query) -> ReturnValue:
+    return await _run(Operations.addDiskAndQuery(disk, queryToInsert))
+
+
+async def addQueryToDisk(query: Query, diskID: int) -> ReturnValue:
+    return await _run(Operations.addQueryToDisk(query, diskID))
+
+
+async def addQueriesToDisks(pairs) -> List[ReturnValue]:
+    return await _run(Operations.addQueriesToDisks(pairs))
+
+
+async def placeQueries(queryIDs, policy: PlacementPolicy = PlacementPolicy.BEST_FIT) \
+        -> Tuple[Dict[int, int], List[int]]:
+    return await _run(Operations.placeQueries(queryIDs, policy))
+
+
+async def removeQueryFromDisk(query: Query, diskID: int) -> ReturnValue:
+    return await _run(Operations.removeQueryFromDisk(query, diskID))
+
+
+async def addRAMToDisk(ramID: int, diskID: int) -> ReturnValue:
+    return await _run(Operations.addRAMToDisk(ramID, diskID))
+
+
+async def removeRAMFromDisk(ramID: int, diskID: int) -> ReturnValue:
+    return await _run(Operations.removeRAMFromDisk(ramID, diskID))
+
+
+async def averageSizeQueriesOnDisk(diskID: int) -> float:
+    return await _run(Operations.averageSizeQueriesOnDisk(diskID))
+
+
+async def diskTotalRAM(diskID: int) -> int:
+    return await _run(Operations.diskTotalRAM(diskID))
+
+
+async def averageSizeQueriesOnDiskForAll() -> Dict[int, float]:
+    return await _run(Operations.averageSizeQueriesOnDiskForAll())
+
+
+async def diskTotalRAMForAll() -> Dict[int, int]:
+    return await _run(Operations.diskTotalRAMForAll())
+
+
+async def getCostForPurpose(purpose: str) -> int:
+    return await _run(Operations.getCostForPurpose(purpose))
+
+
+async def getCostForAllPurposes() -> Dict[str, int]:
+    return await _run(Operations.getCostForAllPurposes())
+
+
+async def getQueriesCanBeAddedToDisk(diskID: int) -> List[int]:
+    return await _run(Operations.getQueriesCanBeAddedToDisk(diskID))
+
+
+async def getQueriesCanBeAddedToDiskAndRAM(diskID: int) -> List[int]:
+    return await _run(Operations.getQueriesCanBeAddedToDiskAndRAM(diskID))
+
+
+async def isCompanyExclusive(diskID: int) -> bool:
+    return await _run(Operations.isCompanyExclusive(diskID))
+
+
+async def getNonExclusiveDisks() -> List[int]:
+    return await _run(Operations.getNonExclusiveDisks())
+
+
+async def getConflictingDisks() -> List[int]:
+    return await _run(Operations.getConflictingDisks())
+
+
+async def mostAvailableDisks(k: int = 5) -> List[int]:
+    return await _run(Operations.mostAvailableDisks(k))
+
+
+async def getCloseQueries(queryID: int) -> List[int]:
+    return await _run(Operations.getCloseQueries(queryID))
+
+
+async def getCloseQueriesForAll() -> Dict[int, List[int]]:
+    return await _run(Operations.getCloseQueriesForAll())
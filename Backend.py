@@ -0,0 +1,33 @@
+import importlib
+import os
+
+# the modules implementing the Solution API. the backend is picked with select(), or with the
+# SOLUTION_BACKEND environment variable when select() was not called. the SQL backend is the default
+BACKENDS = {'sql': 'Solution', 'memory': 'MemorySolution'}
+
+_selected = None
+
+
+def select(name: str):
+    global _selected
+    module = get(name)
+    _selected = name
+    return module
+
+
+def name() -> str:
+    if _selected is not None:
+        return _selected
+    return os.environ.get('SOLUTION_BACKEND', 'sql')
+
+
+# the module of the given backend, without selecting it
+def get(name: str):
+    if name not in BACKENDS:
+        raise ValueError("Unknown backend: " + str(name))
+    return importlib.import_module(BACKENDS[name])
+
+
+# the module of the selected backend, e.g. Backend.current().addDisk(disk)
+def current():
+    return get(name())
@@ -0,0 +1,295 @@
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from typing import Dict, List
+import Backend
+from Business.Query import Query
+from Business.RAM import RAM
+from Business.Disk import Disk
+
+# times every Solution function against a synthetic fleet and writes one JSON object per line to bench_output.txt:
+# first the run's configuration, then ops/sec and p50/p95/p99 latency (milliseconds) of every function,
+# last the placement throughput of --workers threads against one (see measureScaling).
+# it drops and recreates the tables, so against the database it only runs with --drop-tables:
+#     python Benchmark.py --drop-tables --disks 1000 --queries 10000 --rams 2000 --density 1.5
+#     python Benchmark.py --backend memory
+
+OUTPUT = "bench_output.txt"
+COMPANIES = ["DELL", "HP", "Lenovo", "Apple", "MSI"]
+PURPOSES = ["analytics", "reporting", "search", "billing", "audit", "ml", "etl", "backup"]
+
+
+class Fleet:
+    def __init__(self, disks, queries, rams, placements, ramPlacements):
+        self.disks = disks
+        self.queries = queries
+        self.rams = rams
+        self.placements = placements  # (Query, diskID)
+        self.ramPlacements = ramPlacements  # (ramID, diskID)
+
+
+# density is the average number of disks a query is placed on, the disks are sized so every placement fits
+def generateFleet(rng: random.Random, diskCount: int, queryCount: int, ramCount: int, density: float) -> Fleet:
+    queries = [Query(queryID, rng.choice(PURPOSES), rng.randint(1, 100)) for queryID in range(1, queryCount + 1)]
+    placements = []
+    used = {}
+    for query in queries:
+        copies = min(diskCount, int(density) + (rng.random() < density - int(density)))
+        for diskID in rng.sample(range(1, diskCount + 1), copies):
+            placements.append((query, diskID))
+            used[diskID] = used.get(diskID, 0) + query.getSize()
+    disks = [Disk(diskID, rng.choice(COMPANIES), rng.randint(1, 100), used.get(diskID, 0) + rng.randint(0, 1000),
+                  rng.randint(1, 10)) for diskID in range(1, diskCount + 1)]
+    rams = [RAM(ramID, rng.choice(COMPANIES), rng.randint(1, 64)) for ramID in range(1, ramCount + 1)]
+    ramPlacements = [(ram.getRamID(), rng.randint(1, diskCount)) for ram in rams] if diskCount > 0 else []
+    return Fleet(disks, queries, rams, placements, ramPlacements)
+
+
+def loadFleet(solution, fleet: Fleet, chunkSize=10000):
+    for start in range(0, len(fleet.disks), chunkSize):
+        solution.addDisks(fleet.disks[start:start + chunkSize])
+    for start in range(0, len(fleet.queries), chunkSize):
+        solution.addQueries(fleet.queries[start:start + chunkSize])
+    for start in range(0, len(fleet.rams), chunkSize):
+        solution.addRAMs(fleet.rams[start:start + chunkSize])
+    for start in range(0, len(fleet.placements), chunkSize):
+        solution.addQueriesToDisks(fleet.placements[start:start + chunkSize])
+    for ramID, diskID in fleet.ramPlacements:
+        solution.addRAMToDisk(ramID, diskID)
+
+
+# nearest-rank percentile of sorted values
+def percentile(values: List[float], fraction: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize(name: str, latencies: List[float]) -> Dict:
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {'name': name, 'calls': len(latencies),
+            'ops_per_sec': round(len(latencies) / total, 3) if total > 0 else None,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 4),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 4)}
+
+
+def timeCalls(function, argsList) -> List[float]:
+    latencies = []
+    for args in argsList:
+        start = time.perf_counter()
+        function(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# runs every function ops times (analyticsOps times for the fleet-wide ones) and returns their summaries.
+# writes use IDs above the fleet's and are undone by the matching delete, so the reads run on the generated fleet
+def runBenchmarks(solution, fleet: Fleet, rng: random.Random, ops: int, analyticsOps: int) -> List[Dict]:
+    diskIDs = [disk.getDiskID() for disk in fleet.disks] or [1]
+    queryIDs = [query.getQueryID() for query in fleet.queries] or [1]
+    ramIDs = [ram.getRamID() for ram in fleet.rams] or [1]
+    nextQueryID = len(fleet.queries) + 1
+    nextDiskID = len(fleet.disks) + 1
+    nextRamID = len(fleet.rams) + 1
+
+    newQueries = [Query(nextQueryID + i, rng.choice(PURPOSES), rng.randint(1, 10)) for i in range(ops)]
+    newDisks = [Disk(nextDiskID + i, rng.choice(COMPANIES), rng.randint(1, 100), 100000, rng.randint(1, 10))
+                for i in range(ops)]
+    newRams = [RAM(nextRamID + i, rng.choice(COMPANIES), rng.randint(1, 64)) for i in range(ops)]
+    targets = [rng.choice(diskIDs) for _ in range(ops)]
+    bulk = max(1, ops // 10)
+
+    def pick(ids, count):
+        return [(rng.choice(ids),) for _ in range(count)]
+
+    def sample(ids):
+        return [rng.choice(ids) for _ in range(ops)]
+
+    # (name, function, argument tuples), in the order they run
+    plan = [
+        ('addQuery', solution.addQuery, [(query,) for query in newQueries]),
+        ('addDisk', solution.addDisk, [(disk,) for disk in newDisks]),
+        ('addRAM', solution.addRAM, [(ram,) for ram in newRams]),
+        ('getQueryProfile', solution.getQueryProfile, pick(queryIDs, ops)),
+        ('getDiskProfile', solution.getDiskProfile, pick(diskIDs, ops)),
+        ('getRAMProfile', solution.getRAMProfile, pick(ramIDs, ops)),
+        ('addQueryToDisk', solution.addQueryToDisk, list(zip(newQueries, targets))),
+        ('removeQueryFromDisk', solution.removeQueryFromDisk, list(zip(newQueries, targets))),
+        ('addRAMToDisk', solution.addRAMToDisk, [(ram.getRamID(), diskID) for ram, diskID in zip(newRams, targets)]),
+        ('removeRAMFromDisk', solution.removeRAMFromDisk,
+         [(ram.getRamID(), diskID) for ram, diskID in zip(newRams, targets)]),
+        ('averageSizeQueriesOnDisk', solution.averageSizeQueriesOnDisk, pick(diskIDs, ops)),
+        ('diskTotalRAM', solution.diskTotalRAM, pick(diskIDs, ops)),
+        ('getCostForPurpose', solution.getCostForPurpose, pick(PURPOSES, ops)),
+        ('getQueriesCanBeAddedToDisk', solution.getQueriesCanBeAddedToDisk, pick(diskIDs, ops)),
+        ('getQueriesCanBeAddedToDiskAndRAM', solution.getQueriesCanBeAddedToDiskAndRAM, pick(diskIDs, ops)),
+        ('isCompanyExclusive', solution.isCompanyExclusive, pick(diskIDs, ops)),
+        ('getCloseQueries', solution.getCloseQueries, pick(queryIDs, ops)),
+        ('getCostForAllPurposes', solution.getCostForAllPurposes, [()] * analyticsOps),
+        ('averageSizeQueriesOnDiskForAll', solution.averageSizeQueriesOnDiskForAll, [()] * analyticsOps),
+        ('diskTotalRAMForAll', solution.diskTotalRAMForAll, [()] * analyticsOps),
+        ('getNonExclusiveDisks', solution.getNonExclusiveDisks, [()] * analyticsOps),
+        ('getConflictingDisks', solution.getConflictingDisks, [()] * analyticsOps),
+        ('mostAvailableDisks', solution.mostAvailableDisks, [()] * analyticsOps),
+        ('getCloseQueriesForAll', solution.getCloseQueriesForAll, [()] * analyticsOps),
+        ('placeQueries', solution.placeQueries,
+         [([query.getQueryID() for query in newQueries[start:start + bulk]],) for start in range(0, ops, bulk)]),
+        ('deleteQuery', solution.deleteQuery, [(query,) for query in newQueries]),
+        ('deleteDisk', solution.deleteDisk, [(disk.getDiskID(),) for disk in newDisks]),
+        ('deleteRAM', solution.deleteRAM, [(ram.getRamID(),) for ram in newRams]),
+        ('addDiskAndQuery', solution.addDiskAndQuery, list(zip(newDisks, newQueries))),
+    ]
+    results = []
+    for name, function, argsList in plan:
+        results.append(summarize(name, timeCalls(function, argsList)))
+
+    # the bulk functions, timed per call of bulk rows, on the rows added above (deleted first) and the fleet's
+    for query, disk in zip(newQueries, newDisks):
+        solution.deleteQuery(query)
+        solution.deleteDisk(disk.getDiskID())
+    pairs = [(query, disk.getDiskID()) for query, disk in zip(newQueries, newDisks)]
+    for name, function, items in [('addQueries', solution.addQueries, newQueries),
+                                  ('addDisks', solution.addDisks, newDisks),
+                                  ('addRAMs', solution.addRAMs, newRams),
+                                  ('addQueriesToDisks', solution.addQueriesToDisks, pairs),
+                                  ('getQueryProfiles', solution.getQueryProfiles, sample(queryIDs)),
+                                  ('getDiskProfiles', solution.getDiskProfiles, sample(diskIDs)),
+                                  ('getRAMProfiles', solution.getRAMProfiles, sample(ramIDs))]:
+        summary = summarize(name, timeCalls(function, [(items[start:start + bulk],)
+                                                       for start in range(0, len(items), bulk)]))
+        summary['rows_per_call'] = bulk
+        results.append(summary)
+    return results
+
+
+# addQueryToDisk / removeQueryFromDisk in concurrency mode, by one worker and then by workers threads at once.
+# every worker has queries (with a purpose) and disks of its own, so they only share the connection pool and the
+# database. the rows get IDs above the ones runBenchmarks uses and are deleted again. ops_per_sec is wall clock
+# throughput of the threads together, speedup compares it with the single worker's
+def measureScaling(solution, fleet: Fleet, rng: random.Random, workers: int, ops: int) -> Dict:
+    firstQueryID = len(fleet.queries) + ops + 1
+    firstDiskID = len(fleet.disks) + ops + 1
+    queriesPerWorker = 20
+    querySets = []
+    diskSets = []
+    for index in range(workers + 1):
+        first = firstQueryID + index * queriesPerWorker
+        querySets.append([Query(queryID, "scaling" + str(index), rng.randint(1, 10))
+                          for queryID in range(first, first + queriesPerWorker)])
+        diskSets.append([firstDiskID + 2 * index, firstDiskID + 2 * index + 1])
+    solution.addQueries([query for queries in querySets for query in queries])
+    solution.addDisks([Disk(diskID, rng.choice(COMPANIES), 10, 100000, 1)
+                       for diskIDs in diskSets for diskID in diskIDs])
+
+    def work(queries, diskIDs, seed, latencies):
+        local = random.Random(seed)
+        placed = set()
+        for _ in range(ops):
+            query = local.choice(queries)
+            diskID = local.choice(diskIDs)
+            start = time.perf_counter()
+            if (query.getQueryID(), diskID) in placed:
+                solution.removeQueryFromDisk(query, diskID)
+                placed.discard((query.getQueryID(), diskID))
+            else:
+                solution.addQueryToDisk(query, diskID)
+                placed.add((query.getQueryID(), diskID))
+            latencies.append(time.perf_counter() - start)
+
+    def run(indexes, latencies) -> float:
+        threads = [threading.Thread(target=work, args=(querySets[index], diskSets[index], rng.random(), latencies))
+                   for index in indexes]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    latencies = []
+    solution.enableConcurrencyMode()
+    try:
+        alone = run([0], [])
+        together = run(range(1, workers + 1), latencies)
+    finally:
+        solution.disableConcurrencyMode()
+        for queries in querySets:
+            for query in queries:
+                solution.deleteQuery(query)
+        for diskIDs in diskSets:
+            for diskID in diskIDs:
+                solution.deleteDisk(diskID)
+
+    summary = summarize('placementScaling', latencies)
+    single = ops / alone if alone > 0 else None
+    summary['ops_per_sec'] = round(workers * ops / together, 3) if together > 0 else None
+    summary['workers'] = workers
+    summary['single_worker_ops_per_sec'] = round(single, 3) if single is not None else None
+    summary['speedup'] = round(summary['ops_per_sec'] / single, 3) if single and summary['ops_per_sec'] else None
+    return summary
+
+
+def main(argv=None) -> List[Dict]:
+    parser = argparse.ArgumentParser(description="Benchmark the Solution API on a synthetic fleet")
+    parser.add_argument('--disks', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--rams', type=int, default=400)
+    parser.add_argument('--density', type=float, default=1.5, help="average number of disks per query")
+    parser.add_argument('--ops', type=int, default=200, help="calls per function")
+    parser.add_argument('--analytics-ops', type=int, default=10, help="calls per fleet-wide function")
+    parser.add_argument('--workers', type=int, default=4, help="threads of the placement scaling run, 0 skips it")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=sorted(Backend.BACKENDS), default=Backend.name())
+    parser.add_argument('--output', default=OUTPUT)
+    parser.add_argument('--drop-tables', action='store_true',
+                        help="allow dropping the tables of the configured database (not needed for --backend memory)")
+    args = parser.parse_args(argv)
+    if args.backend != 'memory' and not args.drop_tables:
+        parser.error("the benchmark drops every table of the configured database, pass --drop-tables to go on")
+
+    solution = Backend.get(args.backend)
+    rng = random.Random(args.seed)
+    fleet = generateFleet(rng, args.disks, args.queries, args.rams, args.density)
+
+    solution.dropTables()
+    solution.createTables()
+    try:
+        start = time.perf_counter()
+        loadFleet(solution, fleet)
+        loadTime = time.perf_counter() - start
+        results = runBenchmarks(solution, fleet, rng, args.ops, args.analytics_ops)
+        if args.workers > 0:
+            results.append(measureScaling(solution, fleet, rng, args.workers, args.ops))
+    finally:
+        solution.dropTables()
+
+    config = {'backend': args.backend, 'disks': args.disks, 'queries': args.queries, 'rams': args.rams,
+              'density': args.density, 'placements': len(fleet.placements), 'ops': args.ops,
+              'analytics_ops': args.analytics_ops, 'workers': args.workers, 'seed': args.seed,
+              'load_seconds': round(loadTime, 3), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    with open(args.output, 'w') as output:
+        output.write(json.dumps(config) + "\n")
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+    return results
+
+
+def printResults(results: List[Dict]):
+    print("%-36s %8s %12s %10s %10s %10s" % ('function', 'calls', 'ops/sec', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for result in results:
+        print("%-36s %8d %12s %10.4f %10.4f %10.4f" % (result['name'], result['calls'], result['ops_per_sec'],
+                                                      result['p50_ms'], result['p95_ms'], result['p99_ms']))
+        if 'speedup' in result:
+            print("%-36s %d workers, %s ops/sec alone, speedup %s" % ('', result['workers'],
+                                                                     result['single_worker_ops_per_sec'],
+                                                                     result['speedup']))
+
+
+if __name__ == '__main__':
+    printResults(main(sys.argv[1:]))
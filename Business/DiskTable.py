@@ -0,0 +1,37 @@
+from Business.Disk import Disk
+from Business.Table import Table
+
+
+class DiskTable(Table):
+    COLUMNS = (('DiskID', 'q'), ('DiskCompany', None), ('DiskSpeed', 'q'), ('DiskFreeSpace', 'q'),
+               ('DiskCostPerByte', 'q'))
+
+    __slots__ = ()
+
+    @staticmethod
+    def fromResultSet(resultSet):
+        return DiskTable().fill(resultSet)
+
+    def __getitem__(self, index: int) -> Disk:
+        return Disk(*self.row(index))
+
+    def __iter__(self):
+        return (Disk(*row) for row in zip(*self.columns))
+
+    def append(self, disk: Disk):
+        self.appendRow((disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost()))
+
+    def diskIDs(self):
+        return self.columns[0]
+
+    def companies(self):
+        return self.columns[1]
+
+    def speeds(self):
+        return self.columns[2]
+
+    def freeSpaces(self):
+        return self.columns[3]
+
+    def costs(self):
+        return self.columns[4]
@@ -1,4 +1,6 @@
 class Query:
+    __slots__ = ('__queryID', '__purpose', '__size')
+
     def __init__(self, queryID=None, purpose=None, size=None):
         self.__queryID = queryID
         self.__purpose = purpose
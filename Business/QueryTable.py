@@ -0,0 +1,30 @@
+from Business.Query import Query
+from Business.Table import Table
+
+
+class QueryTable(Table):
+    COLUMNS = (('QueryID', 'q'), ('QueryPurpose', None), ('QuerySize', 'q'))
+
+    __slots__ = ()
+
+    @staticmethod
+    def fromResultSet(resultSet):
+        return QueryTable().fill(resultSet)
+
+    def __getitem__(self, index: int) -> Query:
+        return Query(*self.row(index))
+
+    def __iter__(self):
+        return (Query(*row) for row in zip(*self.columns))
+
+    def append(self, query: Query):
+        self.appendRow((query.getQueryID(), query.getPurpose(), query.getSize()))
+
+    def queryIDs(self):
+        return self.columns[0]
+
+    def purposes(self):
+        return self.columns[1]
+
+    def sizes(self):
+        return self.columns[2]
@@ -0,0 +1,30 @@
+from Business.RAM import RAM
+from Business.Table import Table
+
+
+class RAMTable(Table):
+    COLUMNS = (('RamID', 'q'), ('RamCompany', None), ('RamSize', 'q'))
+
+    __slots__ = ()
+
+    @staticmethod
+    def fromResultSet(resultSet):
+        return RAMTable().fill(resultSet)
+
+    def __getitem__(self, index: int) -> RAM:
+        return RAM(*self.row(index))
+
+    def __iter__(self):
+        return (RAM(*row) for row in zip(*self.columns))
+
+    def append(self, ram: RAM):
+        self.appendRow((ram.getRamID(), ram.getCompany(), ram.getSize()))
+
+    def ramIDs(self):
+        return self.columns[0]
+
+    def companies(self):
+        return self.columns[1]
+
+    def sizes(self):
+        return self.columns[2]
@@ -0,0 +1,53 @@
+import sys
+from array import array
+
+
+# column-oriented storage for many rows of one business type, numbers are kept in array buffers
+# (so numpy.frombuffer can view them without a copy) and strings in interned lists
+class Table:
+    # (column name in the database, array typecode or None for a string column), in constructor order
+    COLUMNS = ()
+
+    __slots__ = ('columns',)
+
+    def __init__(self):
+        self.columns = [array(code) if code else [] for _, code in self.COLUMNS]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    # the values of row index as a tuple, in COLUMNS order
+    def row(self, index: int) -> tuple:
+        return tuple(column[index] for column in self.columns)
+
+    # a bad value (None in a number column raises TypeError, a number too big for it OverflowError)
+    # leaves the table unchanged
+    def appendRow(self, row):
+        appended = []
+        try:
+            for (_, code), column, value in zip(self.COLUMNS, self.columns, row):
+                column.append(value if code else sys.intern(value))
+                appended.append(column)
+        except (TypeError, OverflowError):
+            for column in appended:
+                column.pop()
+            raise
+
+    # rows are tuples in COLUMNS order, e.g. straight from DBConnector.executeStream
+    def extend(self, rows):
+        for row in rows:
+            self.appendRow(row)
+
+    # append every row of a ResultSet, columns are matched by name so any column order (or extra columns) works.
+    # an empty ResultSet has no column names and adds nothing, a bad value raises and adds nothing
+    def fill(self, resultSet):
+        if resultSet.isEmpty():
+            return self
+        converted = []
+        for name, code in self.COLUMNS:
+            index = resultSet.cols[name]
+            values = (row[index] for row in resultSet.rows)
+            converted.append(array(code, values) if code else list(map(sys.intern, values)))
+        for column, values in zip(self.columns, converted):
+            column.extend(values)
+        return self
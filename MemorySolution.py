@@ -0,0 +1,533 @@
+import functools
+import heapq
+import threading
+from bisect import bisect_right, insort
+from typing import Dict, List, Tuple
+from Utility.ReturnValue import ReturnValue
+from Utility.Placement import solvePlacement
+from Utility.PlacementPolicy import PlacementPolicy
+from Business.Query import Query
+from Business.RAM import RAM
+from Business.Disk import Disk
+
+# in-process implementation of the Solution API over indexed dictionaries, for tests and simulations.
+# every function returns what Solution returns for the same calls, including the constraint checks,
+# the delete cascades and the free space accounting. values of the wrong type are reported as ERROR,
+# like the database rejecting them
+
+INTEGER_MIN = -2 ** 31
+INTEGER_MAX = 2 ** 31 - 1
+
+
+class Store:
+    def __init__(self):
+        self.queries = {}  # QueryID -> (QueryPurpose, QuerySize)
+        self.disks = {}  # DiskID -> [DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte]
+        self.rams = {}  # RamID -> (RamSize, RamCompany)
+        self.queryIDs = []  # sorted
+        self.querySizes = []  # sorted, for counting the queries that fit in a given space
+        self.queriesOnDisk = {}  # DiskID -> {QueryID: Cost}
+        self.disksOfQuery = {}  # QueryID -> set of DiskID
+        self.ramsOnDisk = {}  # DiskID -> {RamID: RamSize}
+        self.disksOfRam = {}  # RamID -> set of DiskID
+        self.purposes = {}  # QueryPurpose -> [number of queries, total cost of their placements]
+
+    def addQuery(self, queryID, purpose, size):
+        self.queries[queryID] = (purpose, size)
+        insort(self.queryIDs, queryID)
+        insort(self.querySizes, size)
+        self.disksOfQuery[queryID] = set()
+        self.purposes.setdefault(purpose, [0, 0])[0] += 1
+
+    def deleteQuery(self, queryID):
+        for diskID in list(self.disksOfQuery[queryID]):
+            self.unplaceQuery(queryID, diskID)
+        purpose, size = self.queries.pop(queryID)
+        del self.queryIDs[bisect_right(self.queryIDs, queryID) - 1]
+        del self.querySizes[bisect_right(self.querySizes, size) - 1]
+        del self.disksOfQuery[queryID]
+        self.purposes[purpose][0] -= 1
+        if self.purposes[purpose][0] == 0:
+            del self.purposes[purpose]
+
+    def addDisk(self, diskID, company, speed, freeSpace, cost):
+        self.disks[diskID] = [company, speed, freeSpace, cost]
+        self.queriesOnDisk[diskID] = {}
+        self.ramsOnDisk[diskID] = {}
+
+    def deleteDisk(self, diskID):
+        for queryID in list(self.queriesOnDisk[diskID]):
+            self.unplaceQuery(queryID, diskID)
+        for ramID in list(self.ramsOnDisk[diskID]):
+            self.unplaceRam(ramID, diskID)
+        del self.disks[diskID]
+        del self.queriesOnDisk[diskID]
+        del self.ramsOnDisk[diskID]
+
+    def addRam(self, ramID, size, company):
+        self.rams[ramID] = (size, company)
+        self.disksOfRam[ramID] = set()
+
+    def deleteRam(self, ramID):
+        for diskID in list(self.disksOfRam[ramID]):
+            self.unplaceRam(ramID, diskID)
+        del self.rams[ramID]
+        del self.disksOfRam[ramID]
+
+    def placeQuery(self, queryID, diskID, cost):
+        self.queriesOnDisk[diskID][queryID] = cost
+        self.disksOfQuery[queryID].add(diskID)
+        self.purposes[self.queries[queryID][0]][1] += cost
+
+    # removes the placement only, the disk's free space is up to the caller
+    def unplaceQuery(self, queryID, diskID):
+        cost = self.queriesOnDisk[diskID].pop(queryID)
+        self.disksOfQuery[queryID].discard(diskID)
+        self.purposes[self.queries[queryID][0]][1] -= cost
+
+    def placeRam(self, ramID, diskID):
+        self.ramsOnDisk[diskID][ramID] = self.rams[ramID][0]
+        self.disksOfRam[ramID].add(diskID)
+
+    def unplaceRam(self, ramID, diskID):
+        del self.ramsOnDisk[diskID][ramID]
+        self.disksOfRam[ramID].discard(diskID)
+
+    def totalRam(self, diskID) -> int:
+        return sum(self.ramsOnDisk[diskID].values())
+
+    def isExclusive(self, diskID) -> bool:
+        company = self.disks[diskID][0]
+        return all(self.rams[ramID][1] == company for ramID in self.ramsOnDisk[diskID])
+
+
+_store = Store()
+_lock = threading.RLock()
+
+
+# every public function runs under one lock, so the store can be shared by threads
+def _locked(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def _isInteger(value) -> bool:
+    return value is None or (type(value) is int and INTEGER_MIN <= value <= INTEGER_MAX)
+
+
+def _isText(value) -> bool:
+    return value is None or isinstance(value, str)
+
+
+# the ReturnValue of inserting a row of the given values, None if the row can be inserted
+def _insertError(table: dict, rowID, integers, texts, checks):
+    if not all(_isInteger(value) for value in integers) or not all(_isText(value) for value in texts):
+        return ReturnValue.ERROR
+    if None in integers or None in texts:
+        return ReturnValue.BAD_PARAMS
+    if not all(check() for check in checks):
+        return ReturnValue.BAD_PARAMS
+    if rowID in table:
+        return ReturnValue.ALREADY_EXISTS
+    return None
+
+
+def _queryError(query: Query):
+    queryID, purpose, size = query.getQueryID(), query.getPurpose(), query.getSize()
+    return _insertError(_store.queries, queryID, (queryID, size), (purpose,),
+                        (lambda: queryID > 0, lambda: size >= 0))
+
+
+def _diskError(disk: Disk):
+    diskID, company, speed, freeSpace, cost = \
+        disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost()
+    return _insertError(_store.disks, diskID, (diskID, speed, freeSpace, cost), (company,),
+                        (lambda: diskID > 0, lambda: speed > 0, lambda: cost > 0, lambda: freeSpace >= 0))
+
+
+def _ramError(ram: RAM):
+    ramID, company, size = ram.getRamID(), ram.getCompany(), ram.getSize()
+    return _insertError(_store.rams, ramID, (ramID, size), (company,), (lambda: ramID > 0, lambda: size > 0))
+
+
+@_locked
+def createTables():
+    global _store
+    _store = Store()
+
+
+@_locked
+def clearTables():
+    global _store
+    _store = Store()
+
+
+@_locked
+def dropTables():
+    global _store
+    _store = Store()
+
+
+def migrateSchema() -> ReturnValue:
+    return ReturnValue.OK
+
+
+# lookups are already in process, the profile cache functions only exist so both backends have the same API
+def enableProfileCache(maxSize=10000, ttl=60.0):
+    pass
+
+
+def disableProfileCache():
+    pass
+
+
+def getProfileCacheStats() -> dict:
+    return {}
+
+
+# every function already runs under one lock, there is nothing to contend for
+def enableConcurrencyMode(maxRetries=5, baseDelay=0.005, maxDelay=0.2):
+    pass
+
+
+def disableConcurrencyMode():
+    pass
+
+
+def getContentionStats() -> dict:
+    return {}
+
+
+@_locked
+def addQuery(queryToInsert: Query) -> ReturnValue:
+    error = _queryError(queryToInsert)
+    if error is not None:
+        return error
+    _store.addQuery(queryToInsert.getQueryID(), queryToInsert.getPurpose(), queryToInsert.getSize())
+    return ReturnValue.OK
+
+
+@_locked
+def getQueryProfile(queryID: int) -> Query:
+    if queryID not in _store.queries:
+        return Query.badQuery()
+    purpose, size = _store.queries[queryID]
+    return Query(queryID, purpose, size)
+
+
+@_locked
+def deleteQuery(query: Query) -> ReturnValue:
+    queryID, size = query.getQueryID(), query.getSize()
+    if not _isInteger(queryID) or not _isInteger(size):
+        return ReturnValue.ERROR
+    disks = _store.disksOfQuery.get(queryID, ())
+    if len(disks) > 0:
+        if size is None:
+            # the free space would become NULL, the database rolls the whole delete back
+            return ReturnValue.OK
+        if not all(0 <= _store.disks[diskID][2] + size <= INTEGER_MAX for diskID in disks):
+            return ReturnValue.ERROR
+        for diskID in disks:
+            _store.disks[diskID][2] += size
+    if queryID in _store.queries:
+        _store.deleteQuery(queryID)
+    return ReturnValue.OK
+
+
+@_locked
+def addDisk(disk: Disk) -> ReturnValue:
+    error = _diskError(disk)
+    if error is not None:
+        return error
+    _store.addDisk(disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost())
+    return ReturnValue.OK
+
+
+@_locked
+def getDiskProfile(diskID: int) -> Disk:
+    if diskID not in _store.disks:
+        return Disk.badDisk()
+    return Disk(diskID, *_store.disks[diskID])
+
+
+@_locked
+def deleteDisk(diskID: int) -> ReturnValue:
+    if not _isInteger(diskID):
+        return ReturnValue.ERROR
+    if diskID not in _store.disks:
+        return ReturnValue.NOT_EXISTS
+    _store.deleteDisk(diskID)
+    return ReturnValue.OK
+
+
+@_locked
+def addRAM(ramToInsert: RAM) -> ReturnValue:
+    error = _ramError(ramToInsert)
+    if error is not None:
+        return error
+    _store.addRam(ramToInsert.getRamID(), ramToInsert.getSize(), ramToInsert.getCompany())
+    return ReturnValue.OK
+
+
+@_locked
+def getRAMProfile(ramID: int) -> RAM:
+    if ramID not in _store.rams:
+        return RAM.badRAM()
+    size, company = _store.rams[ramID]
+    return RAM(ramID, company, size)
+
+
+@_locked
+def deleteRAM(ramID: int) -> ReturnValue:
+    if not _isInteger(ramID):
+        return ReturnValue.ERROR
+    if ramID not in _store.rams:
+        return ReturnValue.NOT_EXISTS
+    _store.deleteRam(ramID)
+    return ReturnValue.OK
+
+
+@_locked
+def addQueries(queries) -> List[ReturnValue]:
+    return [addQuery(query) for query in queries]
+
+
+@_locked
+def addDisks(disks) -> List[ReturnValue]:
+    return [addDisk(disk) for disk in disks]
+
+
+@_locked
+def addRAMs(rams) -> List[ReturnValue]:
+    return [addRAM(ram) for ram in rams]
+
+
+@_locked
+def getQueryProfiles(queryIDs) -> Dict[int, Query]:
+    return {queryID: getQueryProfile(queryID) for queryID in queryIDs}
+
+
+@_locked
+def getDiskProfiles(diskIDs) -> Dict[int, Disk]:
+    return {diskID: getDiskProfile(diskID) for diskID in diskIDs}
+
+
+@_locked
+def getRAMProfiles(ramIDs) -> Dict[int, RAM]:
+    return {ramID: getRAMProfile(ramID) for ramID in ramIDs}
+
+
+@_locked
+def addDiskAndQuery(disk: Disk, queryToInsert: Query) -> ReturnValue:
+    error = _diskError(disk)
+    if error is None:
+        error = _queryError(queryToInsert)
+    if error is not None:
+        return error
+    _store.addDisk(disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost())
+    _store.addQuery(queryToInsert.getQueryID(), queryToInsert.getPurpose(), queryToInsert.getSize())
+    return ReturnValue.OK
+
+
+# the checks run in the order the database runs them: NOT NULL, CHECK(Cost >= 0), the primary key,
+# the foreign keys and then the disk's CHECK(DiskFreeSpace >= 0). the size is the one of the given query
+@_locked
+def addQueryToDisk(query: Query, diskID: int) -> ReturnValue:
+    queryID, size = query.getQueryID(), query.getSize()
+    if not _isInteger(queryID) or not _isInteger(size) or not _isInteger(diskID):
+        return ReturnValue.ERROR
+    if queryID is None or diskID is None:
+        return ReturnValue.BAD_PARAMS
+    disk = _store.disks.get(diskID)
+    if disk is not None and size is not None:
+        cost = size * disk[3]
+        if not INTEGER_MIN <= cost <= INTEGER_MAX:
+            return ReturnValue.ERROR
+        if cost < 0:
+            return ReturnValue.BAD_PARAMS
+    if queryID in _store.queriesOnDisk.get(diskID, ()):
+        return ReturnValue.ALREADY_EXISTS
+    if disk is None or queryID not in _store.queries:
+        return ReturnValue.NOT_EXISTS
+    if size is None or disk[2] - size < 0:
+        return ReturnValue.BAD_PARAMS
+    disk[2] -= size
+    _store.placeQuery(queryID, diskID, size * disk[3])
+    return ReturnValue.OK
+
+
+@_locked
+def addQueriesToDisks(pairs) -> List[ReturnValue]:
+    return [addQueryToDisk(query, diskID) for query, diskID in pairs]
+
+
+@_locked
+def placeQueries(queryIDs, policy: PlacementPolicy = PlacementPolicy.BEST_FIT) -> Tuple[Dict[int, int], List[int]]:
+    queryIDs = sorted(set(queryIDs))
+    queries = [(queryID, _store.queries[queryID][1]) for queryID in queryIDs if queryID in _store.queries]
+    disks = [(diskID, disk[1], disk[2], disk[3]) for diskID, disk in _store.disks.items()]
+    mapping, unplaced = solvePlacement(queries, disks, policy, _store.disksOfQuery, INTEGER_MAX)
+    for queryID, diskID in mapping.items():
+        disk = _store.disks[diskID]
+        size = _store.queries[queryID][1]
+        disk[2] -= size
+        _store.placeQuery(queryID, diskID, size * disk[3])
+    return mapping, sorted(set(unplaced) | set(queryID for queryID in queryIDs if queryID not in _store.queries))
+
+
+@_locked
+def removeQueryFromDisk(query: Query, diskID: int) -> ReturnValue:
+    queryID = query.getQueryID()
+    if not _isInteger(queryID) or not _isInteger(diskID):
+        return ReturnValue.ERROR
+    if queryID not in _store.queriesOnDisk.get(diskID, ()):
+        return ReturnValue.OK
+    # the space given back is the stored size of the query
+    freeSpace = _store.disks[diskID][2] + _store.queries[queryID][1]
+    if freeSpace > INTEGER_MAX:
+        return ReturnValue.ERROR
+    _store.disks[diskID][2] = freeSpace
+    _store.unplaceQuery(queryID, diskID)
+    return ReturnValue.OK
+
+
+@_locked
+def addRAMToDisk(ramID: int, diskID: int) -> ReturnValue:
+    if not _isInteger(ramID) or not _isInteger(diskID) or ramID is None or diskID is None:
+        return ReturnValue.ERROR
+    if ramID in _store.ramsOnDisk.get(diskID, ()):
+        return ReturnValue.ALREADY_EXISTS
+    if diskID not in _store.disks or ramID not in _store.rams:
+        return ReturnValue.NOT_EXISTS
+    _store.placeRam(ramID, diskID)
+    return ReturnValue.OK
+
+
+@_locked
+def removeRAMFromDisk(ramID: int, diskID: int) -> ReturnValue:
+    if not _isInteger(ramID) or not _isInteger(diskID):
+        return ReturnValue.ERROR
+    if ramID not in _store.ramsOnDisk.get(diskID, ()):
+        return ReturnValue.NOT_EXISTS
+    _store.unplaceRam(ramID, diskID)
+    return ReturnValue.OK
+
+
+@_locked
+def averageSizeQueriesOnDisk(diskID: int) -> float:
+    if not _isInteger(diskID):
+        return -1
+    queries = _store.queriesOnDisk.get(diskID)
+    if not queries:
+        return 0
+    return sum(_store.queries[queryID][1] for queryID in queries) / len(queries)
+
+
+@_locked
+def diskTotalRAM(diskID: int) -> int:
+    if not _isInteger(diskID):
+        return -1
+    if diskID not in _store.disks:
+        return 0
+    return _store.totalRam(diskID)
+
+
+@_locked
+def averageSizeQueriesOnDiskForAll() -> Dict[int, float]:
+    return {diskID: averageSizeQueriesOnDisk(diskID) for diskID in _store.disks}
+
+
+@_locked
+def diskTotalRAMForAll() -> Dict[int, int]:
+    return {diskID: _store.totalRam(diskID) for diskID in _store.disks}
+
+
+@_locked
+def getCostForPurpose(purpose: str) -> int:
+    if not _isText(purpose):
+        return -1
+    return _store.purposes.get(purpose, (0, 0))[1]
+
+
+@_locked
+def getCostForAllPurposes() -> Dict[str, int]:
+    return {purpose: stats[1] for purpose, stats in _store.purposes.items()}
+
+
+# up to limit IDs of the queries of size at most space, walking the sorted IDs in the given direction
+def _queriesThatFit(space: int, limit: int, descending: bool) -> List[int]:
+    result = []
+    for queryID in (reversed(_store.queryIDs) if descending else _store.queryIDs):
+        if _store.queries[queryID][1] <= space:
+            result.append(queryID)
+            if len(result) == limit:
+                break
+    return result
+
+
+@_locked
+def getQueriesCanBeAddedToDisk(diskID: int) -> List[int]:
+    if diskID not in _store.disks:
+        return []
+    return _queriesThatFit(_store.disks[diskID][2], 5, True)
+
+
+@_locked
+def getQueriesCanBeAddedToDiskAndRAM(diskID: int) -> List[int]:
+    if diskID not in _store.disks:
+        return []
+    return _queriesThatFit(min(_store.disks[diskID][2], _store.totalRam(diskID)), 5, False)
+
+
+@_locked
+def isCompanyExclusive(diskID: int) -> bool:
+    return diskID in _store.disks and _store.isExclusive(diskID)
+
+
+@_locked
+def getNonExclusiveDisks() -> List[int]:
+    return sorted(diskID for diskID in _store.disks if not _store.isExclusive(diskID))
+
+
+@_locked
+def getConflictingDisks() -> List[int]:
+    return sorted(set(diskID for disks in _store.disksOfQuery.values() if len(disks) > 1 for diskID in disks))
+
+
+@_locked
+def mostAvailableDisks(k: int = 5) -> List[int]:
+    if k is not None and (type(k) is not int or k < 0):
+        return []
+    # bisect counts the query sizes that are at most the free space, like WIDTH_BUCKET does in the database
+    order = ((-bisect_right(_store.querySizes, disk[2]), -disk[1], diskID) for diskID, disk in _store.disks.items())
+    ranked = sorted(order) if k is None else heapq.nsmallest(k, order)
+    return [diskID for _, _, diskID in ranked]
+
+
+def _closeQueries(queryID: int) -> List[int]:
+    disks = _store.disksOfQuery.get(queryID)
+    if not disks:
+        # nothing to share, every other query is close
+        return [other for other in _store.queryIDs[:11] if other != queryID][:10]
+    shared = {}
+    for diskID in disks:
+        for other in _store.queriesOnDisk[diskID]:
+            shared[other] = shared.get(other, 0) + 1
+    needed = (len(disks) + 1) // 2
+    return sorted(other for other, count in shared.items() if count >= needed and other != queryID)[:10]
+
+
+@_locked
+def getCloseQueries(queryID: int) -> List[int]:
+    if not _isInteger(queryID) or queryID is None:
+        return []
+    return _closeQueries(queryID)
+
+
+@_locked
+def getCloseQueriesForAll() -> Dict[int, List[int]]:
+    return {queryID: _closeQueries(queryID) for queryID in _store.queryIDs}
@@ -0,0 +1,734 @@
+from typing import Dict, List, Tuple
+from Utility.ReturnValue import ReturnValue
+from Utility.Exceptions import DatabaseException
+from Utility.Placement import MAX_COST, solvePlacement
+from Utility.PlacementPolicy import PlacementPolicy
+from Business.Query import Query
+from Business.RAM import RAM
+from Business.Disk import Disk
+from psycopg2 import sql
+
+# the statements of the Solution API and what their results (and errors) mean, shared by Solution (blocking)
+# and AsyncSolution (asyncio). every public function here is a generator that yields a Transaction for each
+# transaction it needs: the module running it opens a connection, runs the transaction's body, commits and
+# sends back what the body returned, or throws in what it raised. a body is a generator too, it yields
+# Statement, Stream and Lock and gets their results back. nothing here touches a connection, so the same
+# operation runs on DBConnector and AsyncDBConnector alike (see Solution._run and AsyncSolution._run)
+
+
+# sent to DBConnector.executePrepared when query is a str with %s placeholders, to DBConnector.execute when it
+# is a psycopg2.sql.Composed. the body gets (rows_effected, ResultSet) back
+class Statement:
+    __slots__ = ('query', 'params')
+
+    def __init__(self, query, params=()):
+        self.query = query
+        self.params = params
+
+
+# a SELECT whose rows (tuples) the body iterates before it returns, through a server-side cursor where the
+# connector has one
+class Stream:
+    __slots__ = ('query',)
+
+    def __init__(self, query: str):
+        self.query = query
+
+
+# a SELECT ... FOR UPDATE that only runs in concurrency mode, the time it waits is counted as lock_wait_seconds
+class Lock:
+    __slots__ = ('query', 'params')
+
+    def __init__(self, query: str, params):
+        self.query = query
+        self.params = params
+
+
+# body is called for every attempt, so a transaction retried in concurrency mode starts from scratch
+class Transaction:
+    __slots__ = ('body',)
+
+    def __init__(self, body):
+        self.body = body
+
+
+# opt-in read-through cache for the profile getters, keyed by ('query' | 'disk' | 'ram', id), set with
+# Solution.enableProfileCache. the writes of Solution and AsyncSolution invalidate it, writes from other
+# processes show up only after ttl seconds
+profileCache = None
+
+# opt-in concurrency mode, a RetryPolicy set with Solution.enableConcurrencyMode. the functions that change
+# DiskFreeSpace lock every disk the statement can touch with SELECT ... ORDER BY DiskID FOR UPDATE, then the
+# PurposeStats rows of the queries in Purpose order, so concurrent transactions always take the locks in the same
+# order. a transaction that still fails with a serialization failure or a deadlock is run again after a
+# jittered backoff
+concurrency = None
+
+
+def _cachedProfile(key):
+    if profileCache is None:
+        return None
+    return profileCache.get(key)
+
+
+# taken before reading a profile, so a value read before a concurrent write is not cached after the write's
+# invalidation (see LRUCache.put)
+def _profileGeneration():
+    if profileCache is None:
+        return None
+    return profileCache.generation()
+
+
+def _cacheProfile(key, fields, generation):
+    if profileCache is not None:
+        profileCache.put(key, fields, generation)
+
+
+def _invalidateProfiles(*keys):
+    if profileCache is not None:
+        profileCache.invalidate(*keys)
+
+
+# in concurrency mode, locks the disks selected by condition in DiskID order
+def _lockDisks(condition: str, params) -> Lock:
+    return Lock("SELECT DiskID FROM Disks WHERE " + condition + " ORDER BY DiskID FOR UPDATE", params)
+
+
+# in concurrency mode, locks the PurposeStats rows the placement triggers of the queries update, in Purpose order.
+# taken after the disks, every placement with a purpose in common waits here in the same order
+def _lockPurposes(queryIDs) -> Lock:
+    return Lock("SELECT Purpose FROM PurposeStats WHERE Purpose IN (SELECT QueryPurpose FROM Queries \
+                 WHERE QueryID = ANY(%s)) ORDER BY Purpose FOR UPDATE", (list(queryIDs),))
+
+
+# runs the given statements in a transaction of their own, returns the result of the last one
+def _statements(*statements):
+    def _body():
+        result = None
+        for statement in statements:
+            result = yield statement
+        return result
+
+    return (yield Transaction(_body))
+
+
+# INSERTs in one transaction: OK, ALREADY_EXISTS when an ID is taken, BAD_PARAMS when a constraint fails
+def _insert(*statements):
+    try:
+        yield from _statements(*statements)
+    except DatabaseException.UNIQUE_VIOLATION as e:
+        return ReturnValue.ALREADY_EXISTS
+    except DatabaseException.NOT_NULL_VIOLATION as e:
+        return ReturnValue.BAD_PARAMS
+    except DatabaseException.CHECK_VIOLATION as e:
+        return ReturnValue.BAD_PARAMS
+    except Exception as e:
+        return ReturnValue.ERROR
+    return ReturnValue.OK
+
+
+# a DELETE by ID: OK, NOT_EXISTS when there was nothing to delete
+def _delete(statement: Statement, key):
+    try:
+        rows_effected, _ = yield from _statements(statement)
+        _invalidateProfiles(key)
+    except Exception as e:
+        print(e)
+        return ReturnValue.ERROR
+    return ReturnValue.NOT_EXISTS if rows_effected == 0 else ReturnValue.OK
+
+
+# statement selects the fields of one row in constructor order, bad() when there is no such row
+def _getProfile(kind: str, rowID, statement: str, make, bad):
+    cached = _cachedProfile((kind, rowID))
+    if cached is not None:
+        return make(*cached)
+    generation = _profileGeneration()
+    result = bad()
+    try:
+        _, resultSet = yield from _statements(Statement(statement, (rowID,)))
+        if len(resultSet.rows) == 1:
+            fields = tuple(resultSet.rows[0])
+            result = make(*fields)
+            _cacheProfile((kind, rowID), fields, generation)
+    except Exception as e:
+        print(e)
+    return result
+
+
+# the first column of the first row, error on any failure
+def _scalar(statement: str, params, error):
+    try:
+        _, resultSet = yield from _statements(Statement(statement, params))
+        return resultSet.rows[0][0]
+    except Exception as e:
+        return error
+
+
+# the first column of every row, an empty list on any failure
+def _ids(statement: str, params=()) -> List[int]:
+    try:
+        _, resultSet = yield from _statements(Statement(statement, params))
+        return [row[0] for row in resultSet.rows]
+    except Exception as e:
+        print(e)
+        return []
+
+
+# every (key, value) row of a streamed SELECT as a dict, an empty dict on any failure
+def _streamedDict(statement: str) -> Dict:
+    def _body():
+        return dict((yield Stream(statement)))
+
+    try:
+        return (yield Transaction(_body))
+    except Exception as e:
+        print(e)
+        return {}
+
+
+def addQuery(queryToInsert: Query) -> ReturnValue:
+    return (yield from _insert(Statement(
+        "INSERT INTO Queries(QueryID, QueryPurpose, QuerySize) VALUES(%s, %s, %s)",
+        (queryToInsert.getQueryID(), queryToInsert.getPurpose(), queryToInsert.getSize()))))
+
+
+def getQueryProfile(queryID: int) -> Query:
+    return (yield from _getProfile('query', queryID,
+                                   "SELECT QueryID, QueryPurpose, QuerySize FROM Queries WHERE QueryID = %s",
+                                   Query, Query.badQuery))
+
+
+def deleteQuery(query: Query) -> ReturnValue:
+    def _body():
+        yield _lockDisks("DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = %s)", (query.getQueryID(),))
+        yield _lockPurposes([query.getQueryID()])
+        _, disksResult = yield Statement(
+            "UPDATE Disks SET DiskFreeSpace = DiskFreeSpace + %s \
+             WHERE DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = %s) RETURNING DiskID",
+            (query.getSize(), query.getQueryID()))
+        yield Statement("DELETE FROM Queries WHERE QueryID = %s", (query.getQueryID(),))
+        return disksResult.column(0)
+
+    try:
+        diskIDs = yield Transaction(_body)
+        _invalidateProfiles(('query', query.getQueryID()), *(('disk', diskID) for diskID in diskIDs))
+    except DatabaseException.NOT_NULL_VIOLATION as e:
+        return ReturnValue.OK
+    except Exception as e:
+        print(e)
+        return ReturnValue.ERROR
+    return ReturnValue.OK
+
+
+def addDisk(disk: Disk) -> ReturnValue:
+    return (yield from _insert(Statement(
+        "INSERT INTO Disks(DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte) VALUES(%s, %s, %s, %s, %s)",
+        (disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost()))))
+
+
+def getDiskProfile(diskID: int) -> Disk:
+    return (yield from _getProfile('disk', diskID,
+                                   "SELECT DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte FROM Disks \
+                                    WHERE DiskID = %s", Disk, Disk.badDisk))
+
+
+def deleteDisk(diskID: int) -> ReturnValue:
+    return (yield from _delete(Statement("DELETE FROM Disks WHERE DiskID = %s", (diskID,)), ('disk', diskID)))
+
+
+def addRAM(ramToInsert: RAM) -> ReturnValue:
+    return (yield from _insert(Statement(
+        "INSERT INTO Rams(RamID, RamSize, RamCompany) VALUES(%s, %s, %s)",
+        (ramToInsert.getRamID(), ramToInsert.getSize(), ramToInsert.getCompany()))))
+
+
+def getRAMProfile(ramID: int) -> RAM:
+    return (yield from _getProfile('ram', ramID, "SELECT RamID, RamCompany, RamSize FROM Rams WHERE RamID = %s",
+                                   RAM, RAM.badRAM))
+
+
+def deleteRAM(ramID: int) -> ReturnValue:
+    return (yield from _delete(Statement("DELETE FROM Rams WHERE RamID = %s", (ramID,)), ('ram', ramID)))
+
+
+# rows per multi-row INSERT statement used by the bulk functions
+BULK_CHUNK_SIZE = 1000
+
+
+def _queryIsValid(query: Query) -> bool:
+    return None not in (query.getQueryID(), query.getPurpose(), query.getSize()) and \
+           query.getQueryID() > 0 and query.getSize() >= 0
+
+
+def _diskIsValid(disk: Disk) -> bool:
+    return None not in (disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost()) \
+           and disk.getDiskID() > 0 and disk.getSpeed() > 0 and disk.getCost() > 0 and disk.getFreeSpace() >= 0
+
+
+def _ramIsValid(ram: RAM) -> bool:
+    return None not in (ram.getRamID(), ram.getCompany(), ram.getSize()) and ram.getRamID() > 0 and ram.getSize() > 0
+
+
+# inserts items with one multi-row INSERT ... ON CONFLICT DO NOTHING per chunk
+# returns a ReturnValue for each item, in the order of items
+def _bulkInsert(items, getID, isValid, toRow, insertSQL: str, singleInsert) -> List[ReturnValue]:
+    items = list(items)
+    res = [ReturnValue.OK] * len(items)
+    pending = []  # indexes of the items that should be sent to the database
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            valid = isValid(item)
+        except TypeError:
+            # let the database decide, exactly like the single-row function
+            res[index] = yield from singleInsert(item)
+            continue
+        if not valid:
+            res[index] = ReturnValue.BAD_PARAMS
+        elif getID(item) in seen:
+            res[index] = ReturnValue.ALREADY_EXISTS
+        else:
+            seen.add(getID(item))
+            pending.append(index)
+
+    for start in range(0, len(pending), BULK_CHUNK_SIZE):
+        chunk = pending[start:start + BULK_CHUNK_SIZE]
+        values = sql.SQL(", ").join(
+            sql.SQL("({})").format(sql.SQL(", ").join(sql.Literal(val) for val in toRow(items[index])))
+            for index in chunk)
+        try:
+            _, resultSet = yield from _statements(Statement(sql.SQL(insertSQL).format(values=values)))
+        except Exception as e:
+            # the chunk was rolled back, fall back to row-at-a-time so one bad row doesn't fail the others
+            for index in chunk:
+                res[index] = yield from singleInsert(items[index])
+            continue
+        inserted = set(row[0] for row in resultSet.rows)
+        for index in chunk:
+            if getID(items[index]) not in inserted:
+                res[index] = ReturnValue.ALREADY_EXISTS
+
+    return res
+
+
+def addQueries(queries) -> List[ReturnValue]:
+    return (yield from _bulkInsert(queries, Query.getQueryID, _queryIsValid,
+                                   lambda q: (q.getQueryID(), q.getPurpose(), q.getSize()),
+                                   "INSERT INTO Queries(QueryID, QueryPurpose, QuerySize) VALUES {values} \
+                                    ON CONFLICT DO NOTHING RETURNING QueryID", addQuery))
+
+
+def addDisks(disks) -> List[ReturnValue]:
+    return (yield from _bulkInsert(disks, Disk.getDiskID, _diskIsValid,
+                                   lambda d: (d.getDiskID(), d.getCompany(), d.getSpeed(), d.getFreeSpace(),
+                                              d.getCost()),
+                                   "INSERT INTO Disks(DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte) \
+                                    VALUES {values} ON CONFLICT DO NOTHING RETURNING DiskID", addDisk))
+
+
+def addRAMs(rams) -> List[ReturnValue]:
+    return (yield from _bulkInsert(rams, RAM.getRamID, _ramIsValid,
+                                   lambda r: (r.getRamID(), r.getSize(), r.getCompany()),
+                                   "INSERT INTO Rams(RamID, RamSize, RamCompany) VALUES {values} \
+                                    ON CONFLICT DO NOTHING RETURNING RamID", addRAM))
+
+
+# looks up many profiles with one SELECT ... WHERE ID = ANY(...) per BULK_CHUNK_SIZE IDs that are not cached.
+# statement selects the constructor's fields, IDs that don't exist get bad(), IDs that are not integers
+# go through the single getter. the keys are the distinct ids, in the order given
+def _getProfiles(kind: str, ids, statement: str, make, bad, singleGetter) -> Dict:
+    ids = list(dict.fromkeys(ids))
+    generation = _profileGeneration()
+    found = {}
+    missing = []
+    for rowID in ids:
+        cached = _cachedProfile((kind, rowID)) if type(rowID) is int else None
+        if cached is not None:
+            found[rowID] = make(*cached)
+        elif type(rowID) is int:
+            missing.append(rowID)
+        else:
+            found[rowID] = yield from singleGetter(rowID)
+
+    def _body():
+        rows = []
+        for start in range(0, len(missing), BULK_CHUNK_SIZE):
+            _, resultSet = yield Statement(statement, (missing[start:start + BULK_CHUNK_SIZE],))
+            rows.extend(resultSet.rows)
+        return rows
+
+    try:
+        if len(missing) > 0:
+            for fields in (yield Transaction(_body)):
+                found[fields[0]] = make(*fields)
+                _cacheProfile((kind, fields[0]), tuple(fields), generation)
+    except Exception as e:
+        print(e)
+    # in the order of ids, whatever order the rows came in
+    return {rowID: found[rowID] if rowID in found else bad() for rowID in ids}
+
+
+def getQueryProfiles(queryIDs) -> Dict[int, Query]:
+    return (yield from _getProfiles('query', queryIDs,
+                                    "SELECT QueryID, QueryPurpose, QuerySize FROM Queries WHERE QueryID = ANY(%s)",
+                                    Query, Query.badQuery, getQueryProfile))
+
+
+def getDiskProfiles(diskIDs) -> Dict[int, Disk]:
+    return (yield from _getProfiles('disk', diskIDs,
+                                    "SELECT DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte FROM Disks \
+                                     WHERE DiskID = ANY(%s)",
+                                    Disk, Disk.badDisk, getDiskProfile))
+
+
+def getRAMProfiles(ramIDs) -> Dict[int, RAM]:
+    return (yield from _getProfiles('ram', ramIDs, "SELECT RamID, RamCompany, RamSize FROM Rams WHERE RamID = ANY(%s)",
+                                    RAM, RAM.badRAM, getRAMProfile))
+
+
+def addDiskAndQuery(disk: Disk, queryToInsert: Query) -> ReturnValue:
+    # both rows or neither
+    return (yield from _insert(
+        Statement("INSERT INTO Disks(DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte) \
+                   VALUES(%s, %s, %s, %s, %s)",
+                  (disk.getDiskID(), disk.getCompany(), disk.getSpeed(), disk.getFreeSpace(), disk.getCost())),
+        Statement("INSERT INTO Queries(QueryID, QueryPurpose, QuerySize) VALUES(%s, %s, %s)",
+                  (queryToInsert.getQueryID(), queryToInsert.getPurpose(), queryToInsert.getSize()))))
+
+
+def addQueryToDisk(query: Query, diskID: int) -> ReturnValue:
+    def _body():
+        # the triggers on QueriesOnDisks also update the other disks the query is on
+        yield _lockDisks("DiskID = %s OR DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = %s)",
+                         (diskID, query.getQueryID()))
+        yield _lockPurposes([query.getQueryID()])
+        yield Statement(
+            "INSERT INTO QueriesOnDisks(QueryID, DiskID, Cost) VALUES (%s, %s, %s * \
+             (SELECT DiskCostPerByte FROM Disks WHERE DiskID = %s))",
+            (query.getQueryID(), diskID, query.getSize(), diskID))
+        yield Statement(
+            "UPDATE Disks SET DiskFreeSpace = DiskFreeSpace - %s WHERE DiskID = %s", (query.getSize(), diskID))
+
+    try:
+        yield Transaction(_body)
+        _invalidateProfiles(('disk', diskID))
+    except DatabaseException.UNIQUE_VIOLATION as e:
+        return ReturnValue.ALREADY_EXISTS
+    except DatabaseException.NOT_NULL_VIOLATION as e:
+        return ReturnValue.BAD_PARAMS
+    except DatabaseException.CHECK_VIOLATION as e:
+        return ReturnValue.BAD_PARAMS
+    except DatabaseException.FOREIGN_KEY_VIOLATION as e:
+        return ReturnValue.NOT_EXISTS
+    except Exception as e:
+        print(e)
+        return ReturnValue.ERROR
+    return ReturnValue.OK
+
+
+# inserts the placements, rows are (QueryID, DiskID, Cost, QuerySize), with one multi-row INSERT
+# and one UPDATE of the free space of every disk involved
+def _insertPlacements(rows):
+    if len(rows) == 0:
+        return
+    yield Statement(sql.SQL("INSERT INTO QueriesOnDisks(QueryID, DiskID, Cost) VALUES {values}").format(
+        values=sql.SQL(", ").join(
+            sql.SQL("({}, {}, {})").format(sql.Literal(queryID), sql.Literal(diskID), sql.Literal(cost))
+            for queryID, diskID, cost, _ in rows)))
+    decrements = {}
+    for _, diskID, _, querySize in rows:
+        decrements[diskID] = decrements.get(diskID, 0) + querySize
+    yield Statement(sql.SQL(
+        "UPDATE Disks SET DiskFreeSpace = DiskFreeSpace - v.Total FROM (VALUES {values}) AS v(DiskID, Total) \
+         WHERE Disks.DiskID = v.DiskID").format(
+        values=sql.SQL(", ").join(
+            sql.SQL("({}, {})").format(sql.Literal(diskID), sql.Literal(total))
+            for diskID, total in decrements.items())))
+
+
+# places many queries in one transaction, pairs is an iterable of (Query, diskID)
+# returns a ReturnValue for each pair, as if addQueryToDisk was called for the pairs in order
+def addQueriesToDisks(pairs) -> List[ReturnValue]:
+    pairs = list(pairs)
+    res = [ReturnValue.OK] * len(pairs)
+    fallback = []  # indexes that have to go through addQueryToDisk
+    for index, (query, diskID) in enumerate(pairs):
+        if not all(type(val) is int for val in (query.getQueryID(), diskID)) or \
+                type(query.getSize()) not in (int, type(None)):
+            fallback.append(index)
+    candidates = sorted(set(range(len(pairs))) - set(fallback))
+    if len(candidates) == 0:
+        fallback = range(len(pairs))
+    else:
+        diskIDs = sorted(set(pairs[index][1] for index in candidates))
+        queryIDs = sorted(set(pairs[index][0].getQueryID() for index in candidates))
+
+        def _body():
+            # lock the disks in a deterministic order so concurrent batches can't deadlock, in concurrency mode
+            # also the disks the queries are already on (the triggers update those)
+            yield _lockDisks(
+                "DiskID = ANY(%s) OR DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = ANY(%s))",
+                (diskIDs, queryIDs))
+            yield _lockPurposes(queryIDs)
+            _, disksResult = yield Statement(
+                "SELECT DiskID, DiskFreeSpace, DiskCostPerByte FROM Disks WHERE DiskID = ANY(%s) \
+                 ORDER BY DiskID FOR UPDATE", (diskIDs,))
+            _, queriesResult = yield Statement("SELECT QueryID FROM Queries WHERE QueryID = ANY(%s)", (queryIDs,))
+            _, placedResult = yield Statement(
+                "SELECT QueryID, DiskID FROM QueriesOnDisks WHERE QueryID = ANY(%s) AND DiskID = ANY(%s)",
+                (queryIDs, diskIDs))
+
+            freeSpace = {row[0]: row[1] for row in disksResult.rows}
+            costPerByte = {row[0]: row[2] for row in disksResult.rows}
+            existingQueries = set(row[0] for row in queriesResult.rows)
+            placed = set((row[0], row[1]) for row in placedResult.rows)
+
+            results = {}
+            toInsert = []
+            for index in candidates:
+                query, diskID = pairs[index]
+                querySize = query.getSize()
+                # on an existing disk a negative size gives a negative Cost, and CHECK(Cost >= 0) fires before
+                # the unique and foreign key checks
+                if diskID in freeSpace and querySize is not None and querySize < 0:
+                    results[index] = ReturnValue.BAD_PARAMS
+                elif (query.getQueryID(), diskID) in placed:
+                    results[index] = ReturnValue.ALREADY_EXISTS
+                elif diskID not in freeSpace or query.getQueryID() not in existingQueries:
+                    results[index] = ReturnValue.NOT_EXISTS
+                elif querySize is None or freeSpace[diskID] - querySize < 0:
+                    results[index] = ReturnValue.BAD_PARAMS
+                else:
+                    placed.add((query.getQueryID(), diskID))
+                    freeSpace[diskID] -= querySize
+                    toInsert.append((query.getQueryID(), diskID, querySize * costPerByte[diskID], querySize))
+
+            yield from _insertPlacements(toInsert)
+            return results
+
+        try:
+            for index, value in (yield Transaction(_body)).items():
+                res[index] = value
+            _invalidateProfiles(*(('disk', diskID) for diskID in diskIDs))
+        except Exception as e:
+            # a concurrent writer got in between, the transaction is rolled back on close, redo pair by pair
+            fallback = range(len(pairs))
+
+    for index in fallback:
+        res[index] = yield from addQueryToDisk(*pairs[index])
+    return res
+
+
+# picks disks for the queries with first-fit-decreasing under policy and places them all in one transaction.
+# the disks are read (and locked) once, a query is never put on a disk it is already on.
+# returns {QueryID: DiskID} of the new placements and the IDs of the queries that were not placed
+# (unknown IDs, queries that fit nowhere, or all of them when the transaction fails)
+def placeQueries(queryIDs, policy: PlacementPolicy = PlacementPolicy.BEST_FIT) -> Tuple[Dict[int, int], List[int]]:
+    queryIDs = sorted(set(queryIDs))
+    if len(queryIDs) == 0:
+        return {}, []
+
+    # every disk is locked, in DiskID order, so concurrency mode only adds the purposes
+    def _body():
+        _, disksResult = yield Statement(
+            "SELECT DiskID, DiskSpeed, DiskFreeSpace, DiskCostPerByte FROM Disks ORDER BY DiskID FOR UPDATE")
+        yield _lockPurposes(queryIDs)
+        _, queriesResult = yield Statement(
+            "SELECT QueryID, QuerySize FROM Queries WHERE QueryID = ANY(%s)", (queryIDs,))
+        _, placedResult = yield Statement(
+            "SELECT QueryID, DiskID FROM QueriesOnDisks WHERE QueryID = ANY(%s)", (queryIDs,))
+        placedOn = {}
+        for queryID, diskID in placedResult.rows:
+            placedOn.setdefault(queryID, set()).add(diskID)
+
+        solved, unfit = solvePlacement(queriesResult.rows, disksResult.rows, policy, placedOn, MAX_COST)
+        sizes = dict(queriesResult.rows)
+        costPerByte = {row[0]: row[3] for row in disksResult.rows}
+        yield from _insertPlacements([(queryID, diskID, sizes[queryID] * costPerByte[diskID], sizes[queryID])
+                                      for queryID, diskID in solved.items()])
+        return solved, sorted(set(unfit) | (set(queryIDs) - set(sizes)))
+
+    try:
+        mapping, unplaced = yield Transaction(_body)
+        _invalidateProfiles(*(('disk', diskID) for diskID in set(mapping.values())))
+    except Exception as e:
+        print(e)
+        return {}, queryIDs
+    return mapping, unplaced
+
+
+def removeQueryFromDisk(query: Query, diskID: int) -> ReturnValue:
+    def _body():
+        yield _lockDisks("DiskID = %s OR DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = %s)",
+                         (diskID, query.getQueryID()))
+        yield _lockPurposes([query.getQueryID()])
+        yield Statement(
+            "UPDATE Disks SET DiskFreeSpace = DiskFreeSpace + (SELECT QuerySize FROM Queries WHERE QueryID = \
+             (SELECT QueryID FROM QueriesOnDisks WHERE QueryID = %s AND DiskID = %s)) WHERE DiskID = %s",
+            (query.getQueryID(), diskID, diskID))
+        yield Statement("DELETE FROM QueriesOnDisks WHERE DiskID = %s AND QueryID = %s", (diskID, query.getQueryID()))
+
+    try:
+        yield Transaction(_body)
+        _invalidateProfiles(('disk', diskID))
+    except DatabaseException.NOT_NULL_VIOLATION as e:
+        return ReturnValue.OK
+    except Exception as e:
+        return ReturnValue.ERROR
+    return ReturnValue.OK
+
+
+def addRAMToDisk(ramID: int, diskID: int) -> ReturnValue:
+    try:
+        yield from _statements(Statement(
+            "INSERT INTO RamsOnDisks(RamID, DiskID, RamSize) VALUES \
+             (%s, %s, (SELECT RamSize FROM Rams WHERE RamID = %s))",
+            (ramID, diskID, ramID)))
+    except DatabaseException.UNIQUE_VIOLATION as e:
+        return ReturnValue.ALREADY_EXISTS
+    except DatabaseException.FOREIGN_KEY_VIOLATION as e:
+        return ReturnValue.NOT_EXISTS
+    except Exception as e:
+        print(e)
+        return ReturnValue.ERROR
+    return ReturnValue.OK
+
+
+def removeRAMFromDisk(ramID: int, diskID: int) -> ReturnValue:
+    try:
+        rows_effected, _ = yield from _statements(Statement(
+            "DELETE FROM RamsOnDisks WHERE DiskID = %s AND RamID = %s", (diskID, ramID)))
+    except Exception as e:
+        return ReturnValue.ERROR
+    return ReturnValue.NOT_EXISTS if rows_effected == 0 else ReturnValue.OK
+
+
+def averageSizeQueriesOnDisk(diskID: int) -> float:
+    return (yield from _scalar(
+        "SELECT COALESCE((SELECT QuerySizeSum::NUMERIC / NULLIF(QueryCount, 0) FROM DiskStats WHERE DiskID = %s), 0)",
+        (diskID,), -1))
+
+
+def diskTotalRAM(diskID: int) -> int:
+    return (yield from _scalar("SELECT COALESCE((SELECT TotalRam FROM DiskStats WHERE DiskID = %s), 0)", (diskID,), -1))
+
+
+# averageSizeQueriesOnDisk of every disk, streamed from DiskStats (which the triggers keep aggregated per disk)
+def averageSizeQueriesOnDiskForAll() -> Dict[int, float]:
+    return (yield from _streamedDict("SELECT DiskID, COALESCE(QuerySizeSum::NUMERIC / NULLIF(QueryCount, 0), 0) \
+                                      FROM Disks LEFT JOIN DiskStats USING(DiskID)"))
+
+
+# diskTotalRAM of every disk, streamed from DiskStats
+def diskTotalRAMForAll() -> Dict[int, int]:
+    return (yield from _streamedDict(
+        "SELECT DiskID, COALESCE(TotalRam, 0) FROM Disks LEFT JOIN DiskStats USING(DiskID)"))
+
+
+def getCostForPurpose(purpose: str) -> int:
+    return (yield from _scalar("SELECT COALESCE((SELECT TotalCost FROM PurposeStats WHERE Purpose = %s), 0)",
+                               (purpose,), -1))
+
+
+# the total cost of every purpose that has queries, in one round trip
+def getCostForAllPurposes() -> Dict[str, int]:
+    try:
+        _, resultSet = yield from _statements(Statement("SELECT Purpose, TotalCost FROM PurposeStats"))
+        return {row[0]: row[1] for row in resultSet.rows}
+    except Exception as e:
+        print(e)
+        return {}
+
+
+def getQueriesCanBeAddedToDisk(diskID: int) -> List[int]:
+    # the disk's free space is read once, then the candidates come from an index scan on Queries
+    return (yield from _ids("SELECT QueryID FROM Queries WHERE QuerySize <= \
+                                 (SELECT DiskFreeSpace FROM Disks WHERE DiskID = %s) \
+                             ORDER BY QueryID DESC LIMIT 5", (diskID,)))
+
+
+def getQueriesCanBeAddedToDiskAndRAM(diskID: int) -> List[int]:
+    return (yield from _ids("SELECT QueryID FROM Queries WHERE QuerySize <= \
+                                 (SELECT LEAST(DiskFreeSpace, COALESCE(TotalRam, 0)) \
+                                  FROM Disks LEFT JOIN DiskStats USING(DiskID) WHERE DiskID = %s) \
+                             ORDER BY QueryID ASC LIMIT 5", (diskID,)))
+
+
+def isCompanyExclusive(diskID: int) -> bool:
+    try:
+        rows_effected, resultSet = yield from _statements(Statement(
+            "SELECT ForeignRams = 0 FROM DiskStats WHERE DiskID = %s", (diskID,)))
+    except Exception as e:
+        return False
+    return rows_effected == 1 and resultSet.rows[0][0]
+
+
+# the disks that have a RAM of another company, for the whole fleet in one query
+def getNonExclusiveDisks() -> List[int]:
+    return (yield from _ids("SELECT DiskID FROM DiskStats WHERE ForeignRams > 0 ORDER BY DiskID ASC"))
+
+
+def getConflictingDisks() -> List[int]:
+    return (yield from _ids("SELECT DiskID FROM DiskConflicts WHERE ConflictingQueries > 0 ORDER BY DiskID ASC"))
+
+
+# the top k disks by number of queries that fit in their free space. width_bucket binary searches the
+# sorted query sizes, so this costs O(|Disks| log |Queries|) instead of joining every disk with every query
+def mostAvailableDisks(k: int = 5) -> List[int]:
+    return (yield from _ids(
+        "SELECT DiskID FROM Disks,\
+             (SELECT COALESCE(ARRAY_AGG(QuerySize ORDER BY QuerySize), '{}') AS Sizes FROM Queries) AS SortedSizes\
+         ORDER BY WIDTH_BUCKET(DiskFreeSpace, SortedSizes.Sizes) DESC, DiskSpeed DESC, DiskID ASC LIMIT %s", (k,)))
+
+
+def getCloseQueries(queryID: int) -> List[int]:
+    # a query without placements needs 0 shared disks, so every other query is close to it. otherwise only
+    # queries sharing a disk can be close, and they are found through the DiskID index of QueriesOnDisks
+    try:
+        _, resultSet = yield from _statements(Statement(
+            "WITH Target AS (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = %s),\
+                  Needed AS (SELECT (COUNT(*) + 1) / 2 AS Shared FROM Target)\
+             SELECT QueryID FROM Queries WHERE QueryID != %s AND (SELECT Shared FROM Needed) = 0\
+             UNION ALL\
+             SELECT Other.QueryID FROM Target INNER JOIN QueriesOnDisks Other USING(DiskID) WHERE Other.QueryID != %s\
+             GROUP BY Other.QueryID HAVING COUNT(*) >= (SELECT Shared FROM Needed)\
+             ORDER BY QueryID ASC LIMIT 10", (queryID, queryID, queryID)))
+        return [row[0] for row in resultSet.rows]
+    except Exception as e:
+        return []
+
+
+# getCloseQueries of every query, computed in one pass over QueriesOnDisks:
+# each disk's query list is intersected with the disks of every query placed on it (sparse A * A^T)
+def getCloseQueriesForAll() -> Dict[int, List[int]]:
+    def _body():
+        queryIDs = [row[0] for row in (yield Stream("SELECT QueryID FROM Queries ORDER BY QueryID ASC"))]
+        queriesOnDisk = {}
+        disksOfQuery = {}
+        for queryID, diskID in (yield Stream("SELECT QueryID, DiskID FROM QueriesOnDisks")):
+            queriesOnDisk.setdefault(diskID, []).append(queryID)
+            disksOfQuery.setdefault(queryID, []).append(diskID)
+        return queryIDs, queriesOnDisk, disksOfQuery
+
+    try:
+        queryIDs, queriesOnDisk, disksOfQuery = yield Transaction(_body)
+    except Exception as e:
+        print(e)
+        return {}
+
+    result = {}
+    for queryID in queryIDs:
+        disks = disksOfQuery.get(queryID)
+        if disks is None:
+            # nothing to share, every other query is close
+            result[queryID] = [other for other in queryIDs[:11] if other != queryID][:10]
+            continue
+        shared = {}
+        for diskID in disks:
+            for other in queriesOnDisk[diskID]:
+                shared[other] = shared.get(other, 0) + 1
+        needed = (len(disks) + 1) // 2
+        result[queryID] = sorted(other for other, count in shared.items()
+                                 if count >= needed and other != queryID)[:10]
+    return result
@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+from typing import Dict, List, Tuple
+import Backend
+import Benchmark
+import Utility.DBConnector as Connector
+import Utility.Instrumentation as Instrumentation
+
+# captures the plan of every SQL statement Solution issues and compares it with a stored baseline:
+#     python PlanCheck.py --drop-tables --update    runs the workload on a seeded fleet, stores the plans as the baseline
+#     python PlanCheck.py --drop-tables             runs it again and reports the regressed statements (exit code 1)
+# --drop-tables is required because it drops and recreates every table of the configured database
+# the workload is Benchmark's. every distinct statement is then replayed once more under
+# EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) on a fresh copy of the fleet, in a transaction that is rolled back.
+# statements that can't be explained count as regressions
+
+# next to this file, the plans depend on the local database so the file is not committed
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_baselines.json")
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+# the same statement with any layout gets the same key
+def statementKey(statement: str) -> str:
+    return hashlib.sha1(" ".join(statement.split()).encode()).hexdigest()[:16]
+
+
+# the parts of an EXPLAIN node that describe the plan, without the ones that change from run to run
+def normalizePlan(node: dict) -> dict:
+    return {'node': node['Node Type'],
+            'relation': node.get('Relation Name'),
+            'index': node.get('Index Name'),
+            'join': node.get('Join Type'),
+            'cost': node.get('Total Cost'),
+            'rows': node.get('Plan Rows'),
+            'actualRows': node.get('Actual Rows'),
+            'children': [normalizePlan(child) for child in node.get('Plans', [])]}
+
+
+# the node types in pre-order, e.g. ["Inner Nested Loop", "Seq Scan on queriesondisks", "Index Scan using disks_pkey"]
+def planShape(plan: dict) -> List[str]:
+    name = plan['node']
+    if plan['index'] is not None:
+        name += " using " + plan['index']
+    elif plan['relation'] is not None:
+        name += " on " + plan['relation']
+    if plan['join'] is not None:
+        name = plan['join'] + " " + name
+    shape = [name]
+    for child in plan['children']:
+        shape.extend(planShape(child))
+    return shape
+
+
+# explain is the output of EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON): a list with one dict
+def planRecord(statement: str, function: str, explain: list) -> dict:
+    plan = normalizePlan(explain[0]['Plan'])
+    return {'statement': " ".join(statement.split()), 'function': function, 'shape': planShape(plan),
+            'cost': plan['cost'], 'rows': plan['rows'], 'actualRows': plan['actualRows'],
+            'executionTime': explain[0].get('Execution Time'), 'plan': plan}
+
+
+def _ratio(now, before) -> float:
+    if now is None or before is None:
+        return 1.0
+    return (now + 1.0) / (before + 1.0)
+
+
+# the regressions of current against baseline, as printable lines. a statement regresses when its node types
+# change, or its estimated cost, its actual rows or (with timeFactor) its execution time grow by the given factor
+def comparePlans(baseline: Dict[str, dict], current: Dict[str, dict], costFactor=2.0, rowsFactor=10.0,
+                 timeFactor=None) -> List[str]:
+    findings = []
+    for key, now in sorted(current.items(), key=lambda item: item[1]['function']):
+        before = baseline.get(key)
+        if before is None:
+            continue
+        where = now['function'] + ": " + now['statement'][:100]
+        if now['shape'] != before['shape']:
+            findings.append(where + "\n    plan changed from " + " > ".join(before['shape']) +
+                            "\n                   to " + " > ".join(now['shape']))
+        if _ratio(now['cost'], before['cost']) >= costFactor:
+            findings.append(where + "\n    cost " + str(before['cost']) + " -> " + str(now['cost']))
+        if _ratio(now['actualRows'], before['actualRows']) >= rowsFactor:
+            findings.append(where + "\n    rows " + str(before['actualRows']) + " -> " + str(now['actualRows']))
+        if timeFactor is not None and _ratio(now['executionTime'], before['executionTime']) >= timeFactor:
+            findings.append(where + "\n    time " + str(before['executionTime']) + "ms -> " +
+                            str(now['executionTime']) + "ms")
+    return findings
+
+
+# runs the Benchmark workload against the database and returns the first (statement, params, function)
+# of every distinct explainable statement
+def captureStatements(rng: random.Random, fleet, ops: int) -> List[tuple]:
+    solution = Backend.get('sql')
+    captured = {}
+
+    def listener(event):
+        if event.error is None and event.function.startswith("Solution.") and EXPLAINABLE.match(event.statement) \
+                and ";" not in event.statement.strip(" ;"):
+            captured.setdefault(statementKey(event.statement), (event.statement, event.params, event.function))
+
+    Benchmark.loadFleet(solution, fleet)
+    Instrumentation.addListener(listener)
+    try:
+        Benchmark.runBenchmarks(solution, fleet, rng, ops, 1)
+    finally:
+        Instrumentation.removeListener(listener)
+    return list(captured.values())
+
+
+# replays the statements in the order they were captured, each under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+# in a savepoint, on a database holding the fleet the workload started from. a statement keeps its effect for the
+# ones after it (e.g. addQueryToDisk finds the query addQuery inserted), everything is rolled back at the end.
+# returns the plans and a line for every statement that could not be explained
+def explainStatements(statements: List[tuple]) -> Tuple[Dict[str, dict], List[str]]:
+    plans = {}
+    failures = []
+    conn = None
+    try:
+        conn = Connector.DBConnector()
+        for statement, params, function in statements:
+            conn.execute("SAVEPOINT plancheck")
+            try:
+                _, resultSet = conn.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, params=params)
+                explain = resultSet.rows[0][0]
+                if isinstance(explain, str):
+                    explain = json.loads(explain)
+                plans[statementKey(statement)] = planRecord(statement, function, explain)
+                conn.execute("RELEASE SAVEPOINT plancheck")
+            except Exception as e:
+                failures.append(function + ": " + " ".join(statement.split())[:100] + "\n    could not explain: " +
+                                (str(e) or type(e).__name__))
+                conn.execute("ROLLBACK TO SAVEPOINT plancheck")
+    finally:
+        if conn is not None:
+            # ANALYZE really runs the statements, their changes are thrown away
+            conn.rollback()
+            conn.close()
+    return plans, failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Capture the plans of Solution's statements and check them")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update', action='store_true', help="store the plans as the new baseline")
+    parser.add_argument('--disks', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--rams', type=int, default=400)
+    parser.add_argument('--density', type=float, default=1.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cost-factor', type=float, default=2.0)
+    parser.add_argument('--rows-factor', type=float, default=10.0)
+    parser.add_argument('--time-factor', type=float, default=None, help="also flag execution time growth")
+    parser.add_argument('--drop-tables', action='store_true', help="allow dropping the tables of the database")
+    args = parser.parse_args(argv)
+    if not args.drop_tables:
+        parser.error("the plan check drops every table of the configured database, pass --drop-tables to go on")
+
+    solution = Backend.get('sql')
+    rng = random.Random(args.seed)
+    fleet = Benchmark.generateFleet(rng, args.disks, args.queries, args.rams, args.density)
+    solution.dropTables()
+    solution.createTables()
+    try:
+        statements = captureStatements(rng, fleet, 3)
+        # the statements are explained against the fleet as the workload found it
+        solution.dropTables()
+        solution.createTables()
+        Benchmark.loadFleet(solution, fleet)
+        plans, failures = explainStatements(statements)
+    finally:
+        solution.dropTables()
+
+    if args.update or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w') as output:
+            json.dump(plans, output, indent=1, sort_keys=True)
+        print("stored " + str(len(plans)) + " plans in " + args.baseline)
+        for failure in failures:
+            print(failure)
+        return 1 if len(failures) > 0 else 0
+
+    with open(args.baseline) as baselineFile:
+        baseline = json.load(baselineFile)
+    findings = failures + comparePlans(baseline, plans, args.cost_factor, args.rows_factor, args.time_factor)
+    for finding in findings:
+        print(finding)
+    new = [plans[key]['function'] for key in plans if key not in baseline]
+    if len(new) > 0:
+        print("not in the baseline: " + ", ".join(sorted(set(new))))
+    print(str(len(plans)) + " plans checked, " + str(len(findings)) + " regressions")
+    return 1 if len(findings) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
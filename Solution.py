@@ -1,8 +1,13 @@
 import string
-from typing import List
+import time
+from typing import Dict, List, Tuple
+import Operations
 import Utility.DBConnector as Connector
 from Utility.ReturnValue import ReturnValue
 from Utility.Exceptions import DatabaseException
+from Utility.LRUCache import LRUCache
+from Utility.PlacementPolicy import PlacementPolicy
+from Utility.Retry import RetryPolicy
 from Business.Query import Query
 from Business.RAM import RAM
 from Business.Disk import Disk
@@ -13,6 +18,7 @@ def createTables():
     conn = None
     try:
         conn = Connector.DBConnector()
+        # QueriesCanBeAddedOnDisks is kept for compatibility, Solution looks up the candidates of one disk directly
         conn.execute("BEGIN;\
                          CREATE TABLE Queries\
                              (QueryID INTEGER NOT NULL PRIMARY KEY,\
@@ -61,6 +67,263 @@ def createTables():
     finally:
         # will happen any way after code try termination or exception handling
         conn.close()
+    migrateSchema()
+
+
+# secondary indexes for the join and filter columns, the primary keys only lead with QueryID / RamID
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS QueriesOnDisksByDisk ON QueriesOnDisks(DiskID, QueryID) INCLUDE (Cost)",
+    "CREATE INDEX IF NOT EXISTS RamsOnDisksByDisk ON RamsOnDisks(DiskID, RamID) INCLUDE (RamSize)",
+    "CREATE INDEX IF NOT EXISTS QueriesByPurpose ON Queries(QueryPurpose, QueryID)",
+    "CREATE INDEX IF NOT EXISTS QueriesBySize ON Queries(QuerySize, QueryID)",
+    "CREATE INDEX IF NOT EXISTS DisksByFreeSpace ON Disks(DiskFreeSpace, DiskSpeed) INCLUDE (DiskID)",
+]
+
+
+# per-disk summary kept up to date by triggers, so diskTotalRAM, averageSizeQueriesOnDisk and isCompanyExclusive
+# are primary key lookups. ForeignRams counts the RAMs on the disk made by another company.
+# when a query or a RAM is deleted its placements are taken out before the cascade removes them
+DISK_STATS = [
+    "CREATE TABLE IF NOT EXISTS DiskStats\
+         (DiskID INTEGER PRIMARY KEY REFERENCES Disks ON DELETE CASCADE,\
+          TotalRam BIGINT NOT NULL DEFAULT 0,\
+          QueryCount INTEGER NOT NULL DEFAULT 0,\
+          QuerySizeSum BIGINT NOT NULL DEFAULT 0)",
+    "ALTER TABLE DiskStats ADD COLUMN IF NOT EXISTS ForeignRams INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS NonExclusiveDisks ON DiskStats(DiskID) WHERE ForeignRams > 0",
+    "CREATE OR REPLACE FUNCTION ForeignRamsOf(disk INTEGER) RETURNS INTEGER AS $$\
+         SELECT COUNT(*)::INTEGER FROM RamsOnDisks INNER JOIN Rams USING(RamID) INNER JOIN Disks USING(DiskID)\
+         WHERE DiskID = disk AND RamCompany != DiskCompany\
+     $$ LANGUAGE sql STABLE",
+    "CREATE OR REPLACE FUNCTION DiskStatsOnDisk() RETURNS TRIGGER AS $$\
+     BEGIN\
+         IF TG_OP = 'INSERT' THEN\
+             INSERT INTO DiskStats(DiskID) VALUES (NEW.DiskID) ON CONFLICT DO NOTHING;\
+         ELSE\
+             UPDATE DiskStats SET ForeignRams = ForeignRamsOf(NEW.DiskID) WHERE DiskID = NEW.DiskID;\
+         END IF;\
+         RETURN NULL;\
+     END; $$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION DiskStatsOnRam() RETURNS TRIGGER AS $$\
+     BEGIN\
+         IF TG_OP IN ('DELETE', 'UPDATE') THEN\
+             UPDATE DiskStats SET TotalRam = TotalRam - COALESCE(OLD.RamSize, 0),\
+                 ForeignRams = ForeignRams - (SELECT COUNT(*) FROM Rams, Disks\
+                     WHERE RamID = OLD.RamID AND DiskID = OLD.DiskID AND RamCompany != DiskCompany)\
+             WHERE DiskID = OLD.DiskID;\
+         END IF;\
+         IF TG_OP IN ('INSERT', 'UPDATE') THEN\
+             UPDATE DiskStats SET TotalRam = TotalRam + COALESCE(NEW.RamSize, 0),\
+                 ForeignRams = ForeignRams + (SELECT COUNT(*) FROM Rams, Disks\
+                     WHERE RamID = NEW.RamID AND DiskID = NEW.DiskID AND RamCompany != DiskCompany)\
+             WHERE DiskID = NEW.DiskID;\
+         END IF;\
+         RETURN NULL;\
+     END; $$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION DiskStatsOnRamCompany() RETURNS TRIGGER AS $$\
+     BEGIN\
+         IF TG_OP = 'DELETE' THEN\
+             UPDATE DiskStats SET ForeignRams = ForeignRams - 1\
+             WHERE DiskID IN (SELECT DiskID FROM RamsOnDisks INNER JOIN Disks USING(DiskID)\
+                              WHERE RamID = OLD.RamID AND DiskCompany != OLD.RamCompany);\
+             RETURN OLD;\
+         END IF;\
+         UPDATE DiskStats SET ForeignRams = ForeignRamsOf(DiskID)\
+         WHERE DiskID IN (SELECT DiskID FROM RamsOnDisks WHERE RamID = NEW.RamID);\
+         RETURN NULL;\
+     END; $$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION DiskStatsOnPlacement() RETURNS TRIGGER AS $$\
+     DECLARE size INTEGER;\
+     BEGIN\
+         IF TG_OP IN ('DELETE', 'UPDATE') THEN\
+             SELECT QuerySize INTO size FROM Queries WHERE QueryID = OLD.QueryID;\
+             IF FOUND THEN\
+                 UPDATE DiskStats SET QueryCount = QueryCount - 1, QuerySizeSum = QuerySizeSum - size\
+                 WHERE DiskID = OLD.DiskID;\
+             END IF;\
+         END IF;\
+         IF TG_OP IN ('INSERT', 'UPDATE') THEN\
+             SELECT QuerySize INTO size FROM Queries WHERE QueryID = NEW.QueryID;\
+             UPDATE DiskStats SET QueryCount = QueryCount + 1, QuerySizeSum = QuerySizeSum + COALESCE(size, 0)\
+             WHERE DiskID = NEW.DiskID;\
+         END IF;\
+         RETURN NULL;\
+     END; $$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION DiskStatsOnQuery() RETURNS TRIGGER AS $$\
+     BEGIN\
+         IF TG_OP = 'DELETE' THEN\
+             UPDATE DiskStats SET QueryCount = QueryCount - 1, QuerySizeSum = QuerySizeSum - OLD.QuerySize\
+             WHERE DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = OLD.QueryID);\
+             RETURN OLD;\
+         END IF;\
+         UPDATE DiskStats SET QuerySizeSum = QuerySizeSum + NEW.QuerySize - OLD.QuerySize\
+         WHERE DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = OLD.QueryID);\
+         RETURN NEW;\
+     END; $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS DiskStatsOnDisk ON Disks;\
+     CREATE TRIGGER DiskStatsOnDisk AFTER INSERT OR UPDATE OF DiskCompany ON Disks\
+     FOR EACH ROW EXECUTE PROCEDURE DiskStatsOnDisk()",
+    "DROP TRIGGER IF EXISTS DiskStatsOnRamDelete ON Rams;\
+     CREATE TRIGGER DiskStatsOnRamDelete BEFORE DELETE ON Rams FOR EACH ROW EXECUTE PROCEDURE DiskStatsOnRamCompany()",
+    "DROP TRIGGER IF EXISTS DiskStatsOnRamCompany ON Rams;\
+     CREATE TRIGGER DiskStatsOnRamCompany AFTER UPDATE OF RamCompany ON Rams\
+     FOR EACH ROW EXECUTE PROCEDURE DiskStatsOnRamCompany()",
+    "DROP TRIGGER IF EXISTS DiskStatsOnRam ON RamsOnDisks;\
+     CREATE TRIGGER DiskStatsOnRam AFTER INSERT OR UPDATE OR DELETE ON RamsOnDisks\
+     FOR EACH ROW EXECUTE PROCEDURE DiskStatsOnRam()",
+    "DROP TRIGGER IF EXISTS DiskStatsOnPlacement ON QueriesOnDisks;\
+     CREATE TRIGGER DiskStatsOnPlacement AFTER INSERT OR UPDATE OR DELETE ON QueriesOnDisks\
+     FOR EACH ROW EXECUTE PROCEDURE DiskStatsOnPlacement()",
+    "DROP TRIGGER IF EXISTS DiskStatsOnQuery ON Queries;\
+     CREATE TRIGGER DiskStatsOnQuery BEFORE DELETE OR UPDATE OF QuerySize ON Queries\
+     FOR EACH ROW EXECUTE PROCEDURE DiskStatsOnQuery()",
+    # rebuild the summary of databases created before it existed
+    "INSERT INTO DiskStats(DiskID, TotalRam, QueryCount, QuerySizeSum, ForeignRams)\
+     SELECT D.DiskID,\
+            COALESCE((SELECT SUM(RamSize) FROM RamsOnDisks R WHERE R.DiskID = D.DiskID), 0),\
+            (SELECT COUNT(*) FROM QueriesOnDisks QD WHERE QD.DiskID = D.DiskID),\
+            COALESCE((SELECT SUM(QuerySize) FROM QueriesOnDisks QD INNER JOIN Queries USING(QueryID)\
+                      WHERE QD.DiskID = D.DiskID), 0),\
+            ForeignRamsOf(D.DiskID)\
+     FROM Disks D\
+     ON CONFLICT (DiskID) DO UPDATE SET TotalRam = EXCLUDED.TotalRam, QueryCount = EXCLUDED.QueryCount,\
+                                        QuerySizeSum = EXCLUDED.QuerySizeSum, ForeignRams = EXCLUDED.ForeignRams",
+]
+
+
+# per-purpose query count and total placement cost kept up to date by triggers, a purpose's row exists while
+# it has queries. placement costs of a deleted query are taken out before the cascade removes the placements
+PURPOSE_STATS = [
+    "CREATE TABLE IF NOT EXISTS PurposeStats\
+         (Purpose TEXT PRIMARY KEY,\
+          QueryCount INTEGER NOT NULL DEFAULT 0,\
+          TotalCost BIGINT NOT NULL DEFAULT 0)",
+    "CREATE OR REPLACE FUNCTION PurposeStatsOnQuery() RETURNS TRIGGER AS $$\
+     BEGIN\
+         IF TG_OP IN ('DELETE', 'UPDATE') THEN\
+             UPDATE PurposeStats SET QueryCount = QueryCount - 1,\
+                 TotalCost = TotalCost - COALESCE((SELECT SUM(Cost) FROM QueriesOnDisks WHERE QueryID = OLD.QueryID), 0)\
+             WHERE Purpose = OLD.QueryPurpose;\
+             DELETE FROM PurposeStats WHERE Purpose = OLD.QueryPurpose AND QueryCount <= 0;\
+         END IF;\
+         IF TG_OP IN ('INSERT', 'UPDATE') THEN\
+             INSERT INTO PurposeStats(Purpose, QueryCount, TotalCost) VALUES (NEW.QueryPurpose, 1,\
+                 COALESCE((SELECT SUM(Cost) FROM QueriesOnDisks WHERE QueryID = NEW.QueryID), 0))\
+             ON CONFLICT (Purpose) DO UPDATE SET QueryCount = PurposeStats.QueryCount + 1,\
+                                                 TotalCost = PurposeStats.TotalCost + EXCLUDED.TotalCost;\
+         END IF;\
+         IF TG_OP = 'DELETE' THEN\
+             RETURN OLD;\
+         END IF;\
+         RETURN NEW;\
+     END; $$ LANGUAGE plpgsql",
+    # a query that is being deleted is no longer in Queries, so its placements don't match any purpose here
+    "CREATE OR REPLACE FUNCTION PurposeStatsOnPlacement() RETURNS TRIGGER AS $$\
+     BEGIN\
+         IF TG_OP IN ('DELETE', 'UPDATE') THEN\
+             UPDATE PurposeStats SET TotalCost = TotalCost - COALESCE(OLD.Cost, 0)\
+             WHERE Purpose = (SELECT QueryPurpose FROM Queries WHERE QueryID = OLD.QueryID);\
+         END IF;\
+         IF TG_OP IN ('INSERT', 'UPDATE') THEN\
+             UPDATE PurposeStats SET TotalCost = TotalCost + COALESCE(NEW.Cost, 0)\
+             WHERE Purpose = (SELECT QueryPurpose FROM Queries WHERE QueryID = NEW.QueryID);\
+         END IF;\
+         RETURN NULL;\
+     END; $$ LANGUAGE plpgsql",
+    # inserts are counted AFTER the row is stored, so rows skipped by ON CONFLICT DO NOTHING are not counted
+    "DROP TRIGGER IF EXISTS PurposeStatsOnInsert ON Queries;\
+     CREATE TRIGGER PurposeStatsOnInsert AFTER INSERT ON Queries FOR EACH ROW EXECUTE PROCEDURE PurposeStatsOnQuery()",
+    "DROP TRIGGER IF EXISTS PurposeStatsOnQuery ON Queries;\
+     CREATE TRIGGER PurposeStatsOnQuery BEFORE DELETE OR UPDATE OF QueryPurpose ON Queries\
+     FOR EACH ROW EXECUTE PROCEDURE PurposeStatsOnQuery()",
+    "DROP TRIGGER IF EXISTS PurposeStatsOnPlacement ON QueriesOnDisks;\
+     CREATE TRIGGER PurposeStatsOnPlacement AFTER INSERT OR UPDATE OR DELETE ON QueriesOnDisks\
+     FOR EACH ROW EXECUTE PROCEDURE PurposeStatsOnPlacement()",
+    # rebuild the rollup of databases created before it existed
+    "DELETE FROM PurposeStats WHERE Purpose NOT IN (SELECT QueryPurpose FROM Queries)",
+    "INSERT INTO PurposeStats(Purpose, QueryCount, TotalCost)\
+     SELECT QueryPurpose, COUNT(*),\
+            COALESCE(SUM((SELECT SUM(Cost) FROM QueriesOnDisks QD WHERE QD.QueryID = Q.QueryID)), 0)\
+     FROM Queries Q GROUP BY QueryPurpose\
+     ON CONFLICT (Purpose) DO UPDATE SET QueryCount = EXCLUDED.QueryCount, TotalCost = EXCLUDED.TotalCost",
+]
+
+
+# number of placements of every placed query, and per disk the number of its queries that are placed on more
+# than one disk. statement level triggers compare every touched query before and after the statement, so
+# multi-row inserts and the delete cascades are counted once. placements are never updated in place
+CONFLICTS = [
+    "CREATE TABLE IF NOT EXISTS QueryPlacements\
+         (QueryID INTEGER PRIMARY KEY,\
+          Placements INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS DiskConflicts\
+         (DiskID INTEGER PRIMARY KEY,\
+          ConflictingQueries INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ConflictingDisks ON DiskConflicts(DiskID) WHERE ConflictingQueries > 0",
+    "CREATE OR REPLACE FUNCTION ConflictsOnPlacement() RETURNS TRIGGER AS $$\
+     DECLARE direction INTEGER := CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END;\
+     BEGIN\
+         INSERT INTO QueryPlacements(QueryID, Placements)\
+         SELECT QueryID, direction * COUNT(*) FROM Changed GROUP BY QueryID\
+         ON CONFLICT (QueryID) DO UPDATE SET Placements = QueryPlacements.Placements + EXCLUDED.Placements;\
+         DELETE FROM QueryPlacements WHERE Placements <= 0 AND QueryID IN (SELECT QueryID FROM Changed);\
+         WITH Touched AS (SELECT QueryID, COUNT(*) AS Changes FROM Changed GROUP BY QueryID),\
+              Counts AS (SELECT QueryID, COALESCE(Placements, 0) AS PlacedAfter,\
+                                COALESCE(Placements, 0) - direction * Changes AS PlacedBefore\
+                         FROM Touched LEFT JOIN QueryPlacements USING(QueryID)),\
+              Placed AS (SELECT QueryID, DiskID FROM QueriesOnDisks WHERE QueryID IN (SELECT QueryID FROM Touched)),\
+              WasPlaced AS (SELECT QueryID, DiskID FROM Placed WHERE TG_OP = 'DELETE'\
+                          OR (QueryID, DiskID) NOT IN (SELECT QueryID, DiskID FROM Changed)\
+                      UNION ALL\
+                      SELECT QueryID, DiskID FROM Changed WHERE TG_OP = 'DELETE'),\
+              Contributions AS (SELECT DiskID, 1 AS Delta FROM Placed INNER JOIN Counts USING(QueryID) WHERE PlacedAfter > 1\
+                                UNION ALL\
+                                SELECT DiskID, -1 FROM WasPlaced INNER JOIN Counts USING(QueryID) WHERE PlacedBefore > 1)\
+         INSERT INTO DiskConflicts(DiskID, ConflictingQueries)\
+         SELECT DiskID, SUM(Delta) FROM Contributions GROUP BY DiskID HAVING SUM(Delta) != 0\
+         ON CONFLICT (DiskID) DO UPDATE SET\
+             ConflictingQueries = DiskConflicts.ConflictingQueries + EXCLUDED.ConflictingQueries;\
+         RETURN NULL;\
+     END; $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS ConflictsOnPlace ON QueriesOnDisks;\
+     CREATE TRIGGER ConflictsOnPlace AFTER INSERT ON QueriesOnDisks REFERENCING NEW TABLE AS Changed\
+     FOR EACH STATEMENT EXECUTE PROCEDURE ConflictsOnPlacement()",
+    "DROP TRIGGER IF EXISTS ConflictsOnRemove ON QueriesOnDisks;\
+     CREATE TRIGGER ConflictsOnRemove AFTER DELETE ON QueriesOnDisks REFERENCING OLD TABLE AS Changed\
+     FOR EACH STATEMENT EXECUTE PROCEDURE ConflictsOnPlacement()",
+    # rebuild the counters of databases created before they existed
+    "DELETE FROM QueryPlacements",
+    "INSERT INTO QueryPlacements(QueryID, Placements) SELECT QueryID, COUNT(*) FROM QueriesOnDisks GROUP BY QueryID",
+    "DELETE FROM DiskConflicts",
+    "INSERT INTO DiskConflicts(DiskID, ConflictingQueries)\
+     SELECT DiskID, COUNT(*) FROM QueriesOnDisks\
+     WHERE QueryID IN (SELECT QueryID FROM QueryPlacements WHERE Placements > 1) GROUP BY DiskID",
+]
+
+
+# brings an existing database up to the current schema, safe to run any number of times and keeps all data
+def migrateSchema() -> ReturnValue:
+    conn = None
+    res = ReturnValue.OK
+    try:
+        conn = Connector.DBConnector()
+        for statement in INDEXES:
+            conn.execute(statement)
+        # block writers while the triggers are installed and the summaries are rebuilt
+        conn.execute("LOCK TABLE Queries, Disks, Rams, QueriesOnDisks, RamsOnDisks IN SHARE ROW EXCLUSIVE MODE")
+        for statement in DISK_STATS + PURPOSE_STATS + CONFLICTS:
+            conn.execute(statement)
+        conn.commit()
+        conn.execute("ANALYZE Queries; ANALYZE Disks; ANALYZE QueriesOnDisks; ANALYZE RamsOnDisks;")
+        conn.commit()
+    except Exception as e:
+        print(e)
+        res = ReturnValue.ERROR
+    finally:
+        if conn is not None:
+            conn.close()
+
+    return res
 
 
 def clearTables():
@@ -73,6 +336,9 @@ def clearTables():
                          DELETE FROM Rams;\
                          DELETE FROM QueriesOnDisks;\
                          DELETE FROM RamsOnDisks;\
+                         DELETE FROM PurposeStats;\
+                         DELETE FROM QueryPlacements;\
+                         DELETE FROM DiskConflicts;\
                       COMMIT;")
         conn.commit()
     except Exception as e:
@@ -92,6 +358,10 @@ def dropTables():
                          DROP TABLE IF EXISTS Rams CASCADE;\
                          DROP TABLE IF EXISTS QueriesOnDisks CASCADE;\
                          DROP TABLE IF EXISTS RamsOnDisks CASCADE;\
+                         DROP TABLE IF EXISTS DiskStats CASCADE;\
+                         DROP TABLE IF EXISTS PurposeStats CASCADE;\
+                         DROP TABLE IF EXISTS QueryPlacements CASCADE;\
+                         DROP TABLE IF EXISTS DiskConflicts CASCADE;\
                          DROP VIEW IF EXISTS QueriesCanBeAddedOnDisks;\
                       COMMIT;")
         conn.commit()
@@ -102,567 +372,247 @@ def dropTables():
         conn.close()
 
 
-def addQuery(queryToInsert: Query) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "INSERT INTO Queries(QueryID, QueryPurpose, QuerySize) VALUES({queryID}, {queryPurpose}, {querySize})").format(
-            queryID=sql.Literal(queryToInsert.getQueryID()),
-            queryPurpose=sql.Literal(queryToInsert.getPurpose()),
-            querySize=sql.Literal(queryToInsert.getSize()))
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
-    except DatabaseException.UNIQUE_VIOLATION as e:
-        res = ReturnValue.ALREADY_EXISTS
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except DatabaseException.CHECK_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except Exception as e:
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
+# opt-in read-through cache for the profile getters, see Operations.profileCache. it is shared with AsyncSolution
+def enableProfileCache(maxSize=10000, ttl=60.0):
+    Operations.profileCache = LRUCache(maxSize, ttl)
 
-    return res
 
+def disableProfileCache():
+    Operations.profileCache = None
 
-def getQueryProfile(queryID: int) -> Query:
-    conn = None
-    result = Query.badQuery()
-    try:
-        conn = Connector.DBConnector()
-        rows_effected, returnedResultSet = conn.execute(
-            sql.SQL("SELECT * FROM Queries WHERE QueryID = {QueryID}").format(
-                QueryID=sql.Literal(queryID)))
-        assert rows_effected <= 1  # at most 1 query is returned
-        if rows_effected == 1:
-            resultItem = returnedResultSet.__getitem__(0)
-            result = Query(
-                resultItem[returnedResultSet.cols_header[0]],
-                resultItem[returnedResultSet.cols_header[1]],
-                resultItem[returnedResultSet.cols_header[2]])
-    except Exception as e:
-        print(e)
-    finally:
-        conn.close()
-        return result
 
+def getProfileCacheStats() -> dict:
+    cache = Operations.profileCache
+    if cache is None:
+        return {}
+    return cache.stats()
 
-def deleteQuery(query: Query) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        conn.execute(
-            sql.SQL("BEGIN;\
-                        UPDATE Disks SET DiskFreeSpace = DiskFreeSpace +\
-                        {QuerySize} WHERE DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = {QueryID});\
-                        DELETE FROM Queries WHERE QueryID = {QueryID};\
-                     COMMIT;").format(QueryID=sql.Literal(query.getQueryID()), QuerySize=sql.Literal(query.getSize())))
-        conn.commit()
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        res = ReturnValue.OK
-        conn.rollback()
-    except Exception as e:
-        print(e)
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
 
-    return res
+# opt-in concurrency mode, see Operations.concurrency. it is shared with AsyncSolution
+def enableConcurrencyMode(maxRetries=5, baseDelay=0.005, maxDelay=0.2):
+    Operations.concurrency = RetryPolicy(maxRetries, baseDelay, maxDelay)
 
 
-def addDisk(disk: Disk) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "INSERT INTO Disks(DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte) VALUES({diskID}, {diskCompany}, {diskSpeed}, {diskFreeSpace}, {diskCostPerByte})").format(
-            diskID=sql.Literal(disk.getDiskID()), diskCompany=sql.Literal(disk.getCompany()),
-            diskSpeed=sql.Literal(disk.getSpeed()),
-            diskFreeSpace=sql.Literal(disk.getFreeSpace()), diskCostPerByte=sql.Literal(disk.getCost()))
+def disableConcurrencyMode():
+    Operations.concurrency = None
 
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
-    except DatabaseException.UNIQUE_VIOLATION as e:
-        res = ReturnValue.ALREADY_EXISTS
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except DatabaseException.CHECK_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except Exception as e:
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
 
-    return res
+def getContentionStats() -> dict:
+    policy = Operations.concurrency
+    if policy is None:
+        return {}
+    return policy.stats.snapshot()
 
 
-def getDiskProfile(diskID: int) -> Disk:
-    conn = None
-    result = Disk.badDisk()
+# runs an operation of Operations on DBConnector, every Transaction it yields in a transaction of its own
+def _run(operation):
     try:
-        conn = Connector.DBConnector()
-        rows_effected, returnedResultSet = conn.execute(
-            sql.SQL("SELECT * FROM Disks WHERE DiskID={diskID}").format(
-                diskID=sql.Literal(diskID)), True)
-        assert rows_effected <= 1  # at most 1 query is returned
-        if rows_effected == 1:
-            resultItem = returnedResultSet.__getitem__(0)
-            result = Disk(
-                resultItem[returnedResultSet.cols_header[0]],
-                resultItem[returnedResultSet.cols_header[1]],
-                resultItem[returnedResultSet.cols_header[2]],
-                resultItem[returnedResultSet.cols_header[3]],
-                resultItem[returnedResultSet.cols_header[4]])
-    except Exception as e:
-        print(e)
-    finally:
-        # will happen any way after code try termination or exception handling
-        conn.close()
+        request = next(operation)
+        while True:
+            try:
+                result = _transaction(request.body)
+            except Exception as e:
+                request = operation.throw(e)
+            else:
+                request = operation.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+# runs body() on a connection of its own and commits, retried in concurrency mode
+def _transaction(body):
+    policy = Operations.concurrency
+
+    def _attempt():
+        conn = None
+        try:
+            conn = Connector.DBConnector()
+            result = _execute(conn, body(), policy)
+            conn.commit()
+            return result
+        finally:
+            if conn is not None:
+                conn.close()
+
+    if policy is None:
+        return _attempt()
+    return policy.run(_attempt)
+
+
+# sends what the transaction body yields to conn and the results back, returns what the body returned
+def _execute(conn, body, policy):
+    result = None
+    while True:
+        try:
+            request = body.send(result)
+        except StopIteration as stop:
+            return stop.value
+        if isinstance(request, Operations.Lock):
+            result = None
+            if policy is not None:
+                start = time.perf_counter()
+                conn.executePrepared(request.query, request.params)
+                policy.stats.add('lock_wait_seconds', time.perf_counter() - start)
+        elif isinstance(request, Operations.Stream):
+            result = conn.executeStream(request.query)
+        elif isinstance(request.query, str):
+            result = conn.executePrepared(request.query, request.params)
+        else:
+            result = conn.execute(request.query)
 
-    return result
 
+def addQuery(queryToInsert: Query) -> ReturnValue:
+    return _run(Operations.addQuery(queryToInsert))
 
-def deleteDisk(diskID: int) -> ReturnValue:
-    res = ReturnValue.OK
-    conn = None
-    try:
-        conn = Connector.DBConnector()
-        rows_effected, _ = conn.execute(
-            sql.SQL("DELETE FROM Disks WHERE DiskID = {DiskID}").format(DiskID=sql.Literal(diskID)))
-        conn.commit()
-        if rows_effected == 0:
-            return ReturnValue.NOT_EXISTS
-    except Exception as e:
-        print(e)
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
 
-    return res
+def getQueryProfile(queryID: int) -> Query:
+    return _run(Operations.getQueryProfile(queryID))
 
 
-def addRAM(ramToInsert: RAM) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "INSERT INTO Rams(RamID, RamSize, RamCompany) VALUES({ramID}, {ramSize}, {ramCompany})").format(
-            ramID=sql.Literal(ramToInsert.getRamID()), ramSize=sql.Literal(ramToInsert.getSize()),
-            ramCompany=sql.Literal(ramToInsert.getCompany()))
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
-    except DatabaseException.UNIQUE_VIOLATION as e:
-        res = ReturnValue.ALREADY_EXISTS
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except DatabaseException.CHECK_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except Exception as e:
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
+def deleteQuery(query: Query) -> ReturnValue:
+    return _run(Operations.deleteQuery(query))
 
-    return res
 
+def addDisk(disk: Disk) -> ReturnValue:
+    return _run(Operations.addDisk(disk))
+
+
+def getDiskProfile(diskID: int) -> Disk:
+    return _run(Operations.getDiskProfile(diskID))
 
-def getRAMProfile(ramID: int) -> RAM:
-    conn = None
-    result = RAM.badRAM()
-    try:
-        conn = Connector.DBConnector()
-        rows_effected, returnedResultSet = conn.execute(
-            sql.SQL("SELECT * FROM Rams WHERE RamID = {RamID}").format(
-                RamID=sql.Literal(ramID)))
-        assert rows_effected <= 1  # at most 1 query is returned
-        if rows_effected == 1:
-            resultItem = returnedResultSet.__getitem__(0)
-            result = RAM(
-                resultItem[returnedResultSet.cols_header[0]],
-                resultItem[returnedResultSet.cols_header[2]],
-                resultItem[returnedResultSet.cols_header[1]])
-    except Exception as e:
-        print(e)
-    finally:
-        conn.close()
 
-    return result
+def deleteDisk(diskID: int) -> ReturnValue:
+    return _run(Operations.deleteDisk(diskID))
+
+
+def addRAM(ramToInsert: RAM) -> ReturnValue:
+    return _run(Operations.addRAM(ramToInsert))
+
+
+def getRAMProfile(ramID: int) -> RAM:
+    return _run(Operations.getRAMProfile(ramID))
 
 
 def deleteRAM(ramID: int) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        rows_effected, _ = conn.execute(
-            sql.SQL("DELETE FROM Rams WHERE RamID = {RamID}").format(RamID=sql.Literal(ramID)))
-        conn.commit()
-        if rows_effected == 0:
-            return ReturnValue.NOT_EXISTS
-    except Exception as e:
-        print(e)
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
+    return _run(Operations.deleteRAM(ramID))
 
-    return res
 
+def addQueries(queries) -> List[ReturnValue]:
+    return _run(Operations.addQueries(queries))
 
-def addDiskAndQuery(disk: Disk, queryToInsert: Query) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "BEGIN;\
-                INSERT INTO Disks(DiskID, DiskCompany, DiskSpeed, DiskFreeSpace, DiskCostPerByte)\
-                    VALUES({diskID}, {diskCompany}, {diskSpeed}, {diskFreeSpace}, {diskCostPerByte});\
-                INSERT INTO Queries(QueryID, QueryPurpose, QuerySize)\
-                    VALUES({queryID}, {queryPurpose}, {querySize});\
-             COMMIT;").format(
-            diskID=sql.Literal(disk.getDiskID()),
-            diskCompany=sql.Literal(disk.getCompany()),
-            diskSpeed=sql.Literal(disk.getSpeed()),
-            diskFreeSpace=sql.Literal(disk.getFreeSpace()),
-            diskCostPerByte=sql.Literal(disk.getCost()),
-            queryID=sql.Literal(queryToInsert.getQueryID()),
-            queryPurpose=sql.Literal(queryToInsert.getPurpose()),
-            querySize=sql.Literal(queryToInsert.getSize()))
-
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
-    except DatabaseException.UNIQUE_VIOLATION as e:
-        conn.rollback()
-        res = ReturnValue.ALREADY_EXISTS
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        conn.rollback()
-        res = ReturnValue.BAD_PARAMS
-    except DatabaseException.CHECK_VIOLATION as e:
-        conn.rollback()
-        res = ReturnValue.BAD_PARAMS
-    except Exception as e:
-        print(e)
-        conn.rollback()
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
 
-    return res
+def addDisks(disks) -> List[ReturnValue]:
+    return _run(Operations.addDisks(disks))
 
 
-# checked should be working
-def addQueryToDisk(query: Query, diskID: int) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "BEGIN;\
-                INSERT INTO QueriesOnDisks(QueryID, DiskID, Cost) VALUES ({queryID}, {diskID}, {querySize} * \
-                (SELECT DiskCostPerByte FROM Disks WHERE DiskID = {diskID}));\
-                UPDATE Disks SET DiskFreeSpace = DiskFreeSpace - {querySize} WHERE DiskID = {diskID};\
-            COMMIT;").format(diskID=sql.Literal(diskID), queryID=sql.Literal(query.getQueryID()),
-                             querySize=sql.Literal(query.getSize()))
-
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
-    except DatabaseException.UNIQUE_VIOLATION as e:
-        res = ReturnValue.ALREADY_EXISTS
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except DatabaseException.CHECK_VIOLATION as e:
-        res = ReturnValue.BAD_PARAMS
-    except DatabaseException.FOREIGN_KEY_VIOLATION as e:
-        res = ReturnValue.NOT_EXISTS
-    except Exception as e:
-        print(e)
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
+def addRAMs(rams) -> List[ReturnValue]:
+    return _run(Operations.addRAMs(rams))
 
-    return res
 
+def getQueryProfiles(queryIDs) -> Dict[int, Query]:
+    return _run(Operations.getQueryProfiles(queryIDs))
 
-# checked should be working
-def removeQueryFromDisk(query: Query, diskID: int) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL("BEGIN;\
-        UPDATE Disks SET DiskFreeSpace = DiskFreeSpace + (SELECT QuerySize FROM Queries WHERE QueryID = (SELECT QueryID FROM QueriesOnDisks WHERE QueryID = {queryID} AND DiskID = {diskID})) WHERE DiskID = {diskID};\
-        DELETE FROM QueriesOnDisks WHERE DiskID = {diskID} AND QueryID = {queryID};\
-        COMMIT;").format(
-            diskID=sql.Literal(diskID),
-            queryID=sql.Literal(query.getQueryID()), querySize=sql.Literal(query.getSize()))
-
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
 
-    except DatabaseException.NOT_NULL_VIOLATION as e:
-        res = ReturnValue.OK
-        conn.rollback()
-    except Exception as e:
-        res = ReturnValue.ERROR
-        conn.rollback()
-    finally:
-        conn.close()
+def getDiskProfiles(diskIDs) -> Dict[int, Disk]:
+    return _run(Operations.getDiskProfiles(diskIDs))
 
-    return res
+
+def getRAMProfiles(ramIDs) -> Dict[int, RAM]:
+    return _run(Operations.getRAMProfiles(ramIDs))
+
+
+def addDiskAndQuery(disk: Disk, queryToInsert: Query) -> ReturnValue:
+    return _run(Operations.addDiskAndQuery(disk, queryToInsert))
 
 
 # checked should be working
-def addRAMToDisk(ramID: int, diskID: int) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL("INSERT INTO RamsOnDisks(RamID, DiskID,RamSize) VALUES \
-        ({ramID}, {diskID}, (SELECT RamSize FROM Rams WHERE ramID = {ramID}))").format(
-            diskID=sql.Literal(diskID),
-            ramID=sql.Literal(ramID))
+def addQueryToDisk(query: Query, diskID: int) -> ReturnValue:
+    return _run(Operations.addQueryToDisk(query, diskID))
 
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
-    except DatabaseException.UNIQUE_VIOLATION as e:
-        res = ReturnValue.ALREADY_EXISTS
-    except DatabaseException.FOREIGN_KEY_VIOLATION as e:
-        res = ReturnValue.NOT_EXISTS
-    except Exception as e:
-        print(e)
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
 
-    return res
+def addQueriesToDisks(pairs) -> List[ReturnValue]:
+    return _run(Operations.addQueriesToDisks(pairs))
 
 
-# checked should be working
-def removeRAMFromDisk(ramID: int, diskID: int) -> ReturnValue:
-    conn = None
-    res = ReturnValue.OK
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL("DELETE FROM RamsOnDisks WHERE DiskID = {diskID} AND RamID = {ramID}").format(
-            diskID=sql.Literal(diskID),
-            ramID=sql.Literal(ramID))
+def placeQueries(queryIDs, policy: PlacementPolicy = PlacementPolicy.BEST_FIT) -> Tuple[Dict[int, int], List[int]]:
+    return _run(Operations.placeQueries(queryIDs, policy))
 
-        rows_effected, _ = conn.execute(query)
-        conn.commit()
 
-        if rows_effected == 0:
-            res = ReturnValue.NOT_EXISTS
-    except Exception as e:
-        res = ReturnValue.ERROR
-    finally:
-        conn.close()
+# checked should be working
+def removeQueryFromDisk(query: Query, diskID: int) -> ReturnValue:
+    return _run(Operations.removeQueryFromDisk(query, diskID))
 
-    return res
+
+# checked should be working
+def addRAMToDisk(ramID: int, diskID: int) -> ReturnValue:
+    return _run(Operations.addRAMToDisk(ramID, diskID))
 
 
 # checked should be working
-def averageSizeQueriesOnDisk(diskID: int) -> float:
-    conn = None
-    res = 0
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT COALESCE(AVG(QuerySize), 0) FROM Queries WHERE QueryID IN (SELECT QueryID FROM QueriesOnDisks WHERE DiskID = {diskID})").format(
-            diskID=sql.Literal(diskID))
+def removeRAMFromDisk(ramID: int, diskID: int) -> ReturnValue:
+    return _run(Operations.removeRAMFromDisk(ramID, diskID))
 
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        res = resultSet[0]['coalesce']
-    except Exception as e:
-        res = -1
-    finally:
-        conn.close()
 
-    return res
+# checked should be working
+def averageSizeQueriesOnDisk(diskID: int) -> float:
+    return _run(Operations.averageSizeQueriesOnDisk(diskID))
 
 
 # checked should be working
 def diskTotalRAM(diskID: int) -> int:
-    conn = None
-    result = 0
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT COALESCE(SUM(RamSize), 0) FROM RamsOnDisks WHERE DiskID = {diskID}").format(
-            diskID=sql.Literal(diskID))
-        # query = sql.SQL(
-        #     "SELECT COALESCE(SUM(RamSize), 0) FROM Rams WHERE RamID IN (SELECT RamID FROM RamsOnDisks WHERE DiskID = {diskID})").format(
-        #     diskID=sql.Literal(diskID))
-
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        result = resultSet[0]['coalesce']
-    except Exception as e:
-        print(e)
-        result = -1
-    finally:
-        conn.close()
+    return _run(Operations.diskTotalRAM(diskID))
+
+
+def averageSizeQueriesOnDiskForAll() -> Dict[int, float]:
+    return _run(Operations.averageSizeQueriesOnDiskForAll())
+
 
-    return result
+def diskTotalRAMForAll() -> Dict[int, int]:
+    return _run(Operations.diskTotalRAMForAll())
 
 
 # checked should be working
 def getCostForPurpose(purpose: str) -> int:
-    conn = None
-    result = 0
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT COALESCE(SUM(Cost), 0) FROM (SELECT * FROM Queries WHERE QueryPurpose={purpose}) AS derived INNER JOIN \
-            QueriesOnDisks ON derived.QueryID = QueriesOnDisks.QueryID").format(
-            purpose=sql.Literal(purpose))
+    return _run(Operations.getCostForPurpose(purpose))
 
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        result = resultSet[0]['coalesce']
-    except Exception as e:
-        result = -1
-    finally:
-        conn.close()
 
-    return result
+def getCostForAllPurposes() -> Dict[str, int]:
+    return _run(Operations.getCostForAllPurposes())
 
 
 # checked should be working
 def getQueriesCanBeAddedToDisk(diskID: int) -> List[int]:
-    conn = None
-    res = []
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT QueryID FROM QueriesCanBeAddedOnDisks WHERE DiskID = {diskID} ORDER BY QueryID DESC LIMIT 5").format(
-            diskID=sql.Literal(diskID))
-
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        res = [i[0] for i in resultSet.rows]
-    except Exception as e:
-        print(e)
-
-    finally:
-        conn.close()
-    return res
+    return _run(Operations.getQueriesCanBeAddedToDisk(diskID))
 
 
 # checked should be working
 def getQueriesCanBeAddedToDiskAndRAM(diskID: int) -> List[int]:
-    conn = None
-    res = []
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT QueryID FROM QueriesCanBeAddedOnDisks WHERE DiskId = {diskID} \
-            AND (QuerySize <= (SELECT COALESCE(SUM(RamSize), 0) FROM RamsOnDisks WHERE DiskID = {diskID})) ORDER BY QueryID ASC LIMIT 5").format(
-            diskID=sql.Literal(diskID))
-
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        res = [i[0] for i in resultSet.rows]
-    except Exception as e:
-        print(e)
-        res = []
-
-    finally:
-        conn.close()
-    return res
+    return _run(Operations.getQueriesCanBeAddedToDiskAndRAM(diskID))
 
 
 # checked should be working
 def isCompanyExclusive(diskID: int) -> bool:
-    conn = None
-    result = False
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT DISTINCT * FROM ((SELECT ramcompany FROM Rams WHERE\
-             (RamID IN (SELECT RamID FROM RamsOnDisks WHERE DiskID = {diskID}))) as rc FULL OUTER JOIN (SELECT DiskCompany FROM Disks WHERE DiskID = {diskID}) as dc ON rc.ramcompany = dc.diskcompany) as a").format(
-            diskID=sql.Literal(diskID))
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        if rows_effected == 1:
-            result = True
-    except Exception as e:
-        result = False
-    finally:
-        conn.close()
-    return result
+    return _run(Operations.isCompanyExclusive(diskID))
+
+
+def getNonExclusiveDisks() -> List[int]:
+    return _run(Operations.getNonExclusiveDisks())
 
 
 def getConflictingDisks() -> List[int]:
-    conn = None
-    result = []
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "SELECT DISTINCT DiskID FROM QueriesOnDisks WHERE QueryID IN (\
-             SELECT QueryID FROM QueriesOnDisks GROUP BY QueryID HAVING COUNT(QueryID) > 1 ) ORDER BY DiskID ASC")
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        result = [i[0] for i in resultSet.rows]
-    except Exception as e:
-        print(e)
-        result = []
-    finally:
-        conn.close()
-    return result
+    return _run(Operations.getConflictingDisks())
 
 
-def mostAvailableDisks() -> List[int]:
-    conn = None
-    result = []
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL(
-            "select diskid from\
-                ((Select diskid, COUNT(QuerySize) filter (where querysize <= diskfreespace) as querycount\
-                    from (select * from disks cross join (select querySize from queries) as qwe) as asd GROUP By Diskid) as rrw\
-                FULL OUTER JOIN disks using(diskid)) as ewqe\
-                order by querycount desc, diskspeed desc, diskid asc LIMIT 5")
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        result = [i[0] for i in resultSet.rows]
-    except Exception as e:
-        print(e)
-        result = []
-    finally:
-        conn.close()
-    return result
+def mostAvailableDisks(k: int = 5) -> List[int]:
+    return _run(Operations.mostAvailableDisks(k))
 
 
 def getCloseQueries(queryID: int) -> List[int]:
-    conn = None
-    result = []
-    try:
-        conn = Connector.DBConnector()
-        query = sql.SQL("").format(
-            queryID=sql.Literal(queryID))
-        query = sql.SQL("SELECT QueryID FROM\
-                        (SELECT * FROM \
-                        (SELECT * FROM QueriesOnDisks WHERE \
-                         QueryID != {queryID} AND DiskID IN (SELECT DiskID FROM QueriesOnDisks WHERE QueryID = {queryID})) AS foo\
-                         FULL JOIN Queries USING(QueryID)) AS FullJoin\
-                         WHERE QueryID != {queryID}\
-                        GROUP BY QueryID HAVING COALESCE(COUNT(DiskID),0) >= (SELECT (COUNT(*)+1)/2 FROM QueriesOnDisks WHERE QueryID = {queryID})\
-                        ORDER BY QueryID ASC LIMIT 10").format(
-            queryID=sql.Literal(queryID))
-        rows_effected, resultSet = conn.execute(query)
-        conn.commit()
-        result = [i[0] for i in resultSet.rows]
-    except Exception as e:
-        result = []
-    finally:
-        conn.close()
-    return result
+    return _run(Operations.getCloseQueries(queryID))
+
+
+def getCloseQueriesForAll() -> Dict[int, List[int]]:
+    return _run(Operations.getCloseQueriesForAll())
 
 
 if __name__ == '__main__':
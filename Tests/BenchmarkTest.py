@@ -0,0 +1,37 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import Benchmark
+
+
+class Test(unittest.TestCase):
+    def test_Percentile(self) -> None:
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(50.0, Benchmark.percentile(values, 0.50))
+        self.assertEqual(99.0, Benchmark.percentile(values, 0.99))
+        self.assertEqual(0.0, Benchmark.percentile([], 0.99))
+
+    def test_MemoryRun(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "bench_output.txt")
+            Benchmark.main(['--backend', 'memory', '--disks', '5', '--queries', '20', '--rams', '5', '--ops', '10',
+                            '--analytics-ops', '2', '--output', output])
+            with open(output) as results:
+                lines = [json.loads(line) for line in results]
+        self.assertEqual("memory", lines[0]['backend'])
+        names = set(line['name'] for line in lines[1:])
+        self.assertIn('mostAvailableDisks', names)
+        self.assertIn('getCloseQueriesForAll', names)
+        self.assertIn('placementScaling', names)
+        self.assertTrue(all(line['p50_ms'] <= line['p95_ms'] <= line['p99_ms'] for line in lines[1:]))
+
+    def test_DropGuard(self) -> None:
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, Benchmark.main, ['--backend', 'sql'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
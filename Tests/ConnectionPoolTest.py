@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import unittest
+from Utility.AsyncDBConnector import AsyncConnectionPool
+from Utility.ConnectionPool import ConnectionPool
+from Utility.Exceptions import DatabaseException
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query):
+        if self.connection.dropped:
+            raise Exception("server closed the connection unexpectedly")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, **params):
+        self.closed = 0
+        self.dropped = False
+        self.autocommit = True
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.dropped:
+            raise Exception("connection already closed")
+
+    def close(self):
+        self.closed = 1
+
+
+async def connectFake(**params):
+    return FakeConnection(**params)
+
+
+class Test(unittest.TestCase):
+    def test_reuse(self) -> None:
+        pool = ConnectionPool({}, minSize=1, maxSize=2, connect=FakeConnection)
+        first = pool.getconn()
+        pool.putconn(first)
+        self.assertIs(first, pool.getconn(), "idle connection should be reused")
+        self.assertEqual(1, pool.stats.created)
+        self.assertEqual(1, pool.inUse())
+
+    def test_dropped_connection_is_replaced(self) -> None:
+        pool = ConnectionPool({}, minSize=1, maxSize=2, connect=FakeConnection)
+        first = pool.getconn()
+        pool.putconn(first)
+        first.dropped = True
+        second = pool.getconn()
+        self.assertIsNot(first, second, "health check should discard the dropped connection")
+        self.assertEqual(1, pool.stats.health_check_failures)
+        self.assertEqual(1, first.closed)
+
+    def test_max_size(self) -> None:
+        pool = ConnectionPool({}, minSize=0, maxSize=1, timeout=0.05, connect=FakeConnection)
+        first = pool.getconn()
+        self.assertRaises(DatabaseException.ConnectionInvalid, pool.getconn)
+        timer = threading.Timer(0.01, pool.putconn, [first])
+        pool.timeout = 5
+        timer.start()
+        self.assertIs(first, pool.getconn(), "waiter should get the returned connection")
+        self.assertEqual(1, pool.stats.waits)
+
+    def test_connect_outside_lock(self) -> None:
+        connecting = threading.Event()
+        release = threading.Event()
+
+        # the first connection opens at once, the next ones wait for release
+        def connect(**params):
+            if connecting.is_set() or pool.stats.created > 0:
+                connecting.set()
+                release.wait(5)
+            return FakeConnection(**params)
+
+        pool = ConnectionPool({}, minSize=0, maxSize=2, timeout=0.05, connect=connect)
+        first = pool.getconn()
+        borrower = threading.Thread(target=pool.getconn)
+        borrower.start()
+        self.assertTrue(connecting.wait(5))
+        self.assertRaises(DatabaseException.ConnectionInvalid, pool.getconn)
+        pool.putconn(first)
+        self.assertTrue(borrower.is_alive(), "returning a connection doesn't wait for another borrower's connect")
+        self.assertEqual(1, pool.idle())
+        release.set()
+        borrower.join()
+        self.assertEqual((2, 1), (pool.stats.created, pool.inUse()))
+
+    def test_async_across_event_loops(self) -> None:
+        pool = AsyncConnectionPool({}, minSize=1, maxSize=1, timeout=5, checkOnBorrow=False, connect=connectFake)
+
+        async def contend():
+            first = await pool.getconn()
+            asyncio.get_running_loop().call_later(0.01, pool.putconn, first)
+            second = await pool.getconn()
+            pool.putconn(second)
+            return first, second
+
+        # the second asyncio.run must not find the semaphore bound to the first loop
+        for _ in range(2):
+            first, second = asyncio.run(contend())
+            self.assertIs(first, second, "waiter should get the returned connection")
+        self.assertEqual(1, pool.stats.created)
+        self.assertEqual(2, pool.stats.waits)
+
+    def test_async_borrowed_in_earlier_loop(self) -> None:
+        pool = AsyncConnectionPool({}, minSize=0, maxSize=1, timeout=0.05, checkOnBorrow=False, connect=connectFake)
+        first = asyncio.run(pool.getconn())
+
+        async def afterReturn():
+            with self.assertRaises(DatabaseException.ConnectionInvalid):
+                await pool.getconn()
+            pool.putconn(first)
+            second = await pool.getconn()
+            with self.assertRaises(DatabaseException.ConnectionInvalid):
+                await pool.getconn()
+            return second
+
+        self.assertIs(first, asyncio.run(afterReturn()), "one slot, whichever loop borrowed and returned it")
+        self.assertEqual(1, pool.inUse())
+
+    def test_async_threads(self) -> None:
+        pool = AsyncConnectionPool({}, minSize=0, maxSize=2, timeout=5, checkOnBorrow=False, connect=connectFake)
+        lent = []
+        errors = []
+
+        async def borrowMany():
+            for _ in range(50):
+                connection = await pool.getconn()
+                lent.append(pool.inUse())
+                await asyncio.sleep(0)
+                pool.putconn(connection)
+
+        async def borrowers():
+            await asyncio.wait_for(asyncio.gather(*[borrowMany() for _ in range(3)]), 10)
+
+        def worker():
+            try:
+                asyncio.run(borrowers())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(4 * 3 * 50, len(lent))
+        self.assertLessEqual(max(lent), 2, "never more than maxSize lent out")
+        self.assertEqual((0, 2), (pool.inUse(), pool.stats.created))
+
+    def test_async_open(self) -> None:
+        pool = AsyncConnectionPool({}, minSize=2, maxSize=3, checkOnBorrow=False, connect=connectFake)
+
+        async def openTwice():
+            await asyncio.gather(pool.open(), pool.open())
+
+        asyncio.run(openTwice())
+        self.assertEqual(2, pool.idle(), "minSize connections, however many callers open the pool")
+        self.assertEqual(2, pool.stats.created)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,80 @@
+import unittest
+import Utility.Instrumentation as Instrumentation
+
+
+def addDisk():
+    # stands in for a Solution function issuing a statement
+    Instrumentation.record("INSERT INTO Disks VALUES(%s)", (1,), 1, 0.002)
+
+
+def _insert(diskID):
+    Instrumentation.record("INSERT INTO Disks VALUES(%s)", (diskID,), 1, 0.002)
+
+
+def addDisks():
+    # the statements of private helpers, closures and comprehensions count for the public function
+    def _body():
+        [_insert(diskID) for diskID in (1, 2)]
+    _body()
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        Instrumentation.reset()
+        Instrumentation.enable(slowQueryThreshold=0.5)
+
+    def tearDown(self) -> None:
+        Instrumentation.disable()
+        Instrumentation.reset()
+
+    def test_Histogram(self) -> None:
+        histogram = Instrumentation.LatencyHistogram(buckets=(0.001, 0.01))
+        for seconds in (0.0005, 0.001, 0.005, 1.0):
+            histogram.observe(seconds)
+        self.assertEqual([(0.001, 2), (0.01, 3), (float('inf'), 4)], histogram.cumulative())
+        self.assertEqual(4, histogram.count)
+
+    def test_CallingFunction(self) -> None:
+        events = []
+        Instrumentation.addListener(events.append)
+        try:
+            addDisk()
+        finally:
+            Instrumentation.removeListener(events.append)
+        self.assertEqual(1, len(events))
+        self.assertEqual(__name__ + ".addDisk", events[0].function)
+        self.assertEqual((1,), events[0].params)
+        self.assertEqual(1, Instrumentation.histograms()[__name__ + ".addDisk"].count)
+
+    def test_HelperFrames(self) -> None:
+        events = []
+        Instrumentation.addListener(events.append)
+        try:
+            addDisks()
+        finally:
+            Instrumentation.removeListener(events.append)
+        self.assertEqual([__name__ + ".addDisks"] * 2, [event.function for event in events])
+
+    def test_SlowQueries(self) -> None:
+        Instrumentation.record("SELECT 1", None, 1, 0.1)
+        with self.assertLogs(Instrumentation.logger, 'WARNING'):
+            Instrumentation.record("SELECT pg_sleep(1)", None, 1, 1.0)
+        Instrumentation.record("SELECT 1/0", None, -1, 0.2, ZeroDivisionError())
+        self.assertEqual(["SELECT pg_sleep(1)"], [event.statement for event in Instrumentation.slowQueries()])
+        text = Instrumentation.prometheus()
+        function = __name__ + ".test_SlowQueries"
+        self.assertIn('solution_statement_duration_seconds_count{function="' + function + '"} 3', text)
+        self.assertIn('solution_statement_duration_seconds_bucket{function="' + function + '",le="0.1"} 1', text)
+        self.assertIn('solution_statement_duration_seconds_bucket{function="' + function + '",le="+Inf"} 3', text)
+        self.assertIn('solution_statement_errors_total{function="' + function + '"} 1', text)
+        self.assertIn('solution_slow_statements_total{function="' + function + '"} 1', text)
+
+    def test_Disabled(self) -> None:
+        Instrumentation.disable()
+        self.assertFalse(Instrumentation.isActive())
+        Instrumentation.record("SELECT 1", None, 1, 1.0)
+        self.assertEqual({}, Instrumentation.histograms())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,66 @@
+import unittest
+from Utility.LRUCache import LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Test(unittest.TestCase):
+    def test_Eviction(self) -> None:
+        cache = LRUCache(maxSize=2, ttl=None)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'), "b was the least recently used")
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual({'hits': 3, 'misses': 1, 'evictions': 1, 'invalidations': 0, 'size': 2}, cache.stats())
+
+    def test_TTL(self) -> None:
+        clock = Clock()
+        cache = LRUCache(ttl=10.0, clock=clock)
+        cache.put('a', 1)
+        clock.now = 9.0
+        self.assertEqual(1, cache.get('a'))
+        clock.now = 10.0
+        self.assertIsNone(cache.get('a'), "expired")
+        self.assertEqual(0, len(cache))
+
+    def test_Invalidate(self) -> None:
+        cache = LRUCache()
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.invalidate('a', 'missing')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(2, cache.get('b'))
+        self.assertEqual(1, cache.stats()['invalidations'])
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_StalePut(self) -> None:
+        cache = LRUCache(maxSize=2)
+        before = cache.generation()
+        cache.invalidate('a')
+        cache.put('a', "read before the write", before)
+        self.assertIsNone(cache.get('a'), "invalidated after the value was read")
+        cache.put('b', 2, before)
+        self.assertEqual(2, cache.get('b'), "other keys are not affected")
+        after = cache.generation()
+        cache.put('a', "read after the write", after)
+        self.assertEqual("read after the write", cache.get('a'))
+        # only the last maxSize invalidated keys are remembered
+        cache.invalidate('c', 'd', 'e')
+        cache.put('f', 6, after)
+        self.assertIsNone(cache.get('f'), "a forgotten invalidation drops every put older than it")
+        cache.put('f', 6, cache.generation())
+        self.assertEqual(6, cache.get('f'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
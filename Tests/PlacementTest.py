@@ -0,0 +1,51 @@
+import random
+import unittest
+from Utility.Placement import BestFitIndex, FirstFitIndex, solvePlacement
+from Utility.PlacementPolicy import PlacementPolicy
+
+# (DiskID, DiskSpeed, DiskFreeSpace, DiskCostPerByte)
+DISKS = [(1, 1, 10, 1), (2, 5, 6, 3), (3, 3, 4, 2)]
+# (QueryID, QuerySize)
+QUERIES = [(1, 6), (2, 4), (3, 4), (4, 20)]
+
+
+class Test(unittest.TestCase):
+    def test_Policies(self) -> None:
+        self.assertEqual(({1: 1, 2: 1, 3: 3}, [4]), solvePlacement(QUERIES, DISKS, PlacementPolicy.CHEAPEST))
+        self.assertEqual(({1: 2, 2: 3, 3: 1}, [4]), solvePlacement(QUERIES, DISKS, PlacementPolicy.FASTEST))
+        self.assertEqual(({1: 2, 2: 3, 3: 1}, [4]), solvePlacement(QUERIES, DISKS, PlacementPolicy.BEST_FIT))
+        self.assertEqual(({}, []), solvePlacement([], DISKS, PlacementPolicy.CHEAPEST))
+        self.assertEqual(({}, [1, 2, 3, 4]), solvePlacement(QUERIES, [], PlacementPolicy.BEST_FIT))
+
+    def test_AlreadyPlaced(self) -> None:
+        self.assertEqual(({1: 2}, []), solvePlacement([(1, 6)], DISKS, PlacementPolicy.CHEAPEST, {1: {1}}))
+        self.assertEqual(({1: 1}, []), solvePlacement([(1, 6)], DISKS, PlacementPolicy.BEST_FIT, {1: {2}}))
+        self.assertEqual(({}, [1]), solvePlacement([(1, 6)], DISKS, PlacementPolicy.FASTEST, {1: {1, 2}}))
+
+    def test_MaxCost(self) -> None:
+        self.assertEqual(({1: 1}, []), solvePlacement([(1, 6)], DISKS, PlacementPolicy.FASTEST, maxCost=17),
+                         "Disk 2 would cost 18")
+        self.assertEqual(({}, [1]), solvePlacement([(1, 6)], DISKS, PlacementPolicy.CHEAPEST, maxCost=5))
+
+    def test_Indexes(self) -> None:
+        rng = random.Random(0)
+        freeSpaces = [rng.randint(0, 100) for _ in range(37)]
+        firstFit = FirstFitIndex(freeSpaces)
+        bestFit = BestFitIndex(freeSpaces)
+        for _ in range(500):
+            space = rng.randint(0, 100)
+            start = rng.randint(0, 40)
+            fitting = [index for index in range(start, len(freeSpaces)) if freeSpaces[index] >= space]
+            self.assertEqual(fitting[0] if fitting else -1, firstFit.first(space, start))
+            tightest = sorted((freeSpaces[index], index) for index in range(len(freeSpaces))
+                              if freeSpaces[index] >= space)
+            self.assertEqual([index for _, index in tightest], list(bestFit.candidates(space)))
+            index = rng.randrange(len(freeSpaces))
+            freeSpace = rng.randint(0, 100)
+            firstFit.update(index, freeSpace)
+            bestFit.update(index, freeSpaces[index], freeSpace)
+            freeSpaces[index] = freeSpace
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,38 @@
+import unittest
+import PlanCheck
+
+
+def explain(scan: dict, cost: float, rows: int) -> list:
+    return [{'Plan': {'Node Type': "Nested Loop", 'Join Type': "Inner", 'Total Cost': cost, 'Plan Rows': rows,
+                      'Actual Rows': rows, 'Plans': [scan, {'Node Type': "Index Scan", 'Index Name': "disks_pkey",
+                                                            'Relation Name': "disks", 'Total Cost': 1.0}]},
+             'Execution Time': 0.5}]
+
+
+INDEX_SCAN = {'Node Type': "Index Only Scan", 'Index Name': "queriesondisksbydisk", 'Relation Name': "queriesondisks"}
+SEQ_SCAN = {'Node Type': "Seq Scan", 'Relation Name': "queriesondisks"}
+STATEMENT = "SELECT QueryID FROM QueriesOnDisks INNER JOIN Disks USING(DiskID)   WHERE DiskID = %s"
+
+
+class Test(unittest.TestCase):
+    def test_Shape(self) -> None:
+        record = PlanCheck.planRecord(STATEMENT, "Solution.f", explain(SEQ_SCAN, 10.0, 5))
+        self.assertEqual(["Inner Nested Loop", "Seq Scan on queriesondisks", "Index Scan using disks_pkey"],
+                         record['shape'])
+        self.assertEqual(PlanCheck.statementKey(STATEMENT), PlanCheck.statementKey(" ".join(STATEMENT.split())))
+
+    def test_Compare(self) -> None:
+        key = PlanCheck.statementKey(STATEMENT)
+        baseline = {key: PlanCheck.planRecord(STATEMENT, "Solution.f", explain(INDEX_SCAN, 10.0, 5))}
+        self.assertEqual([], PlanCheck.comparePlans(baseline, baseline))
+        self.assertEqual([], PlanCheck.comparePlans(baseline, {key: PlanCheck.planRecord(
+            STATEMENT, "Solution.f", explain(INDEX_SCAN, 15.0, 20))}), "Below the thresholds")
+        findings = PlanCheck.comparePlans(baseline, {key: PlanCheck.planRecord(
+            STATEMENT, "Solution.f", explain(SEQ_SCAN, 100.0, 500))})
+        self.assertEqual(3, len(findings), "Plan, cost and rows")
+        self.assertIn("Seq Scan on queriesondisks", findings[0])
+        self.assertEqual([], PlanCheck.comparePlans({}, baseline), "New statements are not regressions")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,35 @@
+import unittest
+from collections import namedtuple
+from Utility.DBConnector import ResultSet
+
+Column = namedtuple('Column', 'name')
+
+
+class Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rows = [(1, "dell", 10), (2, "hp", 20)]
+        self.resultSet = ResultSet([Column('diskid'), Column('diskcompany'), Column('diskspeed')], self.rows)
+
+    def test_RowAccess(self) -> None:
+        self.assertEqual("hp", self.resultSet[1]['diskcompany'])
+        self.assertEqual("hp", self.resultSet[1]['DiskCompany'], "column names are case insensitive")
+        self.assertIsNone(self.resultSet[0][0], "only column names can be used as keys")
+        self.assertEqual({'diskid': 1, 'diskcompany': "dell", 'diskspeed': 10}, dict(self.resultSet[0]))
+        self.assertRaises(KeyError, lambda: self.resultSet[0]['nosuchcolumn'])
+
+    def test_SharedRows(self) -> None:
+        self.assertIs(self.rows, self.resultSet.rows, "rows should not be copied")
+        self.assertEqual(['diskid', 'diskcompany', 'diskspeed'], self.resultSet.cols_header)
+        self.assertEqual(2, self.resultSet.cols['DISKSPEED'])
+
+    def test_Column(self) -> None:
+        self.assertEqual((10, 20), self.resultSet.column('diskspeed'))
+        self.assertEqual(("dell", "hp"), self.resultSet.column(1))
+
+    def test_Empty(self) -> None:
+        self.assertTrue(ResultSet().isEmpty())
+        self.assertEqual(0, len(ResultSet()[0]), "invalid rows are empty")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -0,0 +1,68 @@
+import asyncio
+import random
+import unittest
+from Utility.Exceptions import DatabaseException
+from Utility.Retry import RetryPolicy
+
+
+class Flaky:
+    # fails with the given exceptions, one per call, then returns "done"
+    def __init__(self, *failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if len(self.failures) > 0:
+            raise self.failures.pop(0)
+        return "done"
+
+
+class Test(unittest.TestCase):
+    def test_Retry(self) -> None:
+        delays = []
+        policy = RetryPolicy(maxRetries=3, baseDelay=0.01, maxDelay=0.02, sleep=delays.append, rng=random.Random(0))
+        transaction = Flaky(DatabaseException.DEADLOCK_DETECTED("DEADLOCK_DETECTED"),
+                            DatabaseException.SERIALIZATION_FAILURE("SERIALIZATION_FAILURE"),
+                            DatabaseException.DEADLOCK_DETECTED("DEADLOCK_DETECTED"))
+        self.assertEqual("done", policy.run(transaction))
+        self.assertEqual(4, transaction.calls)
+        self.assertEqual(3, len(delays))
+        for attempt, delay in enumerate(delays):
+            self.assertTrue(0 <= delay <= min(0.02, 0.01 * 2 ** attempt), "Full jitter, capped at maxDelay")
+        self.assertEqual({'transactions': 1, 'retries': 3, 'serialization_failures': 1, 'deadlocks': 2,
+                          'gave_up': 0, 'lock_wait_seconds': 0}, policy.stats.snapshot())
+
+    def test_GiveUp(self) -> None:
+        policy = RetryPolicy(maxRetries=1, sleep=lambda delay: None)
+        transaction = Flaky(*[DatabaseException.SERIALIZATION_FAILURE("SERIALIZATION_FAILURE")] * 3)
+        self.assertRaises(DatabaseException.SERIALIZATION_FAILURE, policy.run, transaction)
+        self.assertEqual(2, transaction.calls)
+        self.assertEqual(1, policy.stats.snapshot()['gave_up'])
+
+    def test_RetryAsync(self) -> None:
+        policy = RetryPolicy(maxRetries=2, baseDelay=0.001, maxDelay=0.001)
+        transaction = Flaky(DatabaseException.DEADLOCK_DETECTED("DEADLOCK_DETECTED"),
+                            DatabaseException.SERIALIZATION_FAILURE("SERIALIZATION_FAILURE"))
+
+        async def attempt():
+            return transaction()
+
+        self.assertEqual("done", asyncio.run(policy.runAsync(attempt)))
+        self.assertEqual(3, transaction.calls)
+        self.assertEqual({'transactions': 1, 'retries': 2, 'serialization_failures': 1, 'deadlocks': 1,
+                          'gave_up': 0, 'lock_wait_seconds': 0}, policy.stats.snapshot())
+        transaction = Flaky(*[DatabaseException.DEADLOCK_DETECTED("DEADLOCK_DETECTED")] * 3)
+        self.assertRaises(DatabaseException.DEADLOCK_DETECTED, asyncio.run, policy.runAsync(attempt))
+        self.assertEqual(1, policy.stats.snapshot()['gave_up'])
+
+    def test_OtherErrors(self) -> None:
+        policy = RetryPolicy(sleep=lambda delay: None)
+        transaction = Flaky(DatabaseException.UNIQUE_VIOLATION("UNIQUE_VIOLATION"))
+        self.assertRaises(DatabaseException.UNIQUE_VIOLATION, policy.run, transaction)
+        self.assertEqual(1, transaction.calls, "Only rolled back transactions are run again")
+        self.assertEqual(0, policy.stats.snapshot()['retries'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
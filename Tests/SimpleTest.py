@@ -1,11 +1,20 @@
+import asyncio
 import unittest
-import Solution
+import AsyncSolution
+import Backend
+import Utility.Instrumentation as Instrumentation
+from Utility.DBConnector import DBConnector
+from Utility.Exceptions import DatabaseException
 from Utility.ReturnValue import ReturnValue
+from Utility.PlacementPolicy import PlacementPolicy
 from Tests.abstractTest import AbstractTest
 from Business.Query import Query
 from Business.RAM import RAM
 from Business.Disk import Disk
 
+# SOLUTION_BACKEND=memory runs the same tests against MemorySolution
+Solution = Backend.current()
+
 '''
     Simple test, create one of your own
     make sure the tests' names start with test_
@@ -34,6 +43,351 @@ class Test(AbstractTest):
         self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.addQuery(Query(3, "DELL", 10)),
                          "ID 1 already exists")
 
+    def test_BulkInsert(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.addQuery(Query(1, "DELL", 10)), "Should work")
+        self.assertEqual([ReturnValue.ALREADY_EXISTS, ReturnValue.OK, ReturnValue.BAD_PARAMS,
+                          ReturnValue.ALREADY_EXISTS, ReturnValue.BAD_PARAMS],
+                         Solution.addQueries([Query(1, "DELL", 10), Query(2, "DELL", 10), Query(3, "DELL", -1),
+                                              Query(2, "HP", 5), Query(4, None, 5)]), "Per-row results")
+        self.assertEqual([ReturnValue.OK, ReturnValue.BAD_PARAMS, ReturnValue.ALREADY_EXISTS],
+                         Solution.addDisks([Disk(1, "DELL", 10, 10, 10), Disk(2, "DELL", 0, 10, 10),
+                                            Disk(1, "HP", 10, 10, 10)]), "Per-row results")
+        self.assertEqual([ReturnValue.OK, ReturnValue.OK, ReturnValue.BAD_PARAMS],
+                         Solution.addRAMs([RAM(1, "DELL", 10), RAM(2, "DELL", 10), RAM(3, "DELL", 0)]),
+                         "Per-row results")
+        self.assertEqual(10, Solution.getQueryProfile(2).getSize(), "First copy of ID 2 should be stored")
+
+    def test_BulkPlacement(self) -> None:
+        self.assertEqual([ReturnValue.OK] * 2, Solution.addDisks([Disk(1, "DELL", 10, 10, 2), Disk(2, "HP", 10, 5, 3)]))
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addQueries([Query(1, "a", 4), Query(2, "b", 4), Query(3, "c", 4)]))
+        self.assertEqual([ReturnValue.OK, ReturnValue.OK, ReturnValue.BAD_PARAMS, ReturnValue.ALREADY_EXISTS,
+                          ReturnValue.NOT_EXISTS, ReturnValue.NOT_EXISTS, ReturnValue.OK],
+                         Solution.addQueriesToDisks([(Query(1, "a", 4), 1), (Query(2, "b", 4), 1), (Query(3, "c", 4), 1),
+                                                     (Query(1, "a", 4), 1), (Query(9, "x", 1), 1), (Query(3, "c", 4), 9),
+                                                     (Query(3, "c", 4), 2)]), "Per-pair results")
+        self.assertEqual(2, Solution.getDiskProfile(1).getFreeSpace(), "Combined decrement")
+        # a negative size on an existing disk is BAD_PARAMS even when the pair is placed or the query is missing
+        for pair in ((Query(1, "a", -5), 1), (Query(7, "a", -5), 1)):
+            self.assertEqual([ReturnValue.BAD_PARAMS], Solution.addQueriesToDisks([pair]), "Same as a single add")
+            self.assertEqual(ReturnValue.BAD_PARAMS, Solution.addQueryToDisk(*pair))
+        self.assertEqual(1, Solution.getDiskProfile(2).getFreeSpace(), "Combined decrement")
+        self.assertEqual(16 + 12, Solution.getCostForPurpose("a") + Solution.getCostForPurpose("b") +
+                         Solution.getCostForPurpose("c"), "Cost uses DiskCostPerByte")
+
+    def test_ProfileBatch(self) -> None:
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addDisks([Disk(diskID, "DELL", diskID, 10 * diskID, 2)
+                                                                  for diskID in range(1, 4)]))
+        self.assertEqual([ReturnValue.OK] * 2, Solution.addQueries([Query(1, "a", 4), Query(2, "b", 5)]))
+        self.assertEqual(ReturnValue.OK, Solution.addRAM(RAM(1, "HP", 8)))
+        self.assertEqual([3, 1, 2], list(Solution.getDiskProfiles([3, 1, 2])), "The order of the IDs given")
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "a", 4), 2))
+        disks = Solution.getDiskProfiles([3, 2, 7, 2])
+        self.assertEqual([3, 2, 7], list(disks))
+        self.assertEqual([3, 2, None], [disk.getDiskID() for disk in disks.values()], "7 is a bad disk")
+        self.assertEqual((16, 2, "DELL", 2), (disks[2].getFreeSpace(), disks[2].getSpeed(), disks[2].getCompany(),
+                                              disks[2].getCost()))
+        queries = Solution.getQueryProfiles([1, 2, 3])
+        self.assertEqual([("a", 4), ("b", 5)], [(queries[i].getPurpose(), queries[i].getSize()) for i in (1, 2)])
+        self.assertIsNone(queries[3].getQueryID())
+        rams = Solution.getRAMProfiles([1, 2])
+        self.assertEqual(("HP", 8), (rams[1].getCompany(), rams[1].getSize()))
+        self.assertIsNone(rams[2].getRamID())
+        self.assertEqual({}, Solution.getDiskProfiles([]))
+
+    @unittest.skipUnless(Backend.name() == 'sql', "AsyncSolution works on the database")
+    def test_Async(self) -> None:
+        async def scenario():
+            added = await asyncio.gather(*[AsyncSolution.addQuery(Query(i, "a", i)) for i in range(1, 11)])
+            self.assertEqual([ReturnValue.OK] * 10, added, "Should work")
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.addDisk(Disk(1, "DELL", 10, 100, 2)))
+            self.assertEqual(ReturnValue.ALREADY_EXISTS, await AsyncSolution.addDisk(Disk(1, "DELL", 10, 100, 2)))
+            placed = await asyncio.gather(*[AsyncSolution.addQueryToDisk(Query(i, "a", i), 1) for i in range(1, 11)])
+            self.assertEqual([ReturnValue.OK] * 10, placed, "Should work")
+            self.assertEqual(45, (await AsyncSolution.getDiskProfile(1)).getFreeSpace(), "100 - 55")
+            self.assertEqual(110, await AsyncSolution.getCostForPurpose("a"))
+            self.assertEqual(ReturnValue.NOT_EXISTS, await AsyncSolution.addQueryToDisk(Query(11, "a", 1), 1))
+
+        asyncio.run(scenario())
+
+    @unittest.skipUnless(Backend.name() == 'sql', "AsyncSolution works on the database")
+    def test_AsyncMirror(self) -> None:
+        async def scenario():
+            self.assertEqual([ReturnValue.OK, ReturnValue.OK, ReturnValue.BAD_PARAMS],
+                             await AsyncSolution.addDisks([Disk(1, "DELL", 10, 20, 1), Disk(2, "HP", 5, 20, 2),
+                                                           Disk(3, "HP", 0, 20, 2)]))
+            self.assertEqual([ReturnValue.OK] * 3 + [ReturnValue.ALREADY_EXISTS], await AsyncSolution.addQueries(
+                [Query(1, "a", 4), Query(2, "b", 5), Query(3, "a", 30), Query(1, "a", 4)]))
+            self.assertEqual([ReturnValue.OK], await AsyncSolution.addRAMs([RAM(1, "HP", 8)]))
+            self.assertEqual(ReturnValue.OK, await AsyncSolution.addRAMToDisk(1, 1))
+            self.assertEqual([ReturnValue.OK, ReturnValue.ALREADY_EXISTS, ReturnValue.BAD_PARAMS],
+                             await AsyncSolution.addQueriesToDisks([(Query(1, "a", 4), 1), (Query(1, "a", 4), 1),
+                                                                    (Query(1, "a", -5), 2)]))
+            self.assertEqual(({2: 1}, [3]), await AsyncSolution.placeQueries([2, 3], PlacementPolicy.CHEAPEST))
+            self.assertEqual([11, 20], [disk.getFreeSpace() for disk in
+                                        (await AsyncSolution.getDiskProfiles([1, 2])).values()])
+            self.assertEqual(["a", "b"], [query.getPurpose() for query in
+                                          (await AsyncSolution.getQueryProfiles([1, 2])).values()])
+            self.assertEqual("HP", (await AsyncSolution.getRAMProfiles([1]))[1].getCompany())
+            self.assertEqual({"a": 4, "b": 5}, await AsyncSolution.getCostForAllPurposes())
+            self.assertEqual({1: 8, 2: 0}, await AsyncSolution.diskTotalRAMForAll())
+            self.assertEqual(Solution.averageSizeQueriesOnDiskForAll(),
+                             await AsyncSolution.averageSizeQueriesOnDiskForAll())
+            self.assertEqual(Solution.getCloseQueriesForAll(), await AsyncSolution.getCloseQueriesForAll())
+            self.assertEqual([1], await AsyncSolution.getNonExclusiveDisks(), "an HP RAM on a DELL disk")
+
+        asyncio.run(scenario())
+
+    @unittest.skipUnless(Backend.name() == 'sql', "AsyncSolution works on the database")
+    def test_AsyncProfileCache(self) -> None:
+        Solution.enableProfileCache()
+        Solution.enableConcurrencyMode()
+        try:
+            self.assertEqual(ReturnValue.OK, Solution.addDisk(Disk(1, "DELL", 10, 10, 1)))
+            self.assertEqual(ReturnValue.OK, Solution.addQuery(Query(1, "stats", 4)))
+            self.assertEqual(10, Solution.getDiskProfile(1).getFreeSpace())
+            transactions = Solution.getContentionStats()['transactions']
+            self.assertEqual(ReturnValue.OK, asyncio.run(AsyncSolution.addQueryToDisk(Query(1, "stats", 4), 1)))
+            self.assertEqual(transactions + 1, Solution.getContentionStats()['transactions'], "run by the policy")
+            self.assertEqual(6, Solution.getDiskProfile(1).getFreeSpace(), "an async write invalidates the disk")
+            self.assertEqual(ReturnValue.OK, asyncio.run(AsyncSolution.deleteDisk(1)))
+            self.assertIsNone(Solution.getDiskProfile(1).getDiskID())
+        finally:
+            Solution.disableConcurrencyMode()
+            Solution.disableProfileCache()
+
+    def test_Migration(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.addDisk(Disk(1, "DELL", 10, 10, 10)), "Should work")
+        self.assertEqual(ReturnValue.OK, Solution.migrateSchema(), "Indexes already exist")
+        self.assertEqual(ReturnValue.OK, Solution.migrateSchema(), "Should be idempotent")
+        self.assertEqual(10, Solution.getDiskProfile(1).getFreeSpace(), "Data should be kept")
+
+    def test_DiskStats(self) -> None:
+        self.assertEqual(0, Solution.diskTotalRAM(1), "No such disk")
+        self.assertEqual(0, Solution.averageSizeQueriesOnDisk(1), "No such disk")
+        self.assertEqual({}, Solution.diskTotalRAMForAll())
+        self.assertEqual([ReturnValue.OK] * 2, Solution.addDisks([Disk(1, "DELL", 10, 100, 1), Disk(2, "HP", 10, 100, 1)]))
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addQueries([Query(1, "a", 1), Query(2, "a", 2), Query(3, "a", 6)]))
+        self.assertEqual([ReturnValue.OK] * 2, Solution.addRAMs([RAM(1, "DELL", 5), RAM(2, "DELL", 7)]))
+        self.assertEqual(0, Solution.diskTotalRAM(1), "No RAMs yet")
+        self.assertEqual(0, Solution.averageSizeQueriesOnDisk(1), "No queries yet")
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(1, 1))
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(2, 1))
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(2, 2))
+        self.assertEqual(12, Solution.diskTotalRAM(1))
+        self.assertEqual({1: 12, 2: 7}, Solution.diskTotalRAMForAll())
+        self.assertEqual({1: 0, 2: 0}, Solution.averageSizeQueriesOnDiskForAll(), "No queries yet")
+        self.assertEqual(ReturnValue.OK, Solution.removeRAMFromDisk(1, 1))
+        self.assertEqual(ReturnValue.OK, Solution.deleteRAM(2))
+        self.assertEqual(0, Solution.diskTotalRAM(1), "Deleting the RAM cascades")
+        for queryID, size in [(1, 1), (2, 2), (3, 6)]:
+            self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(queryID, "a", size), 1))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(3, "a", 6), 2))
+        self.assertEqual(3, Solution.averageSizeQueriesOnDisk(1))
+        self.assertEqual({1: 3, 2: 6}, Solution.averageSizeQueriesOnDiskForAll())
+        self.assertEqual({1: 0, 2: 0}, Solution.diskTotalRAMForAll(), "Deleting the RAM cascades")
+        self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(3, "a", 6)))
+        self.assertEqual(1.5, Solution.averageSizeQueriesOnDisk(1), "Deleting the query cascades")
+        self.assertEqual(0, Solution.averageSizeQueriesOnDisk(2), "Deleting the query cascades")
+        self.assertEqual(ReturnValue.OK, Solution.removeQueryFromDisk(Query(1, "a", 1), 1))
+        self.assertEqual(2, Solution.averageSizeQueriesOnDisk(1))
+        self.assertEqual(ReturnValue.OK, Solution.deleteDisk(1))
+        self.assertEqual(0, Solution.averageSizeQueriesOnDisk(1), "No such disk")
+
+    def test_PurposeCost(self) -> None:
+        self.assertEqual([ReturnValue.OK] * 2, Solution.addDisks([Disk(1, "DELL", 10, 100, 1), Disk(2, "HP", 10, 100, 3)]))
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addQueries([Query(1, "a", 2), Query(2, "a", 3), Query(3, "b", 5)]))
+        self.assertEqual({"a": 0, "b": 0}, Solution.getCostForAllPurposes(), "Nothing placed yet")
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "a", 2), 1))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "a", 2), 2))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(2, "a", 3), 2))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(3, "b", 5), 1))
+        self.assertEqual(2 + 6 + 9, Solution.getCostForPurpose("a"))
+        self.assertEqual({"a": 17, "b": 5}, Solution.getCostForAllPurposes())
+        self.assertEqual(ReturnValue.OK, Solution.removeQueryFromDisk(Query(1, "a", 2), 1))
+        self.assertEqual(15, Solution.getCostForPurpose("a"))
+        self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(2, "a", 3)))
+        self.assertEqual(6, Solution.getCostForPurpose("a"), "Deleting the query cascades")
+        self.assertEqual(ReturnValue.OK, Solution.deleteDisk(2))
+        self.assertEqual(0, Solution.getCostForPurpose("a"), "Deleting the disk cascades")
+        self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(1, "a", 2)))
+        self.assertEqual({"b": 5}, Solution.getCostForAllPurposes())
+        self.assertEqual(0, Solution.getCostForPurpose("a"), "No such purpose")
+
+    def test_MostAvailableDisks(self) -> None:
+        self.assertEqual([], Solution.mostAvailableDisks(), "No disks")
+        self.assertEqual([ReturnValue.OK] * 7, Solution.addDisks(
+            [Disk(1, "DELL", 1, 5, 1), Disk(2, "DELL", 2, 5, 1), Disk(3, "DELL", 1, 10, 1), Disk(4, "DELL", 1, 0, 1),
+             Disk(5, "DELL", 9, 1, 1), Disk(6, "DELL", 9, 4, 1), Disk(7, "DELL", 1, 5, 1)]))
+        self.assertEqual([5, 6, 2, 1, 3], Solution.mostAvailableDisks(), "No queries, ties by speed then id")
+        self.assertEqual([ReturnValue.OK] * 5, Solution.addQueries(
+            [Query(1, "a", 0), Query(2, "a", 5), Query(3, "a", 5), Query(4, "a", 4), Query(5, "a", 11)]))
+        self.assertEqual([2, 1, 3, 7, 6], Solution.mostAvailableDisks(), "Equal sizes count as fitting")
+        self.assertEqual([2, 1, 3, 7, 6, 5, 4], Solution.mostAvailableDisks(10), "Configurable top-k")
+
+    def test_QueriesCanBeAdded(self) -> None:
+        self.assertEqual([], Solution.getQueriesCanBeAddedToDisk(1), "No such disk")
+        self.assertEqual([], Solution.getQueriesCanBeAddedToDiskAndRAM(1), "No such disk")
+        self.assertEqual(ReturnValue.OK, Solution.addDisk(Disk(1, "DELL", 10, 6, 1)))
+        self.assertEqual([ReturnValue.OK] * 8, Solution.addQueries([Query(i, "a", i) for i in range(1, 9)]))
+        self.assertEqual([6, 5, 4, 3, 2], Solution.getQueriesCanBeAddedToDisk(1))
+        self.assertEqual([], Solution.getQueriesCanBeAddedToDiskAndRAM(1), "No RAM on the disk")
+        self.assertEqual(ReturnValue.OK, Solution.addRAM(RAM(1, "DELL", 3)))
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(1, 1))
+        self.assertEqual([1, 2, 3], Solution.getQueriesCanBeAddedToDiskAndRAM(1))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(4, "a", 4), 1))
+        self.assertEqual([2, 1], Solution.getQueriesCanBeAddedToDisk(1), "Free space went down to 2")
+        self.assertEqual([1, 2], Solution.getQueriesCanBeAddedToDiskAndRAM(1))
+
+    def test_CloseQueries(self) -> None:
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addDisks([Disk(i, "DELL", 10, 100, 1) for i in range(1, 4)]))
+        self.assertEqual([ReturnValue.OK] * 12, Solution.addQueries([Query(i, "a", 1) for i in range(1, 13)]))
+        self.assertEqual(list(range(2, 12)), Solution.getCloseQueries(1), "No placements, every query is close")
+        placements = [(1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (3, 3), (4, 1), (5, 2), (5, 3)]
+        self.assertEqual([ReturnValue.OK] * len(placements),
+                         Solution.addQueriesToDisks([(Query(q, "a", 1), d) for q, d in placements]))
+        self.assertEqual([2, 5], Solution.getCloseQueries(1), "At least 2 of 3 disks shared")
+        self.assertEqual([1, 4, 5], Solution.getCloseQueries(2), "At least 1 of 2 disks shared")
+        self.assertEqual([1, 2, 3, 4, 5, 7, 8, 9, 10, 11], Solution.getCloseQueries(6))
+        closeQueries = Solution.getCloseQueriesForAll()
+        self.assertEqual(12, len(closeQueries))
+        for queryID in range(1, 13):
+            self.assertEqual(Solution.getCloseQueries(queryID), closeQueries[queryID], "Same as a single lookup")
+
+    def test_ConflictingDisks(self) -> None:
+        self.assertEqual([ReturnValue.OK] * 4, Solution.addDisks([Disk(i, "DELL", 10, 100, 1) for i in range(1, 5)]))
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addQueries([Query(i, "a", 1) for i in range(1, 4)]))
+        self.assertEqual([], Solution.getConflictingDisks())
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "a", 1), 1))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(2, "a", 1), 2))
+        self.assertEqual([], Solution.getConflictingDisks(), "Every query is on one disk")
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addQueriesToDisks(
+            [(Query(3, "a", 1), 2), (Query(3, "a", 1), 3), (Query(3, "a", 1), 4)]))
+        self.assertEqual([2, 3, 4], Solution.getConflictingDisks(), "Query 3 placed three times in one statement")
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "a", 1), 4))
+        self.assertEqual([1, 2, 3, 4], Solution.getConflictingDisks())
+        self.assertEqual(ReturnValue.OK, Solution.removeQueryFromDisk(Query(1, "a", 1), 4))
+        self.assertEqual([2, 3, 4], Solution.getConflictingDisks())
+        self.assertEqual(ReturnValue.OK, Solution.deleteDisk(3))
+        self.assertEqual([2, 4], Solution.getConflictingDisks(), "Deleting the disk cascades")
+        self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(3, "a", 1)))
+        self.assertEqual([], Solution.getConflictingDisks(), "Deleting the query cascades")
+
+    def test_CompanyExclusive(self) -> None:
+        self.assertFalse(Solution.isCompanyExclusive(1), "No such disk")
+        self.assertEqual([ReturnValue.OK] * 2, Solution.addDisks([Disk(1, "DELL", 10, 10, 1), Disk(2, "HP", 10, 10, 1)]))
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addRAMs([RAM(1, "DELL", 1), RAM(2, "DELL", 1), RAM(3, "HP", 1)]))
+        self.assertTrue(Solution.isCompanyExclusive(1), "No RAMs")
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(1, 1))
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(2, 1))
+        self.assertTrue(Solution.isCompanyExclusive(1))
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(3, 1))
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(1, 2))
+        self.assertFalse(Solution.isCompanyExclusive(1))
+        self.assertEqual([1, 2], Solution.getNonExclusiveDisks())
+        self.assertEqual(ReturnValue.OK, Solution.removeRAMFromDisk(3, 1))
+        self.assertTrue(Solution.isCompanyExclusive(1))
+        self.assertEqual(ReturnValue.OK, Solution.deleteRAM(1))
+        self.assertEqual([], Solution.getNonExclusiveDisks(), "Deleting the RAM cascades")
+        self.assertEqual(ReturnValue.OK, Solution.addRAMToDisk(2, 2))
+        self.assertEqual(ReturnValue.OK, Solution.deleteDisk(2))
+        self.assertEqual([], Solution.getNonExclusiveDisks(), "Deleting the disk cascades")
+        self.assertFalse(Solution.isCompanyExclusive(2), "No such disk")
+
+    def test_PlacementChecks(self) -> None:
+        self.assertEqual(ReturnValue.OK, Solution.addDiskAndQuery(Disk(1, "DELL", 10, 5, 2), Query(1, "a", 5)))
+        self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.addDiskAndQuery(Disk(2, "DELL", 10, 5, 2), Query(1, "a", 5)))
+        self.assertIsNone(Solution.getDiskProfile(2).getDiskID(), "Nothing is added when one insert fails")
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.addQueryToDisk(Query(1, "a", -1), 1), "Negative cost")
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.addQueryToDisk(Query(9, "a", 1), 1))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.addQueryToDisk(Query(1, "a", 5), 9))
+        self.assertEqual(ReturnValue.BAD_PARAMS, Solution.addQueryToDisk(Query(1, "a", 6), 1), "Not enough space")
+        self.assertEqual(ReturnValue.OK, Solution.removeQueryFromDisk(Query(1, "a", 5), 1), "Not placed")
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "a", 5), 1))
+        self.assertEqual(0, Solution.getDiskProfile(1).getFreeSpace())
+        self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(1, "a", None)), "Rolled back")
+        self.assertEqual(5, Solution.getQueryProfile(1).getSize(), "Rolled back")
+        self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(1, "a", 5)))
+        self.assertEqual(5, Solution.getDiskProfile(1).getFreeSpace())
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.removeRAMFromDisk(1, 1))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.addRAMToDisk(1, 1))
+        self.assertEqual(ReturnValue.NOT_EXISTS, Solution.deleteDisk(2))
+
+    def test_PlaceQueries(self) -> None:
+        self.assertEqual(({}, []), Solution.placeQueries([]))
+        self.assertEqual([ReturnValue.OK] * 3, Solution.addDisks(
+            [Disk(1, "DELL", 1, 10, 1), Disk(2, "DELL", 5, 6, 3), Disk(3, "DELL", 3, 4, 2)]))
+        self.assertEqual([ReturnValue.OK] * 5, Solution.addQueries(
+            [Query(1, "a", 6), Query(2, "a", 4), Query(3, "a", 4), Query(4, "a", 20), Query(5, "a", 1)]))
+        self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(5, "a", 1), 3))
+        self.assertEqual(({1: 1, 2: 1, 3: 2, 5: 2}, [4, 9]),
+                         Solution.placeQueries([1, 2, 3, 4, 5, 9, 1], PlacementPolicy.CHEAPEST),
+                         "Largest first, each on the cheapest disk it fits on and is not already on")
+        self.assertEqual([0, 1, 3], [Solution.getDiskProfile(diskID).getFreeSpace() for diskID in range(1, 4)])
+        self.assertEqual(2 + 6 + 4 + 12 + 3, Solution.getCostForPurpose("a"))
+        self.assertEqual(ReturnValue.OK, Solution.addQuery(Query(6, "a", 3)))
+        self.assertEqual(({6: 3}, [4]), Solution.placeQueries([4, 6], PlacementPolicy.FASTEST))
+        self.assertEqual(0, Solution.getDiskProfile(3).getFreeSpace())
+        self.assertEqual(ReturnValue.OK, Solution.addDisk(Disk(4, "DELL", 9, 100, 2 ** 30)))
+        self.assertEqual(ReturnValue.OK, Solution.addQuery(Query(7, "a", 2)))
+        self.assertEqual(({}, [7]), Solution.placeQueries([7], PlacementPolicy.FASTEST),
+                         "The cost of 7 on disk 4 is out of the INTEGER range")
+        self.assertEqual(100, Solution.getDiskProfile(4).getFreeSpace())
+
+    @unittest.skipUnless(Backend.name() == 'sql', "only the SQL backend caches profiles")
+    def test_ProfileCache(self) -> None:
+        Solution.enableProfileCache()
+        try:
+            self.assertEqual(ReturnValue.OK, Solution.addDisk(Disk(1, "DELL", 10, 10, 1)))
+            self.assertEqual(ReturnValue.OK, Solution.addQuery(Query(1, "stats", 4)))
+            self.assertEqual(10, Solution.getDiskProfile(1).getFreeSpace())
+            self.assertEqual(10, Solution.getDiskProfile(1).getFreeSpace())
+            self.assertEqual(1, Solution.getProfileCacheStats()['hits'])
+            self.assertEqual(ReturnValue.OK, Solution.addQueryToDisk(Query(1, "stats", 4), 1))
+            self.assertEqual(6, Solution.getDiskProfile(1).getFreeSpace(), "placing a query invalidates the disk")
+            self.assertEqual(4, Solution.getQueryProfile(1).getSize())
+            self.assertEqual(ReturnValue.OK, Solution.deleteQuery(Query(1, "stats", 4)))
+            self.assertEqual(10, Solution.getDiskProfile(1).getFreeSpace(), "deleting a query invalidates its disks")
+            self.assertIsNone(Solution.getQueryProfile(1).getQueryID())
+            self.assertEqual(ReturnValue.OK, Solution.deleteDisk(1))
+            self.assertIsNone(Solution.getDiskProfile(1).getDiskID())
+        finally:
+            Solution.disableProfileCache()
+
+    @unittest.skipUnless(Backend.name() == 'sql', "streams are read from the database")
+    def test_StreamErrors(self) -> None:
+        conn = DBConnector()
+        try:
+            self.assertEqual([(1,), (2,)], list(conn.executeStream("SELECT * FROM generate_series(1, 2)")))
+            self.assertRaises(Exception, conn.executeStream, "SELECT * FROM NoSuchTable")
+        finally:
+            conn.close()
+        self.assertRaises(DatabaseException.ConnectionInvalid, conn.executeStream, "SELECT 1")
+
+    @unittest.skipUnless(Backend.name() == 'sql', "streams are read from the database")
+    def test_StreamAbandoned(self) -> None:
+        conn = DBConnector()
+        rows = conn.executeStream("SELECT * FROM generate_series(1, 5)", fetchSize=2)
+        self.assertEqual((1,), next(rows))
+        conn.close()
+        rows.close()
+
+    @unittest.skipUnless(Backend.name() == 'sql', "the memory backend issues no statements")
+    def test_Instrumentation(self) -> None:
+        events = []
+        Instrumentation.addListener(events.append)
+        try:
+            self.assertEqual(ReturnValue.OK, Solution.addDisk(Disk(1, "DELL", 10, 10, 1)))
+            self.assertEqual(ReturnValue.ALREADY_EXISTS, Solution.addDisk(Disk(1, "DELL", 10, 10, 1)))
+        finally:
+            Instrumentation.removeListener(events.append)
+        inserts = [event for event in events if event.function == "Solution.addDisk"]
+        self.assertEqual(2, len(inserts))
+        self.assertTrue(inserts[0].statement.startswith("INSERT INTO Disks"), "The statement as Solution wrote it")
+        self.assertEqual((1, "DELL", 10, 10, 1), inserts[0].params)
+        self.assertEqual(1, inserts[0].rows)
+        self.assertIsNone(inserts[0].error)
+        self.assertEqual(-1, inserts[1].rows)
+        self.assertIsNotNone(inserts[1].error)
 
 # *** DO NOT RUN EACH TEST MANUALLY ***
 if __name__ == '__main__':
@@ -0,0 +1,94 @@
+import random
+import threading
+import unittest
+import Backend
+from Utility.ReturnValue import ReturnValue
+from Tests.abstractTest import AbstractTest
+from Business.Query import Query
+from Business.Disk import Disk
+
+# concurrent placements in concurrency mode. every worker owns its queries, so it knows where they are,
+# while the disks are shared between the workers
+Solution = Backend.current()
+
+FREE_SPACE = 10 ** 6
+
+
+# ops random placements and removals of queries on disks. the ReturnValues that are not OK are appended to errors,
+# the total size of the queries left on every disk is put in placedSizes
+def placeAndRemove(seed: int, queries, diskIDs, ops: int, errors: list, placedSizes: dict):
+    rng = random.Random(seed)
+    placed = set()
+    for _ in range(ops):
+        query = rng.choice(queries)
+        diskID = rng.choice(diskIDs)
+        if (query.getQueryID(), diskID) in placed:
+            res = Solution.removeQueryFromDisk(query, diskID)
+            placed.discard((query.getQueryID(), diskID))
+        else:
+            res = Solution.addQueryToDisk(query, diskID)
+            placed.add((query.getQueryID(), diskID))
+        if res != ReturnValue.OK:
+            errors.append(res)
+    for queryID, diskID in placed:
+        placedSizes[diskID] = placedSizes.get(diskID, 0) + queries[queryID - queries[0].getQueryID()].getSize()
+
+
+class Test(AbstractTest):
+    def setUp(self) -> None:
+        super().setUp()
+        Solution.enableConcurrencyMode()
+
+    def tearDown(self) -> None:
+        Solution.disableConcurrencyMode()
+        super().tearDown()
+
+    # runs one placeAndRemove per worker, worker i on the disks of diskSets[i]
+    def runWorkers(self, querySets, diskSets, ops: int):
+        errors = []
+        placedSizes = {}
+        sizes = []
+        threads = []
+        for worker, (queries, diskIDs) in enumerate(zip(querySets, diskSets)):
+            sizes.append({})
+            threads.append(threading.Thread(target=placeAndRemove,
+                                            args=(worker, queries, diskIDs, ops, errors, sizes[-1])))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        for queries, workerSizes in zip(querySets, sizes):
+            for diskID, size in workerSizes.items():
+                placedSizes[diskID] = placedSizes.get(diskID, 0) + size
+            # every disk costs 1 per byte
+            self.assertEqual(sum(workerSizes.values()), Solution.getCostForPurpose(queries[0].getPurpose()),
+                             "Cost drifted for " + queries[0].getPurpose())
+        for diskID in set(diskID for diskIDs in diskSets for diskID in diskIDs):
+            self.assertEqual(FREE_SPACE - placedSizes.get(diskID, 0), Solution.getDiskProfile(diskID).getFreeSpace(),
+                             "Free space drifted on disk " + str(diskID))
+
+    # the queries of every worker have a purpose of their own
+    def addFleet(self, workers: int, queriesPerWorker: int, diskCount: int):
+        self.assertEqual([ReturnValue.OK] * diskCount, Solution.addDisks(
+            [Disk(diskID, "DELL", 10, FREE_SPACE, 1) for diskID in range(1, diskCount + 1)]))
+        querySets = []
+        for worker in range(workers):
+            first = worker * queriesPerWorker + 1
+            querySets.append([Query(queryID, "stress" + str(worker), queryID % 50 + 1)
+                              for queryID in range(first, first + queriesPerWorker)])
+            self.assertEqual([ReturnValue.OK] * queriesPerWorker, Solution.addQueries(querySets[-1]))
+        return querySets
+
+    def test_SharedDisks(self) -> None:
+        querySets = self.addFleet(8, 20, 3)
+        self.runWorkers(querySets, [[1, 2, 3]] * 8, 150)
+        stats = Solution.getContentionStats()
+        if Backend.name() == 'sql':
+            self.assertEqual(0, stats['gave_up'])
+            self.assertGreaterEqual(stats['transactions'], 8 * 150)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,56 @@
+import unittest
+from collections import namedtuple
+from Business.Disk import Disk
+from Business.DiskTable import DiskTable
+from Business.Query import Query
+from Business.QueryTable import QueryTable
+from Business.RAM import RAM
+from Business.RAMTable import RAMTable
+from Utility.DBConnector import ResultSet
+
+Column = namedtuple('Column', 'name')
+
+
+class Test(unittest.TestCase):
+    def test_Slots(self) -> None:
+        for item in (Disk(1, "DELL", 10, 10, 1), Query(1, "stats", 4), RAM(1, "DELL", 1)):
+            self.assertFalse(hasattr(item, '__dict__'))
+        disk = Disk(1, "DELL", 10, 10, 1)
+        disk.setFreeSpace(5)
+        self.assertEqual(5, disk.getFreeSpace())
+
+    def test_FromResultSet(self) -> None:
+        # same column order as SELECT * FROM Rams
+        resultSet = ResultSet([Column('ramid'), Column('ramsize'), Column('ramcompany')], [(1, 10, "DELL"), (2, 20, "HP")])
+        table = RAMTable.fromResultSet(resultSet)
+        self.assertEqual(2, len(table))
+        self.assertEqual([1, 2], list(table.ramIDs()))
+        self.assertEqual([10, 20], list(table.sizes()))
+        self.assertEqual(["DELL", "HP"], table.companies())
+        self.assertEqual("RamID=2, company=HP, size=20", str(table[1]))
+
+    def test_FillAtomic(self) -> None:
+        self.assertEqual(0, len(DiskTable.fromResultSet(ResultSet([], []))), "No rows, no column names")
+        table = QueryTable.fromResultSet(ResultSet([Column('queryid'), Column('querypurpose'), Column('querysize')],
+                                                   [(1, "stats", 4)]))
+        bad = ResultSet([Column('queryid'), Column('querypurpose'), Column('querysize')],
+                        [(2, "stats", 5), (3, "stats", None)])
+        self.assertRaises(TypeError, table.fill, bad)
+        self.assertEqual([1, 1, 1], [len(column) for column in table.columns], "a bad ResultSet adds no rows")
+
+    def test_Append(self) -> None:
+        table = DiskTable()
+        table.append(Disk(1, "DELL", 10, 10, 1))
+        table.extend([(2, "HP", 20, 30, 2)])
+        self.assertEqual([10, 30], list(table.freeSpaces()))
+        self.assertEqual([str(Disk(1, "DELL", 10, 10, 1)), str(Disk(2, "HP", 20, 30, 2))], [str(disk) for disk in table])
+        queries = QueryTable()
+        self.assertRaises(TypeError, lambda: queries.append(Query(1, "stats", None)))
+        self.assertEqual([0, 0, 0], [len(column) for column in queries.columns], "a bad row is not half appended")
+        self.assertRaises(OverflowError, queries.appendRow, (1, "stats", 2 ** 70))
+        self.assertRaises(OverflowError, queries.extend, [(1, "stats", 4), (2, "stats", 2 ** 70)])
+        self.assertEqual([1, 1, 1], [len(column) for column in queries.columns], "the rows before a bad row stay")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, exit=False)
@@ -1,12 +1,12 @@
 import unittest
-import Solution
+import Backend
 
 
 class AbstractTest(unittest.TestCase):
     # before each test, setUp is executed
     def setUp(self) -> None:
-        Solution.createTables()
+        Backend.current().createTables()
 
     # after each test, tearDown is executed
     def tearDown(self) -> None:
-        Solution.dropTables()
+        Backend.current().dropTables()
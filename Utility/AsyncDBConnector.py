@@ -0,0 +1,387 @@
+import asyncio
+import collections
+import threading
+import time
+import psycopg2
+from psycopg2 import extensions, sql
+from typing import Union
+from Utility.ConnectionPool import PoolStats
+from Utility.DBConnector import DBConnector, ResultSet, VIOLATIONS
+from Utility.Exceptions import DatabaseException
+import Utility.Instrumentation as Instrumentation
+
+
+# waits until the pending operation of an async psycopg2 connection is done, without blocking the event loop
+async def wait(connection):
+    loop = asyncio.get_running_loop()
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == extensions.POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise psycopg2.OperationalError("Bad poll state " + str(state))
+        future = loop.create_future()
+        fd = connection.fileno()
+        add(fd, lambda: future.done() or future.set_result(None))
+        try:
+            await future
+        finally:
+            remove(fd)
+
+
+# opens an async psycopg2 connection
+async def connectAsync(**params):
+    connection = psycopg2.connect(async_=1, **params)
+    await wait(connection)
+    return connection
+
+
+# the same bookkeeping as ConnectionPool: borrowers reserve a slot under a threading lock and connect or health check
+# outside it, so the pool can be shared by event loops in several threads (or one asyncio.run after another).
+# a borrower that has to wait parks a future of its own event loop, a returned connection wakes the longest waiting one
+class AsyncConnectionPool:
+    # constructor
+    # params are the psycopg2.connect keyword arguments (as read from database.ini)
+    # connect may be replaced by any coroutine function that returns a new async connection
+    def __init__(self, params: dict, minSize=1, maxSize=50, timeout=30.0, checkOnBorrow=True, connect=connectAsync):
+        if minSize < 0 or maxSize < 1 or minSize > maxSize:
+            raise ValueError("Invalid pool size: min=" + str(minSize) + ", max=" + str(maxSize))
+        self.params = params
+        self.minSize = minSize
+        self.maxSize = maxSize
+        self.timeout = timeout
+        self.checkOnBorrow = checkOnBorrow
+        self.stats = PoolStats()
+        self.__connect = connect
+        self.__idle = []
+        self.__inUse = set()
+        # connections being opened or health checked, they count towards maxSize
+        self.__pending = 0
+        self.__waiters = collections.deque()
+        self.__closed = False
+        self.__lock = threading.Lock()
+
+    def inUse(self) -> int:
+        with self.__lock:
+            return len(self.__inUse)
+
+    def idle(self) -> int:
+        with self.__lock:
+            return len(self.__idle)
+
+    def size(self) -> int:
+        with self.__lock:
+            return len(self.__idle) + len(self.__inUse)
+
+    # opens connections until there are minSize, callers that come while it is opening don't open more
+    async def open(self):
+        with self.__lock:
+            missing = 0
+            if not self.__closed:
+                missing = max(0, self.minSize - len(self.__idle) - len(self.__inUse) - self.__pending)
+            self.__pending += missing
+        for _ in range(missing):
+            try:
+                connection = await self.__newConnection()
+            except BaseException:
+                self.__settle()
+                raise
+            self.__settle(connection, created=1)
+
+    # borrow a connection, waits up to timeout seconds when all maxSize connections are lent out
+    async def getconn(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self.__lock:
+                if self.__closed:
+                    raise DatabaseException.ConnectionInvalid("Connection pool is closed")
+                future = None
+                if self.__idle:
+                    connection = self.__idle.pop()
+                elif len(self.__inUse) + self.__pending < self.maxSize:
+                    connection = None
+                else:
+                    future = asyncio.get_running_loop().create_future()
+                    self.__waiters.append(future)
+                if future is None:
+                    self.__pending += 1
+
+            if future is not None:
+                waited = True
+                try:
+                    await asyncio.wait_for(future, self.timeout - (time.monotonic() - start))
+                except BaseException as e:
+                    with self.__lock:
+                        if future in self.__waiters:
+                            self.__waiters.remove(future)
+                        else:
+                            # woken just before it gave up, the slot goes to the next waiter
+                            self.__wakeOne()
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise DatabaseException.ConnectionInvalid("Timed out waiting for a pooled connection")
+                    raise
+                continue
+
+            created = connection is None
+            try:
+                if created:
+                    connection = await self.__newConnection()
+                elif not await self.__isHealthy(connection):
+                    self.__close(connection)
+                    self.__settle(health_check_failures=1, discarded=1)
+                    continue
+            except BaseException:
+                self.__settle()
+                raise
+
+            with self.__lock:
+                self.__pending -= 1
+                if created:
+                    self.stats.created += 1
+                closed = self.__closed
+                if not closed:
+                    self.__inUse.add(connection)
+                    self.stats.borrowed += 1
+                    if waited:
+                        wait_time = time.monotonic() - start
+                        self.stats.waits += 1
+                        self.stats.total_wait_time += wait_time
+                        self.stats.max_wait_time = max(self.stats.max_wait_time, wait_time)
+                else:
+                    self.stats.discarded += 1
+            if closed:
+                self.__close(connection)
+                raise DatabaseException.ConnectionInvalid("Connection pool is closed")
+            return connection
+
+    # return a borrowed connection, it must not be inside a transaction
+    def putconn(self, connection, broken=False):
+        with self.__lock:
+            if connection not in self.__inUse:
+                return
+            self.__inUse.discard(connection)
+            self.stats.returned += 1
+            discard = broken or self.__closed or connection.closed
+            if discard:
+                self.stats.discarded += 1
+            else:
+                self.__idle.append(connection)
+            self.__wakeOne()
+        if discard:
+            self.__close(connection)
+
+    # close every idle connection, lent out connections are closed when returned
+    def closeall(self):
+        with self.__lock:
+            self.__closed = True
+            idle = self.__idle
+            self.__idle = []
+            self.stats.discarded += len(idle)
+            while self.__waiters:
+                self.__wakeOne()
+        for connection in idle:
+            self.__close(connection)
+
+    # gives back a reserved slot, as an idle connection if one is given, counting the given stats
+    def __settle(self, connection=None, **counts):
+        with self.__lock:
+            self.__pending -= 1
+            for field, amount in counts.items():
+                setattr(self.stats, field, getattr(self.stats, field) + amount)
+            if connection is not None:
+                if self.__closed:
+                    self.stats.discarded += 1
+                else:
+                    self.__idle.append(connection)
+                    connection = None
+            self.__wakeOne()
+        if connection is not None:
+            self.__close(connection)
+
+    # wakes the longest waiting borrower in its own event loop, call with the lock held
+    def __wakeOne(self):
+        while self.__waiters:
+            future = self.__waiters.popleft()
+            try:
+                future.get_loop().call_soon_threadsafe(AsyncConnectionPool.__wake, future)
+                return
+            except RuntimeError:
+                # its event loop is closed
+                continue
+
+    @staticmethod
+    def __wake(future):
+        if not future.done():
+            future.set_result(None)
+
+    async def __newConnection(self):
+        try:
+            return await self.__connect(**self.params)
+        except Exception:
+            raise DatabaseException.ConnectionInvalid("Could not connect to database")
+
+    @staticmethod
+    def __close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    async def __isHealthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if not self.checkOnBorrow:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            await wait(connection)
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+
+class AsyncDBConnector:
+    # process-wide async connection pool, created lazily on first use
+    __pool = None
+    __poolSettings = {'minSize': 1, 'maxSize': 50, 'timeout': 30.0, 'checkOnBorrow': True}
+
+    # constructor, call open() (or use "async with") before executing anything
+    def __init__(self):
+        self.pool = None
+        self.connection = None
+        self.cursor = None
+        self.broken = False
+        self.inTransaction = False
+
+    # borrow a connection from the process-wide async pool, the first call opens its minSize connections
+    async def open(self):
+        self.pool = AsyncDBConnector.getPool()
+        await self.pool.open()
+        self.connection = await self.pool.getconn()
+        self.cursor = self.connection.cursor()
+        return self
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # set the size limits of the process-wide async pool, replaces (and closes) an existing pool
+    @staticmethod
+    def configurePool(minSize=1, maxSize=50, timeout=30.0, checkOnBorrow=True):
+        AsyncDBConnector.__poolSettings = {'minSize': minSize, 'maxSize': maxSize, 'timeout': timeout,
+                                           'checkOnBorrow': checkOnBorrow}
+        AsyncDBConnector.closePool()
+
+    @staticmethod
+    def getPool() -> AsyncConnectionPool:
+        if AsyncDBConnector.__pool is None:
+            AsyncDBConnector.__pool = AsyncConnectionPool(DBConnector.params(), **AsyncDBConnector.__poolSettings)
+        return AsyncDBConnector.__pool
+
+    @staticmethod
+    def closePool():
+        if AsyncDBConnector.__pool is not None:
+            AsyncDBConnector.__pool.closeall()
+            AsyncDBConnector.__pool = None
+
+    # close connection, an open transaction is rolled back and the connection is returned to the pool
+    async def close(self):
+        if self.connection is None:
+            return
+        if self.inTransaction and not self.broken:
+            try:
+                await self.__run("ROLLBACK")
+            except Exception:
+                self.broken = True
+        self.inTransaction = False
+        self.pool.putconn(self.connection, broken=self.broken)
+        self.connection = None
+        self.cursor = None
+
+    # commit connection's changes
+    async def commit(self):
+        if self.connection is not None and self.inTransaction:
+            try:
+                await self.__run("COMMIT")
+            except Exception:
+                raise DatabaseException.ConnectionInvalid("Could not commit changes")
+            finally:
+                self.inTransaction = False
+
+    # rollback connection's changes
+    async def rollback(self):
+        if self.connection is not None and self.inTransaction:
+            try:
+                await self.__run("ROLLBACK")
+            except Exception:
+                self.broken = True
+                raise DatabaseException.ConnectionInvalid("Could not rollback changes")
+            finally:
+                self.inTransaction = False
+
+    # same as DBConnector.execute: async connections run in autocommit mode, so a transaction is opened
+    # before the first statement and ends with commit() / rollback() / close()
+    async def execute(self, query: Union[str, sql.Composed], printSchema=False, params=None) -> (int, ResultSet):
+        if self.connection is None:
+            raise DatabaseException.ConnectionInvalid("Connection Invalid")
+
+        if not self.inTransaction:
+            await self.__run("BEGIN")
+            self.inTransaction = True
+        start = time.perf_counter() if Instrumentation.isActive() else None
+        try:
+            await self.__run(query, params)
+        except Exception as e:
+            if start is not None:
+                self.__record(query, params, -1, start, e)
+            raise
+        row_effected = max(self.cursor.rowcount, 0)
+        if start is not None:
+            self.__record(query, params, row_effected, start)
+
+        # get entries in case of SELECT
+        if self.cursor.description is not None:
+            entries = ResultSet(self.cursor.description, self.cursor.fetchall())
+        else:
+            entries = ResultSet()
+
+        # print SELECT entries
+        if printSchema:
+            print(entries)
+
+        return row_effected, entries
+
+    def __record(self, statement, params, rows: int, start: float, error=None):
+        if isinstance(statement, sql.Composable):
+            try:
+                statement = statement.as_string(self.connection)
+            except Exception:
+                statement = repr(statement)
+        Instrumentation.record(statement, params, rows, time.perf_counter() - start, error)
+
+    # runs the query, translating constraint violations to DatabaseException
+    async def __run(self, query, params=None):
+        try:
+            self.cursor.execute(query, params)
+            await wait(self.connection)
+        except psycopg2.Error as e:
+            if e.pgcode in VIOLATIONS:
+                raise VIOLATIONS[e.pgcode](VIOLATIONS[e.pgcode].__name__)
+            if self.connection.closed:
+                # the connection dropped, the pool will replace it
+                self.broken = True
+                raise DatabaseException.ConnectionInvalid("Connection Invalid")
+            raise
+        except BaseException:
+            # cancelled in the middle of a statement, the connection state is unknown
+            self.broken = True
+            raise
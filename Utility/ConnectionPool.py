@@ -0,0 +1,226 @@
+import threading
+import time
+import psycopg2
+from Utility.Exceptions import DatabaseException
+
+
+class PoolStats:
+    # constructor
+    def __init__(self):
+        self.created = 0
+        self.discarded = 0
+        self.borrowed = 0
+        self.returned = 0
+        self.waits = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.health_check_failures = 0
+
+    def asDict(self) -> dict:
+        return dict(self.__dict__)
+
+    # so you can use print(PoolStats)
+    def __str__(self):
+        return ", ".join(key + "=" + str(val) for key, val in self.__dict__.items())
+
+
+class ConnectionPool:
+    # constructor
+    # params are the psycopg2.connect keyword arguments (as read from database.ini)
+    # connect may be replaced by any callable that returns a new DB-API connection
+    def __init__(self, params: dict, minSize=1, maxSize=10, timeout=30.0, checkOnBorrow=True,
+                 connect=psycopg2.connect):
+        if minSize < 0 or maxSize < 1 or minSize > maxSize:
+            raise ValueError("Invalid pool size: min=" + str(minSize) + ", max=" + str(maxSize))
+        self.params = params
+        self.minSize = minSize
+        self.maxSize = maxSize
+        self.timeout = timeout
+        self.checkOnBorrow = checkOnBorrow
+        self.stats = PoolStats()
+        self.__connect = connect
+        self.__idle = []
+        self.__inUse = set()
+        # connections being opened, health checked or rolled back outside the lock, they count towards maxSize
+        self.__pending = 0
+        self.__closed = False
+        self.__lock = threading.Condition()
+        for _ in range(minSize):
+            self.__idle.append(self.__newConnection())
+            self.stats.created += 1
+
+    # how many connections are currently lent out?
+    def inUse(self) -> int:
+        with self.__lock:
+            return len(self.__inUse)
+
+    # how many open connections are waiting in the pool?
+    def idle(self) -> int:
+        with self.__lock:
+            return len(self.__idle)
+
+    def size(self) -> int:
+        with self.__lock:
+            return len(self.__idle) + len(self.__inUse)
+
+    # borrow a connection, blocks up to timeout seconds when all maxSize connections are lent out.
+    # the lock is only held to take an idle connection or reserve a slot, the health check and the connect
+    # run outside it so a slow server doesn't hold up every other borrow and return
+    def getconn(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self.__lock:
+                while True:
+                    if self.__closed:
+                        raise DatabaseException.ConnectionInvalid("Connection pool is closed")
+                    if self.__idle:
+                        connection = self.__idle.pop()
+                        break
+                    if len(self.__inUse) + self.__pending < self.maxSize:
+                        connection = None
+                        break
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        raise DatabaseException.ConnectionInvalid("Timed out waiting for a pooled connection")
+                    waited = True
+                    self.__lock.wait(remaining)
+                self.__pending += 1
+
+            healthy = True
+            try:
+                if connection is None:
+                    connection = self.__newConnection()
+                    created = True
+                else:
+                    healthy = self.__isHealthy(connection)
+                    created = False
+            except BaseException:
+                self.__settle()
+                raise
+            if not healthy:
+                self.__close(connection)
+                self.__settle(health_check_failures=1, discarded=1)
+                continue
+
+            with self.__lock:
+                self.__pending -= 1
+                if created:
+                    self.stats.created += 1
+                closed = self.__closed
+                if not closed:
+                    self.__inUse.add(connection)
+                    self.stats.borrowed += 1
+                    if waited:
+                        wait_time = time.monotonic() - start
+                        self.stats.waits += 1
+                        self.stats.total_wait_time += wait_time
+                        self.stats.max_wait_time = max(self.stats.max_wait_time, wait_time)
+                else:
+                    self.stats.discarded += 1
+                self.__lock.notify()
+            if closed:
+                self.__close(connection)
+                raise DatabaseException.ConnectionInvalid("Connection pool is closed")
+            return connection
+
+    # return a borrowed connection, broken connections are closed and replaced on demand
+    def putconn(self, connection, broken=False):
+        with self.__lock:
+            if connection not in self.__inUse:
+                return
+            # the connection keeps its slot while it's rolled back outside the lock
+            self.__inUse.discard(connection)
+            self.__pending += 1
+            self.stats.returned += 1
+            closed = self.__closed
+        if not broken and not closed and not connection.closed:
+            try:
+                # never hand out a connection in the middle of a transaction
+                connection.rollback()
+            except Exception:
+                broken = True
+
+        with self.__lock:
+            self.__pending -= 1
+            discard = broken or self.__closed or connection.closed
+            missing = 0
+            if discard:
+                self.stats.discarded += 1
+                # keep at least minSize connections around, the replacements are reserved like a borrow
+                if not self.__closed:
+                    missing = max(0, self.minSize - len(self.__idle) - len(self.__inUse) - self.__pending)
+                    self.__pending += missing
+            else:
+                self.__idle.append(connection)
+            self.__lock.notify()
+        if discard:
+            self.__close(connection)
+        for _ in range(missing):
+            try:
+                replacement = self.__newConnection()
+            except DatabaseException.ConnectionInvalid:
+                self.__settle()
+                continue
+            with self.__lock:
+                self.__pending -= 1
+                self.stats.created += 1
+                closed = self.__closed
+                if not closed:
+                    self.__idle.append(replacement)
+                else:
+                    self.stats.discarded += 1
+                self.__lock.notify()
+            if closed:
+                self.__close(replacement)
+
+    # close every idle connection, lent out connections are closed when returned
+    def closeall(self):
+        with self.__lock:
+            self.__closed = True
+            idle = self.__idle
+            self.__idle = []
+            self.stats.discarded += len(idle)
+            self.__lock.notify_all()
+        for connection in idle:
+            self.__close(connection)
+
+    # gives back a reserved slot that didn't turn into a connection, counting the given stats
+    def __settle(self, **counts):
+        with self.__lock:
+            self.__pending -= 1
+            for field, amount in counts.items():
+                setattr(self.stats, field, getattr(self.stats, field) + amount)
+            self.__lock.notify()
+
+    def __newConnection(self):
+        try:
+            connection = self.__connect(**self.params)
+            connection.autocommit = False
+        except Exception:
+            raise DatabaseException.ConnectionInvalid("Could not connect to database")
+        return connection
+
+    @staticmethod
+    def __close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def __isHealthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if not self.checkOnBorrow:
+            return True
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            connection.rollback()
+        except Exception:
+            return False
+        return True
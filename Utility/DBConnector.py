@@ -2,8 +2,28 @@ import psycopg2
 from psycopg2 import errors, sql
 from configparser import ConfigParser
 from Utility.Exceptions import DatabaseException
+from Utility.ConnectionPool import ConnectionPool
+import Utility.Instrumentation as Instrumentation
+import itertools
+from collections.abc import Mapping
 import os
-from typing import Union
+import re
+import threading
+import time
+import weakref
+from typing import Iterator, Union
+
+
+# SQLSTATE codes of the errors that are reported as DatabaseException: constraint violations and
+# the transaction rollbacks that can be retried
+VIOLATIONS = {
+    "23502": DatabaseException.NOT_NULL_VIOLATION,
+    "23503": DatabaseException.FOREIGN_KEY_VIOLATION,
+    "23505": DatabaseException.UNIQUE_VIOLATION,
+    "23514": DatabaseException.CHECK_VIOLATION,
+    "40001": DatabaseException.SERIALIZATION_FAILURE,
+    "40P01": DatabaseException.DEADLOCK_DETECTED,
+}
 
 
 class ResultSetDict(dict):
@@ -13,7 +33,36 @@ class ResultSetDict(dict):
         return super().__getitem__(item.lower())
 
 
+# a read-only view of one row of a ResultSet, rows are shared with the ResultSet and never copied
+class ResultSetRow(Mapping):
+    __slots__ = ('__values', '__index')
+
+    def __init__(self, values: tuple, index: dict):
+        self.__values = values
+        self.__index = index
+
+    def __getitem__(self, item):
+        if type(item) is not str:
+            return None
+        index = self.__index.get(item)
+        if index is None:
+            # the index map holds the lower-cased names, so this only happens for mixed-case keys
+            index = self.__index[item.lower()]
+        return self.__values[index]
+
+    def __iter__(self):
+        return iter(self.__index)
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class ResultSet:
+    __slots__ = ('rows', 'cols_header', 'cols')
+
     # constructor
     def __init__(self, description=None, results=None):
         self.rows = []
@@ -26,15 +75,10 @@ class ResultSet:
 
     # so you can use print(ResultSet)
     def __str__(self):
-        string = ""
-        for col in self.cols_header:
-            string += str(col) + "   "
-        string += '\n'
+        lines = ["".join(str(col) + "   " for col in self.cols_header)]
         for row in self.rows:
-            for val in row:
-                string += str(val) + "   "
-            string += '\n'
-        return string
+            lines.append("".join(str(val) + "   " for val in row))
+        return "\n".join(lines) + "\n"
 
     # what is the size of the ResultSet?
     def size(self):
@@ -44,46 +88,102 @@ class ResultSet:
     def isEmpty(self):
         return self.size() == 0
 
+    # all the values of one column, in row order
+    def column(self, col) -> tuple:
+        index = col if type(col) is int else self.cols[col]
+        return tuple(row[index] for row in self.rows)
+
     def __getRow(self, row: int):
         if len(self.rows) <= row:
             print('Invalid row ' + str(row))
             return ResultSetDict()
-        row_to_return = ResultSetDict()
-        for val, col in zip(self.rows[row], self.cols_header):
-            row_to_return[col] = val
-        return row_to_return
+        return ResultSetRow(self.rows[row], self.cols)
 
     def __fromQuery(self, description, results: list):
         if results is None or len(results) == 0:  # no results
             self.cols = ResultSetDict()
         else:
-            self.rows = results.copy()
+            # the list returned by fetchall() is owned by the ResultSet, no need to copy it
+            self.rows = results if type(results) is list else list(results)
             self.cols_header = [d.name for d in description]
             self.cols = ResultSetDict()
-            for col, index in zip(self.cols_header, range(len(results[0]))):
-                self.cols[col] = index
+            for index, col in enumerate(self.cols_header):
+                dict.__setitem__(self.cols, col.lower(), index)
 
 
 class DBConnector:
+    # process-wide connection pool, created lazily on first use
+    __pool = None
+    __poolSettings = {'minSize': 1, 'maxSize': 10, 'timeout': 30.0, 'checkOnBorrow': True}
+    __poolLock = threading.Lock()
+    # used to give every server-side cursor a unique name
+    __streamIDs = itertools.count(1)
+    # statement text -> prepared statement name, and the names prepared on each open connection
+    __preparedNames = {}
+    __preparedOn = weakref.WeakKeyDictionary()
+    __preparedLock = threading.Lock()
+
     # constructor
-    def __init__(self):
+    # by default the connection is borrowed from the process-wide pool and handed back on close()
+    def __init__(self, usePool=True):
+        self.pool = None
+        self.broken = False
         try:
-            # Obtain the configuration parameters
-            params = DBConnector.__config()
-            self.connection = psycopg2.connect(**params)
-            self.connection.autocommit = False
+            if usePool:
+                self.pool = DBConnector.getPool()
+                self.connection = self.pool.getconn()
+            else:
+                # Obtain the configuration parameters
+                params = DBConnector.__config()
+                self.connection = psycopg2.connect(**params)
+                self.connection.autocommit = False
             self.cursor = self.connection.cursor()
         except Exception as e:
+            if self.pool is not None and getattr(self, 'connection', None) is not None:
+                self.pool.putconn(self.connection, broken=True)
             self.connection = None
             self.cursor = None
             raise DatabaseException.ConnectionInvalid("Could not connect to database")
 
-    # close connection
+    # set the size limits of the process-wide pool, replaces (and closes) an existing pool
+    @staticmethod
+    def configurePool(minSize=1, maxSize=10, timeout=30.0, checkOnBorrow=True):
+        with DBConnector.__poolLock:
+            DBConnector.__poolSettings = {'minSize': minSize, 'maxSize': maxSize, 'timeout': timeout,
+                                          'checkOnBorrow': checkOnBorrow}
+            if DBConnector.__pool is not None:
+                DBConnector.__pool.closeall()
+                DBConnector.__pool = None
+
+    # the process-wide pool, database.ini is read only once when it is created
+    @staticmethod
+    def getPool() -> ConnectionPool:
+        with DBConnector.__poolLock:
+            if DBConnector.__pool is None:
+                DBConnector.__pool = ConnectionPool(DBConnector.__config(), **DBConnector.__poolSettings)
+            return DBConnector.__pool
+
+    @staticmethod
+    def closePool():
+        with DBConnector.__poolLock:
+            if DBConnector.__pool is not None:
+                DBConnector.__pool.closeall()
+                DBConnector.__pool = None
+
+    # close connection, pooled connections are returned to the pool instead
     def close(self):
         if self.cursor is not None:
-            self.cursor.close()
+            try:
+                self.cursor.close()
+            except Exception:
+                self.broken = True
+            self.cursor = None
         if self.connection is not None:
-            self.connection.close()
+            if self.pool is not None:
+                self.pool.putconn(self.connection, broken=self.broken)
+            else:
+                self.connection.close()
+            self.connection = None
 
     # commit connection's changes
     def commit(self):
@@ -91,6 +191,7 @@ class DBConnector:
             try:
                 self.connection.commit()
             except Exception:
+                self.broken = bool(self.connection.closed)
                 raise DatabaseException.ConnectionInvalid("Could not commit changes")
 
     # rollback connection's changes
@@ -99,26 +200,31 @@ class DBConnector:
             try:
                 self.connection.rollback()
             except Exception:
+                self.broken = True
                 raise DatabaseException.ConnectionInvalid("Could not rollback changes")
 
     # executes the query, if it is SELECT you may ask to print the results with printSchema
+    # params are bound to the %s placeholders of query
     # returns the number of rows effected and a ResultSet (for SELECT)
-    def execute(self, query: Union[str, sql.Composed], printSchema=False) -> (int, ResultSet):
+    def execute(self, query: Union[str, sql.Composed], printSchema=False, params=None) -> (int, ResultSet):
+        return self.__execute(query, printSchema, params, query)
+
+    # statement is what the instrumentation reports, the text the caller asked for
+    def __execute(self, query, printSchema, params, statement) -> (int, ResultSet):
         if self.connection is None:
             raise DatabaseException.ConnectionInvalid("Connection Invalid")
 
         # try execute the query
+        start = time.perf_counter() if Instrumentation.isActive() else None
         try:
-            self.cursor.execute(query)
-            row_effected = max(self.cursor.rowcount, 0)
-        except errors.lookup("23502"):
-            raise DatabaseException.NOT_NULL_VIOLATION("NOT_NULL_VIOLATION")
-        except errors.lookup("23503"):
-            raise DatabaseException.FOREIGN_KEY_VIOLATION("FOREIGN_KEY_VIOLATION")
-        except errors.lookup("23505"):
-            raise DatabaseException.UNIQUE_VIOLATION("UNIQUE_VIOLATION")
-        except errors.lookup("23514"):
-            raise DatabaseException.CHECK_VIOLATION("CHECK_VIOLATION")
+            self.__run(self.cursor, query, params)
+        except Exception as e:
+            if start is not None:
+                self.__record(statement, params, -1, start, e)
+            raise
+        row_effected = max(self.cursor.rowcount, 0)
+        if start is not None:
+            self.__record(statement, params, row_effected, start)
 
         # get entries in case of SELECT
         if self.cursor.description is not None:
@@ -132,6 +238,113 @@ class DBConnector:
 
         return row_effected, entries
 
+    # like execute, but the statement is parsed and planned once per connection (PREPARE) and then only
+    # EXECUTEd with params, statement must be a single SQL statement with %s placeholders
+    def executePrepared(self, statement: str, params=(), printSchema=False) -> (int, ResultSet):
+        if self.connection is None:
+            raise DatabaseException.ConnectionInvalid("Connection Invalid")
+
+        name = DBConnector.__prepare(self, statement)
+        if len(params) == 0:
+            return self.__execute("EXECUTE " + name, printSchema, None, statement)
+        return self.__execute("EXECUTE " + name + "(" + ", ".join(["%s"] * len(params)) + ")", printSchema,
+                              tuple(params), statement)
+
+    # makes sure statement is prepared on this connection, returns its name
+    def __prepare(self, statement: str) -> str:
+        with DBConnector.__preparedLock:
+            name = DBConnector.__preparedNames.get(statement)
+            if name is None:
+                name = "prepared_" + str(len(DBConnector.__preparedNames) + 1)
+                DBConnector.__preparedNames[statement] = name
+            prepared = DBConnector.__preparedOn.setdefault(self.connection, set())
+        if name not in prepared:
+            # prepared statements live as long as the session, even if the transaction is rolled back
+            counter = itertools.count(1)
+            body = re.sub(r"%%|%s", lambda match: "%" if match.group() == "%%" else "$" + str(next(counter)),
+                          statement)
+            self.__run(self.cursor, "PREPARE " + name + " AS " + body)
+            prepared.add(name)
+        return name
+
+    # executes a SELECT through a server-side (named) cursor and yields its rows as tuples,
+    # at most fetchSize rows are held in memory at a time
+    # the rows are read inside the connection's transaction, so don't commit before the iterator is exhausted
+    # a closed connection or a bad statement raises here, not when the first row is read
+    def executeStream(self, query: Union[str, sql.Composed], fetchSize=2000) -> Iterator[tuple]:
+        if self.connection is None:
+            raise DatabaseException.ConnectionInvalid("Connection Invalid")
+
+        cursor = self.connection.cursor(name="stream_" + str(next(DBConnector.__streamIDs)))
+        cursor.itersize = fetchSize
+        # the instrumentation reports the time and rows of the whole stream when it ends
+        start = time.perf_counter() if Instrumentation.isActive() else None
+        try:
+            self.__run(cursor, query)
+        except Exception as e:
+            if not self.connection.closed:
+                cursor.close()
+            if start is not None:
+                self.__record(query, None, -1, start, e)
+            raise
+        return self.__stream(cursor, query, fetchSize, start)
+
+    def __stream(self, cursor, query, fetchSize: int, start) -> Iterator[tuple]:
+        streamed = 0
+        error = None
+        try:
+            while True:
+                rows = cursor.fetchmany(fetchSize)
+                if not rows:
+                    break
+                streamed += len(rows)
+                yield from rows
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # the connector may have been closed before the stream was, its connection is gone then
+            if self.connection is not None and not self.connection.closed:
+                cursor.close()
+            if start is not None:
+                self.__record(query, None, -1 if error is not None else streamed, start, error)
+
+    def __record(self, statement, params, rows: int, start: float, error=None):
+        if isinstance(statement, sql.Composable):
+            try:
+                statement = statement.as_string(self.connection)
+            except Exception:
+                statement = repr(statement)
+        Instrumentation.record(statement, params, rows, time.perf_counter() - start, error)
+
+    # runs the query on cursor, translating constraint violations to DatabaseException
+    def __run(self, cursor, query: Union[str, sql.Composed], params=None):
+        try:
+            cursor.execute(query, params)
+        except errors.lookup("23502"):
+            raise DatabaseException.NOT_NULL_VIOLATION("NOT_NULL_VIOLATION")
+        except errors.lookup("23503"):
+            raise DatabaseException.FOREIGN_KEY_VIOLATION("FOREIGN_KEY_VIOLATION")
+        except errors.lookup("23505"):
+            raise DatabaseException.UNIQUE_VIOLATION("UNIQUE_VIOLATION")
+        except errors.lookup("23514"):
+            raise DatabaseException.CHECK_VIOLATION("CHECK_VIOLATION")
+        except errors.lookup("40001"):
+            raise DatabaseException.SERIALIZATION_FAILURE("SERIALIZATION_FAILURE")
+        except errors.lookup("40P01"):
+            raise DatabaseException.DEADLOCK_DETECTED("DEADLOCK_DETECTED")
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if not self.connection.closed:
+                raise
+            # the connection dropped, the pool will replace it
+            self.broken = True
+            raise DatabaseException.ConnectionInvalid("Connection Invalid")
+
+    # the connection parameters read from database.ini
+    @staticmethod
+    def params() -> dict:
+        return DBConnector.__config()
+
     # grant credentials
     @staticmethod
     def __config(filename=os.path.join(os.path.join(os.getcwd(), "Utility"), 'database.ini'),
@@ -23,6 +23,13 @@ class DatabaseException(_Exceptions):
     class CHECK_VIOLATION(_Exceptions):
         pass
 
+    # the transaction was rolled back by the database and can be run again
+    class SERIALIZATION_FAILURE(_Exceptions):
+        pass
+
+    class DEADLOCK_DETECTED(_Exceptions):
+        pass
+
     class database_ini_ERROR(_Exceptions):
         pass
 
@@ -0,0 +1,201 @@
+import collections
+import logging
+import sys
+import threading
+from typing import Callable, Dict, List
+
+# per-statement instrumentation of DBConnector and AsyncDBConnector. nothing is measured until enable() is called
+# or a listener is added, after that every statement produces a StatementEvent that is
+#   - passed to the listeners,
+#   - counted in the latency histogram of its calling function,
+#   - logged (and kept) when it took at least the slow query threshold.
+# prometheus() renders the histograms and counters in the Prometheus text format
+
+# upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# modules whose frames are skipped when looking for the function that issued a statement
+INTERNAL_MODULES = {'Operations', 'Utility.DBConnector', 'Utility.AsyncDBConnector', 'Utility.Instrumentation',
+                    'Utility.Retry'}
+
+logger = logging.getLogger(__name__)
+
+
+class StatementEvent:
+    __slots__ = ('statement', 'params', 'rows', 'seconds', 'function', 'error')
+
+    # rows is -1 when the statement failed, error is the exception it raised
+    def __init__(self, statement: str, params, rows: int, seconds: float, function: str, error=None):
+        self.statement = statement
+        self.params = params
+        self.rows = rows
+        self.seconds = seconds
+        self.function = function
+        self.error = error
+
+    def __str__(self):
+        return self.function + " " + str(round(self.seconds * 1000, 3)) + "ms rows=" + str(self.rows) + \
+               (" error=" + type(self.error).__name__ if self.error is not None else "") + ": " + self.statement
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one counts what is above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.slow = 0
+
+    def observe(self, seconds: float):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+    # (upper bound, number of observations at most that bound), ending with (inf, count)
+    def cumulative(self) -> List[tuple]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+_lock = threading.Lock()
+_enabled = False
+_listeners = []
+_histograms = {}  # calling function -> LatencyHistogram
+_slowQueryThreshold = None
+_slowQueries = collections.deque(maxlen=100)
+
+
+# cheap check done by the connectors before timing a statement
+def isActive() -> bool:
+    return _enabled or len(_listeners) > 0
+
+
+# starts collecting histograms, statements that take at least slowQueryThreshold seconds are logged as warnings
+# and the last slowQueryLogSize of them are kept for slowQueries()
+def enable(slowQueryThreshold: float = None, slowQueryLogSize=100):
+    global _enabled, _slowQueryThreshold, _slowQueries
+    with _lock:
+        _enabled = True
+        _slowQueryThreshold = slowQueryThreshold
+        if _slowQueries.maxlen != slowQueryLogSize:
+            _slowQueries = collections.deque(_slowQueries, maxlen=slowQueryLogSize)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+# forget the collected histograms and slow queries
+def reset():
+    with _lock:
+        _histograms.clear()
+        _slowQueries.clear()
+
+
+# listener is called with a StatementEvent after every statement, in the thread that ran it
+def addListener(listener: Callable[[StatementEvent], None]):
+    with _lock:
+        _listeners.append(listener)
+
+
+def removeListener(listener: Callable[[StatementEvent], None]):
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def histograms() -> Dict[str, LatencyHistogram]:
+    with _lock:
+        return dict(_histograms)
+
+
+def slowQueries() -> List[StatementEvent]:
+    with _lock:
+        return list(_slowQueries)
+
+
+def _isHelper(frame) -> bool:
+    name = frame.f_code.co_name
+    return name.startswith("_") or name.startswith("<")
+
+
+# module.function of the closest caller outside the connectors, e.g. "Solution.addDisk". private helpers,
+# closures named _... and comprehensions report their caller instead, so Solution._bulkInsert counts as
+# Solution.addDisks. when every frame is one of those, the innermost one is reported
+def callingFunction() -> str:
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get('__name__') in INTERNAL_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    caller = frame
+    while caller is not None and (_isHelper(caller) or caller.f_globals.get('__name__') in INTERNAL_MODULES):
+        caller = caller.f_back
+    if caller is None:
+        caller = frame
+    return caller.f_globals.get('__name__', "unknown") + "." + caller.f_code.co_name
+
+
+def record(statement: str, params, rows: int, seconds: float, error=None):
+    event = StatementEvent(statement, params, rows, seconds, callingFunction(), error)
+    with _lock:
+        listeners = list(_listeners)
+        if _enabled:
+            histogram = _histograms.get(event.function)
+            if histogram is None:
+                histogram = _histograms[event.function] = LatencyHistogram()
+            histogram.observe(seconds)
+            if error is not None:
+                histogram.errors += 1
+            slow = _slowQueryThreshold is not None and seconds >= _slowQueryThreshold
+            if slow:
+                histogram.slow += 1
+                _slowQueries.append(event)
+        else:
+            slow = False
+    if slow:
+        logger.warning("slow statement: %s", event)
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception as e:
+            # a broken listener must not fail the statement
+            print(e)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == float('inf') else repr(bound)
+
+
+def prometheus() -> str:
+    lines = ["# HELP solution_statement_duration_seconds Wall time of the SQL statements, by calling function",
+             "# TYPE solution_statement_duration_seconds histogram"]
+    current = sorted(histograms().items())
+    for function, histogram in current:
+        label = "function=\"" + _label(function) + "\""
+        for bound, count in histogram.cumulative():
+            lines.append("solution_statement_duration_seconds_bucket{" + label + ",le=\"" + _bound(bound) + "\"} " +
+                         str(count))
+        lines.append("solution_statement_duration_seconds_sum{" + label + "} " + repr(histogram.sum))
+        lines.append("solution_statement_duration_seconds_count{" + label + "} " + str(histogram.count))
+    counters = [("solution_statement_errors_total", "SQL statements that raised", 'errors'),
+                ("solution_slow_statements_total", "SQL statements above the slow query threshold", 'slow')]
+    for name, description, attribute in counters:
+        lines.append("# HELP " + name + " " + description)
+        lines.append("# TYPE " + name + " counter")
+        for function, histogram in current:
+            lines.append(name + "{function=\"" + _label(function) + "\"} " + str(getattr(histogram, attribute)))
+    return "\n".join(lines) + "\n"
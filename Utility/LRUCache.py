@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    # constructor
+    # holds at most maxSize entries, an entry older than ttl seconds is treated as missing (ttl=None never expires)
+    def __init__(self, maxSize=10000, ttl=60.0, clock=time.monotonic):
+        if maxSize < 1:
+            raise ValueError("Invalid cache size: " + str(maxSize))
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.__clock = clock
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__generation = 0
+        self.__invalidated = OrderedDict()  # key -> generation of its last invalidation, for the newest maxSize keys
+        self.__floor = 0  # generation of the newest invalidation forgotten from __invalidated
+
+    # the cached value, or None when it is missing or expired
+    def get(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and (self.ttl is None or self.__clock() - entry[1] < self.ttl):
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return None
+
+    # taken before reading a value from its source, and passed to put with it
+    def generation(self) -> int:
+        with self.__lock:
+            return self.__generation
+
+    # with the generation taken before the value was read, the put is dropped when the key was invalidated since:
+    # the value may have been read before the write that invalidated it
+    def put(self, key, value, generation=None):
+        with self.__lock:
+            if generation is not None and generation < max(self.__floor, self.__invalidated.get(key, 0)):
+                return
+            self.__entries[key] = (value, self.__clock())
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxSize:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self.__lock:
+            self.__generation += 1
+            for key in keys:
+                if self.__entries.pop(key, None) is not None:
+                    self.invalidations += 1
+                self.__invalidated[key] = self.__generation
+                self.__invalidated.move_to_end(key)
+            while len(self.__invalidated) > self.maxSize:
+                _, generation = self.__invalidated.popitem(last=False)
+                self.__floor = max(self.__floor, generation)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__generation += 1
+            self.__invalidated.clear()
+            self.__floor = self.__generation
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations, 'size': len(self.__entries)}
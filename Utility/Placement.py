@@ -0,0 +1,107 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+from Utility.PlacementPolicy import PlacementPolicy
+
+# QueriesOnDisks.Cost is an INTEGER, a placement that costs more can't be stored
+MAX_COST = 2 ** 31 - 1
+
+
+# disks in a fixed order (the policy's), finds the first one with at least a given free space.
+# a max segment tree over the free spaces, so both the lookup and an update cost O(log n)
+class FirstFitIndex:
+    def __init__(self, freeSpaces: List[int]):
+        self.__size = 1
+        while self.__size < len(freeSpaces):
+            self.__size *= 2
+        self.__tree = [-1] * (2 * self.__size)
+        self.__tree[self.__size:self.__size + len(freeSpaces)] = freeSpaces
+        for node in range(self.__size - 1, 0, -1):
+            self.__tree[node] = max(self.__tree[2 * node], self.__tree[2 * node + 1])
+
+    def update(self, index: int, freeSpace: int):
+        node = self.__size + index
+        self.__tree[node] = freeSpace
+        node //= 2
+        while node >= 1:
+            self.__tree[node] = max(self.__tree[2 * node], self.__tree[2 * node + 1])
+            node //= 2
+
+    # the first index from start on with at least space free, -1 if there is none
+    def first(self, space: int, start=0) -> int:
+        return self.__first(1, 0, self.__size, space, start)
+
+    def __first(self, node: int, low: int, high: int, space: int, start: int) -> int:
+        if high <= start or self.__tree[node] < space:
+            return -1
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self.__first(2 * node, low, middle, space, start)
+        if found == -1:
+            found = self.__first(2 * node + 1, middle, high, space, start)
+        return found
+
+
+# disks sorted by free space, finds the one with the least space that is still enough
+class BestFitIndex:
+    def __init__(self, freeSpaces: List[int]):
+        self.__entries = sorted((freeSpace, index) for index, freeSpace in enumerate(freeSpaces))
+
+    def update(self, index: int, oldFreeSpace: int, freeSpace: int):
+        del self.__entries[bisect_left(self.__entries, (oldFreeSpace, index))]
+        insort(self.__entries, (freeSpace, index))
+
+    # the indexes with at least space free, tightest first
+    def candidates(self, space: int):
+        for position in range(bisect_left(self.__entries, (space, -1)), len(self.__entries)):
+            yield self.__entries[position][1]
+
+
+# first-fit-decreasing: the queries, largest first, each go to the first disk in policy order they fit on.
+# queries are (QueryID, QuerySize), disks are (DiskID, DiskSpeed, DiskFreeSpace, DiskCostPerByte), placedOn
+# holds the disks each query is already on (those can't take it again), a disk where the placement would cost
+# more than maxCost (QuerySize * DiskCostPerByte) can't take the query either.
+# returns {QueryID: DiskID} of the new placements and the sorted IDs of the queries that fit nowhere
+def solvePlacement(queries: List[tuple], disks: List[tuple], policy: PlacementPolicy,
+                   placedOn: Dict[int, set] = None, maxCost: int = None) -> Tuple[Dict[int, int], List[int]]:
+    placedOn = placedOn or {}
+    if policy == PlacementPolicy.CHEAPEST:
+        disks = sorted(disks, key=lambda disk: (disk[3], disk[0]))
+    elif policy == PlacementPolicy.FASTEST:
+        disks = sorted(disks, key=lambda disk: (-disk[1], disk[0]))
+    elif policy == PlacementPolicy.BEST_FIT:
+        disks = sorted(disks, key=lambda disk: disk[0])
+    else:
+        raise ValueError("Unknown placement policy: " + str(policy))
+    freeSpaces = [disk[2] for disk in disks]
+    firstFit = FirstFitIndex(freeSpaces) if policy != PlacementPolicy.BEST_FIT else None
+    bestFit = BestFitIndex(freeSpaces) if policy == PlacementPolicy.BEST_FIT else None
+
+    mapping = {}
+    unplaced = []
+    for queryID, size in sorted(queries, key=lambda query: (-query[1], query[0])):
+        excluded = placedOn.get(queryID, ())
+
+        def usable(index):
+            return disks[index][0] not in excluded and (maxCost is None or size * disks[index][3] <= maxCost)
+
+        found = -1
+        if firstFit is not None:
+            found = firstFit.first(size)
+            while found != -1 and not usable(found):
+                found = firstFit.first(size, found + 1)
+        else:
+            for index in bestFit.candidates(size):
+                if usable(index):
+                    found = index
+                    break
+        if found == -1:
+            unplaced.append(queryID)
+            continue
+        mapping[queryID] = disks[found][0]
+        if firstFit is not None:
+            firstFit.update(found, freeSpaces[found] - size)
+        else:
+            bestFit.update(found, freeSpaces[found], freeSpaces[found] - size)
+        freeSpaces[found] -= size
+    return mapping, sorted(unplaced)
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+# how placeQueries picks a disk among the ones a query fits on
+class PlacementPolicy(Enum):
+    CHEAPEST = 0  # lowest DiskCostPerByte
+    FASTEST = 1  # highest DiskSpeed
+    BEST_FIT = 2  # least free space left over
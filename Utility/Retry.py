@@ -0,0 +1,79 @@
+import asyncio
+import random
+import threading
+import time
+from Utility.Exceptions import DatabaseException
+
+# the errors after which the database has rolled the transaction back and running it again can succeed
+RETRYABLE = (DatabaseException.SERIALIZATION_FAILURE, DatabaseException.DEADLOCK_DETECTED)
+
+
+class ContentionStats:
+    FIELDS = ('transactions', 'retries', 'serialization_failures', 'deadlocks', 'gave_up', 'lock_wait_seconds')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field: str, amount=1):
+        with self.lock:
+            self.counters[field] += amount
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.counters)
+
+
+# runs a transaction again, after a jittered exponential backoff, when it fails with a RETRYABLE error.
+# the delay before retry n is uniform in [0, min(maxDelay, baseDelay * 2 ** n)] ("full jitter")
+class RetryPolicy:
+    def __init__(self, maxRetries=5, baseDelay=0.005, maxDelay=0.2, sleep=time.sleep, rng=None):
+        self.maxRetries = maxRetries
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.sleep = sleep
+        self.rng = rng if rng is not None else random.Random()
+        self.stats = ContentionStats()
+
+    def delay(self, attempt: int) -> float:
+        return self.rng.uniform(0, min(self.maxDelay, self.baseDelay * 2 ** attempt))
+
+    # transaction opens its own connection, commits and closes it, so every attempt starts from scratch
+    def run(self, transaction):
+        attempt = 0
+        while True:
+            try:
+                result = transaction()
+            except RETRYABLE as e:
+                if not self.__retrying(e, attempt):
+                    raise
+                self.sleep(self.delay(attempt))
+                attempt += 1
+                continue
+            self.stats.add('transactions')
+            return result
+
+    # run for a coroutine function, the backoff is an asyncio.sleep so the event loop goes on meanwhile
+    async def runAsync(self, transaction):
+        attempt = 0
+        while True:
+            try:
+                result = await transaction()
+            except RETRYABLE as e:
+                if not self.__retrying(e, attempt):
+                    raise
+                await asyncio.sleep(self.delay(attempt))
+                attempt += 1
+                continue
+            self.stats.add('transactions')
+            return result
+
+    # counts the failure of an attempt, False when it was the last one
+    def __retrying(self, error, attempt: int) -> bool:
+        self.stats.add('deadlocks' if isinstance(error, DatabaseException.DEADLOCK_DETECTED)
+                       else 'serialization_failures')
+        if attempt >= self.maxRetries:
+            self.stats.add('gave_up')
+            return False
+        self.stats.add('retries')
+        return True